@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+سرور stub برای Anthropic Messages API
+
+این سرور پاسخ‌های ثابت و سازگار با قالب Messages API را با تأخیر قابل تنظیم
+برمی‌گرداند تا کارایی کلاینت بدون هزینه و محدودیت نرخ API واقعی اندازه‌گیری شود.
+مسیرهای Message Batches API هم شبیه‌سازی می‌شوند: هر دسته پس از batch-latency
+ثانیه پایان‌یافته گزارش می‌شود و نتایج آن به صورت JSONL برگردانده می‌شود.
+بلوک‌های سیستم دارای cache_control مانند کش پرامپت API گزارش می‌شوند: بار اول
+cache_creation_input_tokens و پس از آن cache_read_input_tokens.
+
+اجرا:
+    python benchmarks/anthropic_stub.py --port 8765 --latency 0.2
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 python run.py
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_BATCH_JOBS_ENABLED=true python run.py
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
+
+SENTIMENT_RESULT = {
+    "sentiment": "neutral",
+    "confidence": 0.8,
+    "text_snippet": "stub",
+    "justification": "stub response",
+}
+
+TOPIC_RESULT = {
+    "topics": ["stub"],
+    "confidence": {"stub": 0.8},
+    "summary": "stub response",
+}
+
+
+def _result_for(body: Dict[str, Any]) -> Dict[str, Any]:
+    """انتخاب پاسخ بر اساس پرامپت سیستم"""
+    system = body.get("system", "")
+    if isinstance(system, list):
+        system = " ".join(block.get("text", "") for block in system)
+    
+    system = system.lower()
+    if "topic" in system and "sentiment" in system:
+        return {"sentiment": SENTIMENT_RESULT, "topic": TOPIC_RESULT}
+    if "topic" in system:
+        return TOPIC_RESULT
+    return SENTIMENT_RESULT
+
+
+def _usage_for(body: Dict[str, Any], cached_prompts: Set[str]) -> Dict[str, int]:
+    """مصرف توکن با شبیه‌سازی کش پرامپت برای بلوک‌های سیستم قابل کش"""
+    system = body.get("system", "")
+    blocks = system if isinstance(system, list) else []
+    prompt = "".join(block.get("text", "") for block in blocks if block.get("cache_control"))
+    if not prompt:
+        return {"input_tokens": 100, "output_tokens": 20}
+    
+    # حدود چهار کاراکتر به ازای هر توکن
+    prompt_tokens = min(max(len(prompt) // 4, 1), 90)
+    usage = {"input_tokens": 100 - prompt_tokens, "output_tokens": 20}
+    if prompt in cached_prompts:
+        return {**usage, "cache_creation_input_tokens": 0, "cache_read_input_tokens": prompt_tokens}
+    
+    cached_prompts.add(prompt)
+    return {**usage, "cache_creation_input_tokens": prompt_tokens, "cache_read_input_tokens": 0}
+
+
+def _message_for(body: Dict[str, Any], cached_prompts: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """ساخت پاسخ Messages API برای بدنه یک درخواست"""
+    result: Any = _result_for(body)
+    # درخواست دسته‌ای: آرایه‌ای از {id, text} که برای هر آیتم یک نتیجه می‌گیرد
+    try:
+        items = json.loads(body["messages"][0]["content"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        items = None
+    if isinstance(items, list):
+        result = [{"id": item.get("id"), **result} for item in items if isinstance(item, dict)]
+    
+    return {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stub"),
+        "content": [{"type": "text", "text": json.dumps(result)}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": _usage_for(body, cached_prompts if cached_prompts is not None else set()),
+    }
+
+
+def _batch_status(batch: Dict[str, Any], batch_latency: float, base_url: str) -> Dict[str, Any]:
+    """وضعیت یک Message Batch در قالب API"""
+    created_at = batch["created_at"]
+    ended = time.time() - batch["submitted"] >= batch_latency
+    total = len(batch["requests"])
+    
+    return {
+        "id": batch["id"],
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": {
+            "processing": 0 if ended else total,
+            "succeeded": total if ended else 0,
+            "errored": 0,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": created_at.isoformat(),
+        "expires_at": (created_at + timedelta(hours=24)).isoformat(),
+        "ended_at": (created_at + timedelta(seconds=batch_latency)).isoformat() if ended else None,
+        "archived_at": None,
+        "cancel_initiated_at": None,
+        "results_url": f"{base_url}v1/messages/batches/{batch['id']}/results" if ended else None,
+    }
+
+
+def create_stub_app(latency: float = 0.2, batch_latency: float = 1.0) -> FastAPI:
+    """ساخت برنامه stub با تأخیر مشخص برای هر درخواست و هر دسته"""
+    app = FastAPI()
+    app.state.latency = latency
+    app.state.batch_latency = batch_latency
+    app.state.requests = 0
+    app.state.batches = {}
+    app.state.cached_prompts = set()
+    
+    @app.post("/v1/messages")
+    async def create_message(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(app.state.latency)
+        return _message_for(body, app.state.cached_prompts)
+        
+    @app.post("/v1/messages/batches")
+    async def create_batch(request: Request) -> Dict[str, Any]:
+        body = await request.json()
+        batch = {
+            "id": f"msgbatch_{uuid.uuid4().hex}",
+            "requests": body.get("requests", []),
+            "created_at": datetime.now(timezone.utc),
+            "submitted": time.time(),
+        }
+        app.state.batches[batch["id"]] = batch
+        return _batch_status(batch, app.state.batch_latency, str(request.base_url))
+        
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def get_batch(batch_id: str, request: Request) -> Dict[str, Any]:
+        if batch_id not in app.state.batches:
+            raise HTTPException(status_code=404, detail="batch not found")
+        return _batch_status(app.state.batches[batch_id], app.state.batch_latency, str(request.base_url))
+    
+    @app.get("/v1/messages/batches/{batch_id}/results")
+    async def get_batch_results(batch_id: str) -> Response:
+        if batch_id not in app.state.batches:
+            raise HTTPException(status_code=404, detail="batch not found")
+        
+        lines = [
+            json.dumps({
+                "custom_id": item["custom_id"],
+                "result": {"type": "succeeded", "message": _message_for(item["params"], app.state.cached_prompts)},
+            })
+            for item in app.state.batches[batch_id]["requests"]
+        ]
+        return Response("\n".join(lines) + "\n", media_type="application/binary")
+    
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Anthropic Messages API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per request")
+    parser.add_argument("--batch-latency", type=float, default=1.0, help="seconds until a message batch ends")
+    args = parser.parse_args()
+    
+    import uvicorn
+    uvicorn.run(create_stub_app(args.latency, args.batch_latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+بنچمارک توان عملیاتی کلاینت Anthropic در برابر سرور stub محلی
+
+مسیر قدیمی (کلاینت همگام در asyncio.to_thread) را با کلاینت ناهمگام
+AnthropicClient مقایسه می‌کند و تعداد درخواست در ثانیه را گزارش می‌دهد.
+مسیر قدیمی به اندازه thread pool پیش‌فرض محدود است. حالت batch تعداد تحلیل
+به ازای هر درخواست را با analyze_batch اندازه می‌گیرد.
+
+اجرا:
+    python benchmarks/bench_anthropic_client.py --requests 400 --latency 0.2 --concurrency 64 --batch-size 20
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import anthropic
+import uvicorn
+
+from benchmarks.anthropic_stub import create_stub_app
+from src.api.anthropic import AnthropicClient
+from src.config.settings import settings
+
+STUB_APP = None
+
+
+def start_stub(latency: float) -> str:
+    """اجرای سرور stub در یک thread جداگانه و برگرداندن آدرس آن"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    
+    global STUB_APP
+    STUB_APP = create_stub_app(latency)
+    config = uvicorn.Config(STUB_APP, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+async def run_to_thread(base_url: str, requests: int) -> float:
+    """مسیر قدیمی: کلاینت همگام در asyncio.to_thread"""
+    client = anthropic.Anthropic(api_key="stub", base_url=base_url)
+    
+    async def one() -> None:
+        await asyncio.to_thread(
+            client.messages.create,
+            model="stub", max_tokens=64, system="sentiment",
+            messages=[{"role": "user", "content": "سلام"}]
+        )
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return requests / elapsed
+
+
+async def run_async(base_url: str, requests: int, concurrency: int) -> float:
+    """مسیر جدید: AnthropicClient ناهمگام با semaphore و اتصال‌های مشترک"""
+    client = AnthropicClient(
+        api_key="stub", default_model="stub", fallback_model="stub",
+        max_tokens=64, base_url=base_url, max_concurrency=concurrency
+    )
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(client.sentiment_analysis(f"سلام {i}") for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return requests / elapsed
+
+
+async def run_batch(base_url: str, requests: int, concurrency: int, batch_size: int) -> Tuple[float, int]:
+    """تحلیل دسته‌ای: چند متن در یک پرامپت"""
+    settings.anthropic_api.batch_size = batch_size
+    client = AnthropicClient(
+        api_key="stub", default_model="stub", fallback_model="stub",
+        max_tokens=64, base_url=base_url, max_concurrency=concurrency
+    )
+    app_requests_before = STUB_APP.state.requests
+    
+    start = time.perf_counter()
+    await client.analyze_batch([f"سلام {i}" for i in range(requests)], "sentiment")
+    elapsed = time.perf_counter() - start
+    await client.close()
+    return requests / elapsed, STUB_APP.state.requests - app_requests_before
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency per request (seconds)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=20)
+    args = parser.parse_args()
+    
+    base_url = start_stub(args.latency)
+    
+    print(f"requests={args.requests} latency={args.latency}s concurrency={args.concurrency}")
+    print(f"{'to_thread':<10} {await run_to_thread(base_url, args.requests):8.1f} req/s")
+    print(f"{'async':<10} {await run_async(base_url, args.requests, args.concurrency):8.1f} req/s")
+    
+    rate, http_requests = await run_batch(base_url, args.requests, args.concurrency, args.batch_size)
+    print(f"{'batch':<10} {rate:8.1f} analyses/s  ({args.requests / max(http_requests, 1):.1f} analyses per request)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+بنچمارک تشخیص محلی زبان
+
+نمونه‌های کوتاه فارسی، عربی، اردو، انگلیسی و زبان‌های دیگر تکرار می‌شوند و
+دقت LanguageIdentifier روی برچسب‌های نمونه و توان عملیاتی آن (توییت در ثانیه
+روی یک هسته) گزارش می‌شود.
+
+اجرا:
+    python benchmarks/bench_langid.py --rows 100000
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.processor.langid import UNDETERMINED, LanguageIdentifier
+
+SAMPLES = [
+    ("fa", "امروز هوا در تهران بسیار آلوده است و مدارس تعطیل شدند"),
+    ("fa", "من نمی‌دانم چرا این اتفاق افتاد https://t.co/abc @someone"),
+    ("fa", "قیمت دلار باز هم بالا رفت #اقتصاد"),
+    ("fa", "خیلی خوب بود ممنون"),
+    ("ar", "ذهبت إلى المدرسة في الصباح مع أصدقائي"),
+    ("ar", "هذه هي الحقيقة التي لا يريدون سماعها"),
+    ("ar", "الحمد لله على كل حال"),
+    ("ur", "میں آج بہت خوش ہوں کیونکہ موسم اچھا ہے"),
+    ("ur", "پاکستان کی ٹیم نے میچ جیت لیا"),
+    ("ur", "یہ بات سچ نہیں ہے"),
+    ("en", "This is the best thing that happened to me today"),
+    ("en", "I can't believe it was so cold this morning"),
+    ("en", "Breaking news: election results announced"),
+    (UNDETERMINED, "Bugün hava çok güzel ve güneşli"),
+    (UNDETERMINED, "Привет как дела у тебя сегодня"),
+    (UNDETERMINED, "hola amigos como estan todos hoy en la fiesta"),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+    
+    identifier = LanguageIdentifier()
+    
+    mistakes = Counter()
+    for expected, text in SAMPLES:
+        detected = identifier.detect(text)
+        if detected != expected:
+            mistakes[(expected, detected)] += 1
+    print(f"accuracy: {len(SAMPLES) - sum(mistakes.values())} of {len(SAMPLES)}")
+    for (expected, detected), count in mistakes.items():
+        print(f"  {expected} -> {detected}: {count}")
+    
+    texts = [text for _, text in SAMPLES] * (args.rows // len(SAMPLES) + 1)
+    texts = texts[:args.rows]
+    
+    start = time.perf_counter()
+    identifier.detect_many(texts)
+    seconds = time.perf_counter() - start
+    print(f"detected {len(texts)} tweets in {seconds:.3f}s ({len(texts) / seconds:,.0f} tweets/s, "
+          f"{seconds / len(texts) * 1e6:.1f} us/tweet)")
+
+
+if __name__ == "__main__":
+    main()
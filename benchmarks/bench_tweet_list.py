@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+بنچمارک خواندن یک صفحه ۱۰۰تایی از توییت‌ها
+
+مسیر ORM (نمونه‌های Tweet به همراه بارگذاری کاربر) را با مسیر projection
+(سطرهای سبک TweetRepository.list_rows) مقایسه می‌کند و زمان CPU و حافظه
+تخصیص‌یافته به ازای هر درخواست را گزارش می‌دهد.
+
+اجرا:
+    python benchmarks/bench_tweet_list.py --rows 5000 --page-size 100 --iterations 200
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from src.data.database import Base
+from src.data.models import Tweet, User
+from src.data.repositories import TweetRepository
+from src.web.api import TweetResponse
+
+
+async def seed(session_factory, rows: int) -> None:
+    """ایجاد داده‌های مصنوعی"""
+    async with session_factory() as session:
+        users = [
+            User(id=uuid.uuid4(), user_id=f"u{i}", username=f"user{i}", display_name=f"User {i}",
+                 raw_data={"bio": "x" * 512})
+            for i in range(max(rows // 10, 1))
+        ]
+        session.add_all(users)
+        now = datetime.utcnow()
+        session.add_all([
+            Tweet(
+                tweet_id=str(i), user_id=users[i % len(users)].id, text=f"متن نمونه توییت شماره {i}",
+                created_at=now - timedelta(seconds=i), like_count=i % 50, retweet_count=i % 7,
+                reply_count=i % 3, quote_count=0, language="fa", raw_data={"payload": "y" * 2048}
+            )
+            for i in range(rows)
+        ])
+        await session.commit()
+
+
+async def orm_page(session_factory, page_size: int) -> list:
+    """مسیر قدیمی: نمونه‌های ORM به همراه بارگذاری کاربر"""
+    async with session_factory() as session:
+        query = (
+            select(Tweet)
+            .options(selectinload(Tweet.user))
+            .order_by(Tweet.created_at.desc())
+            .limit(page_size)
+        )
+        tweets = (await session.execute(query)).scalars().all()
+        return [
+            TweetResponse(
+                id=str(t.id), tweet_id=t.tweet_id, text=t.text, created_at=t.created_at,
+                author_username=t.user.username, author_name=t.user.display_name,
+                retweet_count=t.retweet_count, like_count=t.like_count,
+                reply_count=t.reply_count, quote_count=t.quote_count, language=t.language
+            )
+            for t in tweets
+        ]
+
+
+async def projection_page(session_factory, page_size: int) -> list:
+    """مسیر جدید: سطرهای سبک از TweetRepository.list_rows"""
+    async with session_factory() as session:
+        rows = await TweetRepository(session).list_rows(limit=page_size)
+        return [
+            TweetResponse(
+                id=str(r.id), tweet_id=r.tweet_id, text=r.text, created_at=r.created_at,
+                author_username=r.author_username, author_name=r.author_name,
+                retweet_count=r.retweet_count, like_count=r.like_count,
+                reply_count=r.reply_count, quote_count=r.quote_count, language=r.language
+            )
+            for r in rows
+        ]
+
+
+async def measure(name: str, func, session_factory, page_size: int, iterations: int) -> None:
+    """اندازه‌گیری زمان CPU و حافظه تخصیص‌یافته"""
+    for _ in range(5):  # گرم کردن
+        await func(session_factory, page_size)
+    
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        await func(session_factory, page_size)
+    cpu = (time.process_time() - cpu_start) / iterations
+    wall = (time.perf_counter() - wall_start) / iterations
+    
+    tracemalloc.start()
+    await func(session_factory, page_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"{name:<12} cpu={cpu * 1000:8.2f} ms  wall={wall * 1000:8.2f} ms  peak_alloc={peak / 1024:8.1f} KiB")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    
+    await seed(session_factory, args.rows)
+    
+    print(f"rows={args.rows} page_size={args.page_size} iterations={args.iterations}")
+    await measure("orm", orm_page, session_factory, args.page_size, args.iterations)
+    await measure("projection", projection_page, session_factory, args.page_size, args.iterations)
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
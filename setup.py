@@ -17,10 +17,12 @@ setup(
         "alembic>=1.11.1",
         "httpx>=0.24.1",
         "asyncio>=3.4.3",
-        "anthropic>=0.5.0",
+        "anthropic>=0.40.0",
         "apscheduler>=3.10.1",
         "jinja2>=3.1.2",
         "pandas>=2.0.3",
+        "numpy>=1.24.0",
+        "pyarrow>=12.0.0",
         "pytest>=7.4.0",
         "pytest-asyncio>=0.21.1",
         "aiosqlite>=0.19.0",
@@ -6,22 +6,181 @@
 
 import asyncio
 import json
+import logging
+import random
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
 import anthropic
+import httpx
 from anthropic.types import MessageParam
 from pydantic import ValidationError
 
 from src.api.interfaces import (SentimentAnalysisResult,
                                             TextAnalysisClient,
                                             TextAnalysisRequest,
+                                            SentimentTopicResult,
                                             TextAnalysisResponse,
                                             TopicExtractionResult)
+from src.api.governor import PRIORITY_BULK, PRIORITY_NORMAL, BudgetGovernor, anthropic_governor
+from src.api.usage import TokenUsageTracker, usage_tracker as default_usage_tracker
 from src.config.settings import settings
-from src.core.exceptions import (AnthropicAPIError,
+from src.core.exceptions import (AnthropicAPIError, BudgetExceededError,
                                              ValidationError as AppValidationError)
+from src.data.analysis_cache import AnalysisCache
+
+logger = logging.getLogger(__name__)
+
+# تخمین پایین تعداد توکن پرامپت‌های انگلیسی برای مقایسه با حداقل طول قابل کش
+PROMPT_CACHE_CHARS_PER_TOKEN = 4.0
+
+# پرامپت‌های سیستم تحلیل تک‌متنی (درخواست‌های تعاملی و Message Batches API)
+SYSTEM_PROMPTS = {
+    "sentiment": """
+    You are a sentiment analysis assistant. Analyze the sentiment of the given text.
+    Classify the sentiment as 'positive', 'neutral', or 'negative'.
+    Provide confidence score between 0.0 and 1.0.
+    Extract a relevant text snippet that justifies the sentiment.
+    Return your analysis in the following JSON format:
+    {
+        "sentiment": "positive|neutral|negative",
+        "confidence": 0.95,
+        "text_snippet": "relevant text from the input that justifies the sentiment",
+        "justification": "brief explanation of your sentiment classification"
+    }
+    Return ONLY the JSON without any other text or explanations.
+    """,
+    "topic": """
+    You are a topic extraction assistant. Extract the main topics from the given text.
+    Identify 1-5 main topics depending on the text length and complexity.
+    Assign a confidence value between 0.0 and 1.0 for each topic.
+    Provide a brief summary of the overall content.
+    Return your analysis in the following JSON format:
+    {
+        "topics": ["topic1", "topic2", "topic3"],
+        "confidence": {"topic1": 0.95, "topic2": 0.85, "topic3": 0.78},
+        "summary": "brief summary of the text content"
+    }
+    Return ONLY the JSON without any other text or explanations.
+    """,
+    "sentiment_topic": """
+    You are a text analysis assistant. Analyze both the sentiment and the main topics of the given text.
+    For sentiment, classify it as 'positive', 'neutral', or 'negative', provide a confidence score
+    between 0.0 and 1.0 and extract a relevant text snippet that justifies the sentiment.
+    For topics, identify 1-5 main topics depending on the text length and complexity,
+    assign a confidence value between 0.0 and 1.0 for each topic and provide a brief summary.
+    Return your analysis in the following JSON format:
+    {
+        "sentiment": {
+            "sentiment": "positive|neutral|negative",
+            "confidence": 0.95,
+            "text_snippet": "relevant text from the input that justifies the sentiment",
+            "justification": "brief explanation of your sentiment classification"
+        },
+        "topic": {
+            "topics": ["topic1", "topic2", "topic3"],
+            "confidence": {"topic1": 0.95, "topic2": 0.85, "topic3": 0.78},
+            "summary": "brief summary of the text content"
+        }
+    }
+    Return ONLY the JSON without any other text or explanations.
+    """,
+}
+
+USER_MESSAGES = {
+    "sentiment": """
+    Text to analyze: {text}
+    
+    Perform sentiment analysis and return the JSON result.
+    """,
+    "topic": """
+    Text to analyze: {text}
+    
+    Extract the main topics and return the JSON result.
+    """,
+    "sentiment_topic": """
+    Text to analyze: {text}
+    
+    Perform sentiment analysis and topic extraction and return the JSON result.
+    """,
+}
+
+# پرامپت‌های تحلیل دسته‌ای: ورودی آرایه‌ای از {id, text} و خروجی آرایه‌ای از نتایج با همان id
+BATCH_SYSTEM_PROMPTS = {
+    "sentiment": """
+    You are a sentiment analysis assistant. You will receive a JSON array of items, each with an "id" and a "text".
+    For EVERY item, classify the sentiment of its text as 'positive', 'neutral', or 'negative',
+    provide a confidence score between 0.0 and 1.0, extract a relevant text snippet that justifies the sentiment
+    and give a brief justification.
+    Return a JSON array with exactly one object per input item, in the following format:
+    [
+        {
+            "id": "the id of the input item",
+            "sentiment": "positive|neutral|negative",
+            "confidence": 0.95,
+            "text_snippet": "relevant text from the input that justifies the sentiment",
+            "justification": "brief explanation of your sentiment classification"
+        }
+    ]
+    Return ONLY the JSON array without any other text or explanations.
+    """,
+    "topic": """
+    You are a topic extraction assistant. You will receive a JSON array of items, each with an "id" and a "text".
+    For EVERY item, extract 1-5 main topics depending on the text length and complexity,
+    assign a confidence value between 0.0 and 1.0 for each topic and give a brief summary.
+    Return a JSON array with exactly one object per input item, in the following format:
+    [
+        {
+            "id": "the id of the input item",
+            "topics": ["topic1", "topic2"],
+            "confidence": {"topic1": 0.95, "topic2": 0.85},
+            "summary": "brief summary of the text content"
+        }
+    ]
+    Return ONLY the JSON array without any other text or explanations.
+    """,
+    "sentiment_topic": """
+    You are a text analysis assistant. You will receive a JSON array of items, each with an "id" and a "text".
+    For EVERY item, analyze both its sentiment and its main topics.
+    For sentiment, classify it as 'positive', 'neutral', or 'negative', provide a confidence score
+    between 0.0 and 1.0, a relevant text snippet that justifies the sentiment and a brief justification.
+    For topics, extract 1-5 main topics with a confidence value between 0.0 and 1.0 each and a brief summary.
+    Return a JSON array with exactly one object per input item, in the following format:
+    [
+        {
+            "id": "the id of the input item",
+            "sentiment": {
+                "sentiment": "positive|neutral|negative",
+                "confidence": 0.95,
+                "text_snippet": "relevant text from the input that justifies the sentiment",
+                "justification": "brief explanation of your sentiment classification"
+            },
+            "topic": {
+                "topics": ["topic1", "topic2"],
+                "confidence": {"topic1": 0.95, "topic2": 0.85},
+                "summary": "brief summary of the text content"
+            }
+        }
+    ]
+    Return ONLY the JSON array without any other text or explanations.
+    """,
+}
+
+BATCH_RESULT_MODELS = {
+    "sentiment": SentimentAnalysisResult,
+    "topic": TopicExtractionResult,
+    "sentiment_topic": SentimentTopicResult,
+}
+
+# نسخه پرامپت هر نوع تحلیل؛ با تغییر پرامپت باید افزایش یابد تا نتایج کش قبلی استفاده نشوند
+PROMPT_VERSIONS = {
+    "sentiment": "1",
+    "topic": "1",
+    "sentiment_topic": "1",
+    "custom": "1",
+}
 
 
 class AnthropicClient(TextAnalysisClient):
@@ -33,79 +192,264 @@ class AnthropicClient(TextAnalysisClient):
         default_model: str,
         fallback_model: str,
         max_tokens: int = 1024,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        cache: Optional[AnalysisCache] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 16,
+        request_timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        prompt_caching: bool = True,
+        prompt_cache_min_tokens: int = 1024,
+        usage_tracker: Optional[TokenUsageTracker] = None,
+        governor: Optional[BudgetGovernor] = None,
+        priority: int = PRIORITY_NORMAL,
+        max_attempts: int = 3,
+        initial_delay: float = 1.0,
+        exponential_factor: float = 2.0,
+        jitter: float = 0.1
     ) -> None:
         self.api_key = api_key
         self.default_model = default_model
         self.fallback_model = fallback_model
         self.max_tokens = max_tokens
         self.temperature = temperature
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.cache = cache
+        self.prompt_caching = prompt_caching
+        self.prompt_cache_min_tokens = prompt_cache_min_tokens
+        self.usage_tracker = usage_tracker or default_usage_tracker
+        # حاکم بودجه مشترک (محدودیت نرخ، توکن و هزینه)؛ None یعنی بدون محدودیت
+        self.governor = governor
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.exponential_factor = exponential_factor
+        self.jitter = jitter
+        self.timeout = anthropic.Timeout(request_timeout, connect=connect_timeout)
+        
+        # محدود کردن درخواست‌های هم‌زمان؛ اتصال‌ها در یک کلاینت HTTP مشترک نگه داشته می‌شوند
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.http_client = anthropic.DefaultAsyncHttpxClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency
+            )
+        )
+        self.client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=self.timeout,
+            # بدون بازتلاش داخلی SDK تا هر تلاش از _send و حاکم بودجه عبور کند
+            max_retries=0,
+            http_client=self.http_client
+        )
+    
+    async def close(self) -> None:
+        """بستن اتصال‌های باز کلاینت"""
+        await self.client.close()
+    
+    async def _cache_lookup(
+        self, 
+        text: str, 
+        analysis_type: str,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """جستجوی نتیجه تحلیل در کش"""
+        if self.cache is None:
+            return None, None
+        
+        prompt_version = PROMPT_VERSIONS.get(analysis_type, PROMPT_VERSIONS["custom"])
+        cache_key = self.cache.make_key(text, analysis_type, self.default_model, prompt_version, options)
+        return cache_key, await self.cache.get(cache_key)
+    
+    async def _cache_store(
+        self, 
+        cache_key: Optional[str], 
+        analysis_type: str, 
+        response: Dict[str, Any],
+        result: Dict[str, Any]
+    ) -> None:
+        """ذخیره نتیجه تحلیل در کش
+        
+        کلید کش با مدل پیش‌فرض ساخته می‌شود، پس پاسخ مدل جایگزین کش نمی‌شود تا
+        جایگزین پاسخ مدل پیش‌فرض نشود.
+        """
+        if self.cache is None or cache_key is None:
+            return
+        
+        if response["requested_model"] != self.default_model:
+            return
+        
+        prompt_version = PROMPT_VERSIONS.get(analysis_type, PROMPT_VERSIONS["custom"])
+        await self.cache.set(cache_key, analysis_type, response["model"], prompt_version, result)
+    
+    def _cacheable(self, system_prompt: str) -> bool:
+        """آیا پرامپت سیستم به حداقل طول پیشوند قابل کش API می‌رسد
+        
+        API پیشوندهای کوتاه‌تر از حداقل مدل (1024 توکن و برای Haiku 2048) را کش
+        نمی‌کند، پس علامت‌گذاری آن‌ها فقط برخوردهای ناممکن را در آمار نشان می‌دهد.
+        """
+        return (
+            self.prompt_caching
+            and len(system_prompt) / PROMPT_CACHE_CHARS_PER_TOKEN >= self.prompt_cache_min_tokens
+        )
+    
+    def _system(self, system_prompt: str) -> Union[str, List[Dict[str, Any]]]:
+        """پرامپت سیستم؛ در صورت قابل کش بودن به صورت بلوک دارای cache_control"""
+        if not self._cacheable(system_prompt):
+            return system_prompt
+        
+        # پرامپت سیستم ثابت است و فقط پیام کاربر تغییر می‌کند، پس پیشوند کش می‌شود
+        return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+    
+    def _calculate_backoff(self, attempt: int) -> float:
+        """محاسبه زمان انتظار برای بازتلاش"""
+        delay = self.initial_delay * (self.exponential_factor ** attempt)
+        jitter_amount = delay * self.jitter
+        return delay + random.uniform(-jitter_amount, jitter_amount)
+    
+    @staticmethod
+    def _retry_after(error: anthropic.APIStatusError) -> Optional[float]:
+        """خواندن هدر retry-after از پاسخ خطا"""
+        try:
+            return float(error.response.headers.get("retry-after", ""))
+        except (AttributeError, ValueError):
+            return None
+    
+    async def _send(
+        self, 
+        system_prompt: str, 
+        user_message: str,
+        model: str,
+        max_tokens: int,
+        analysis_type: str,
+        priority: int
+    ) -> Any:
+        """ارسال یک درخواست با رزرو ظرفیت از حاکم بودجه و اصلاح آن با مصرف واقعی"""
+        reservation = None
+        if self.governor is not None:
+            estimated_input = self.governor.estimate_tokens(system_prompt, user_message)
+            reservation = await self.governor.acquire(estimated_input, max_tokens, priority)
+        
+        start_time = time.time()
+        try:
+            # کلاینت ناهمگام SDK؛ تعداد درخواست‌های در حال اجرا با semaphore محدود می‌شود
+            async with self._semaphore:
+                message = await self.client.messages.create(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=self.temperature,
+                    system=self._system(system_prompt),
+                    messages=[
+                        {"role": "user", "content": user_message}
+                    ]
+                )
+        except BaseException:
+            if reservation is not None:
+                self.governor.release(reservation)
+            raise
+        
+        usage = getattr(message, "usage", None)
+        self.usage_tracker.record(
+            analysis_type, usage, time.time() - start_time, cacheable=self._cacheable(system_prompt)
+        )
+        if reservation is not None:
+            self.governor.settle(reservation, usage)
+        
+        return message
     
     async def _make_request(
         self, 
         system_prompt: str, 
         user_message: str,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        analysis_type: str = "custom",
+        priority: Optional[int] = None
     ) -> Dict[str, Any]:
-        """ارسال درخواست به Anthropic API و دریافت پاسخ"""
+        """ارسال درخواست به Anthropic API و دریافت پاسخ
+        
+        خطاهای گذرا (محدودیت نرخ، خطای سرور و اتصال) با تأخیر نمایی بازتلاش
+        می‌شوند؛ پس از پایان تلاش‌ها یا خطای غیرقابل بازتلاش مدل پیش‌فرض،
+        درخواست یک بار دیگر با مدل جایگزین تکرار می‌شود.
+        """
         start_time = time.time()
+        max_tokens = max_tokens or self.max_tokens
+        priority = self.priority if priority is None else priority
         
-        try:
-            # استفاده از asyncio.to_thread برای اجرای درخواست همگام به صورت ناهمگام
-            message = await asyncio.to_thread(
-                self.client.messages.create,
-                model=model or self.default_model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system=system_prompt,
-                messages=[
-                    {"role": "user", "content": user_message}
-                ]
-            )
-            
-            # استخراج پاسخ
-            response_text = message.content[0].text if message.content else ""
-            
-            # تلاش برای تبدیل پاسخ به JSON
-            try:
-                response_data = json.loads(response_text)
-            except json.JSONDecodeError:
-                # اگر پاسخ JSON معتبر نباشد، آن را به عنوان متن ساده برمی‌گردانیم
-                response_data = {"text": response_text}
-            
-            # زمان پردازش
-            processing_time = time.time() - start_time
-            
-            return {
-                "data": response_data,
-                "model": message.model,
-                "processing_time": processing_time,
-                "raw_response": message
-            }
-            
-        except anthropic.APIError as e:
-            # در صورت خطا با مدل پیش‌فرض، تلاش با مدل جایگزین
-            if model is None and model != self.fallback_model:
+        models = [model or self.default_model]
+        if model is None and self.fallback_model and self.fallback_model != self.default_model:
+            models.append(self.fallback_model)
+        
+        errors: List[Exception] = []
+        message = None
+        
+        for model_name in models:
+            for attempt in range(self.max_attempts):
                 try:
-                    return await self._make_request(system_prompt, user_message, self.fallback_model)
-                except Exception as fallback_error:
+                    message = await self._send(
+                        system_prompt, user_message, model_name, max_tokens, analysis_type, priority
+                    )
+                    break
+                except BudgetExceededError:
+                    raise
+                except anthropic.RateLimitError as e:
+                    errors.append(e)
+                    wait_time = self._retry_after(e) or self._calculate_backoff(attempt)
+                    if self.governor is not None:
+                        # توقف همه درخواست‌ها، نه فقط همین درخواست
+                        self.governor.pause(wait_time)
+                    elif attempt < self.max_attempts - 1:
+                        await asyncio.sleep(wait_time)
+                except (anthropic.APIConnectionError, anthropic.InternalServerError) as e:
+                    errors.append(e)
+                    if attempt < self.max_attempts - 1:
+                        wait_time = self._calculate_backoff(attempt)
+                        logger.info(f"Anthropic API error, retrying in {wait_time:.2f}s ({attempt+1}/{self.max_attempts}): {str(e)}")
+                        await asyncio.sleep(wait_time)
+                except anthropic.APIError as e:
+                    # خطای غیرقابل بازتلاش؛ فقط مدل جایگزین امتحان می‌شود
+                    errors.append(e)
+                    break
+                except Exception as e:
                     raise AnthropicAPIError(
-                        message=f"Anthropic API error (fallback failed): {str(fallback_error)}",
-                        status_code=getattr(e, "status_code", None),
-                        details={"original_error": str(e), "fallback_error": str(fallback_error)}
+                        message=f"Unexpected error calling Anthropic API: {str(e)}",
+                        details={"error": str(e)}
                     )
-            else:
-                raise AnthropicAPIError(
-                    message=f"Anthropic API error: {str(e)}",
-                    status_code=getattr(e, "status_code", None),
-                    details={"error": str(e)}
-                )
-        except Exception as e:
+            
+            if message is not None:
+                break
+            if model_name != models[-1]:
+                logger.warning(f"Anthropic model {model_name} failed, falling back to {models[-1]}")
+        
+        if message is None:
+            last_error = errors[-1]
             raise AnthropicAPIError(
-                message=f"Unexpected error calling Anthropic API: {str(e)}",
-                details={"error": str(e)}
+                message=f"Anthropic API error: {str(last_error)}",
+                status_code=getattr(last_error, "status_code", None),
+                details={"errors": [str(error) for error in errors], "models": models}
             )
+        
+        # استخراج پاسخ
+        response_text = message.content[0].text if message.content else ""
+        
+        # تلاش برای تبدیل پاسخ به JSON
+        try:
+            response_data = json.loads(response_text)
+        except json.JSONDecodeError:
+            # اگر پاسخ JSON معتبر نباشد، آن را به عنوان متن ساده برمی‌گردانیم
+            response_data = {"text": response_text}
+            
+        # زمان پردازش
+        processing_time = time.time() - start_time
+            
+        return {
+            "data": response_data,
+            "model": message.model,
+            "requested_model": model_name,
+            "processing_time": processing_time,
+            "raw_response": message
+        }
     
     async def analyze_text(self, request: TextAnalysisRequest) -> TextAnalysisResponse:
         """تحلیل متن با استفاده از API"""
@@ -116,6 +460,9 @@ class AnthropicClient(TextAnalysisClient):
         elif request.analysis_type == "topic":
             result = await self.topic_extraction(request.text)
             
+        elif request.analysis_type == "sentiment_topic":
+            result = await self.sentiment_topic_analysis(request.text)
+            
         else:
             # تحلیل سفارشی
             system_prompt = f"""
@@ -135,16 +482,21 @@ class AnthropicClient(TextAnalysisClient):
             Return ONLY valid JSON with your analysis results.
             """
             
-            response = await self._make_request(system_prompt, user_message)
+            cache_key, result = await self._cache_lookup(request.text, request.analysis_type, request.options)
             
-            try:
-                # نتیجه تحلیل را با توجه به نوع آن برمی‌گردانیم
-                result = response["data"]
-            except (KeyError, ValueError) as e:
-                raise AppValidationError(
-                    message=f"Invalid analysis result: {str(e)}",
-                    details={"response": response}
-                )
+            if result is None:
+                response = await self._make_request(system_prompt, user_message, analysis_type=request.analysis_type)
+                
+                try:
+                    # نتیجه تحلیل را با توجه به نوع آن برمی‌گردانیم
+                    result = response["data"]
+                except (KeyError, ValueError) as e:
+                    raise AppValidationError(
+                        message=f"Invalid analysis result: {str(e)}",
+                        details={"response": response}
+                    )
+                
+                await self._cache_store(cache_key, request.analysis_type, response, result)
         
         # ایجاد پاسخ تحلیل
         return TextAnalysisResponse(
@@ -157,32 +509,20 @@ class AnthropicClient(TextAnalysisClient):
     
     async def sentiment_analysis(self, text: str) -> SentimentAnalysisResult:
         """تحلیل احساسات متن"""
-        system_prompt = """
-        You are a sentiment analysis assistant. Analyze the sentiment of the given text.
-        Classify the sentiment as 'positive', 'neutral', or 'negative'.
-        Provide confidence score between 0.0 and 1.0.
-        Extract a relevant text snippet that justifies the sentiment.
-        Return your analysis in the following JSON format:
-        {
-            "sentiment": "positive|neutral|negative",
-            "confidence": 0.95,
-            "text_snippet": "relevant text from the input that justifies the sentiment",
-            "justification": "brief explanation of your sentiment classification"
-        }
-        Return ONLY the JSON without any other text or explanations.
-        """
+        # متن‌های تکراری (ریتوییت‌ها و کمپین‌ها) از کش پاسخ داده می‌شوند
+        cache_key, cached = await self._cache_lookup(text, "sentiment")
+        if cached is not None:
+            return SentimentAnalysisResult(**cached)
         
-        user_message = f"""
-        Text to analyze: {text}
-        
-        Perform sentiment analysis and return the JSON result.
-        """
-        
-        response = await self._make_request(system_prompt, user_message)
+        response = await self._make_request(
+            SYSTEM_PROMPTS["sentiment"],
+            USER_MESSAGES["sentiment"].format(text=text),
+            analysis_type="sentiment"
+        )
         
         try:
             data = response["data"]
-            return SentimentAnalysisResult(
+            result = SentimentAnalysisResult(
                 sentiment=data["sentiment"],
                 confidence=data["confidence"],
                 text_snippet=data["text_snippet"],
@@ -193,34 +533,25 @@ class AnthropicClient(TextAnalysisClient):
                 message=f"Invalid sentiment analysis result: {str(e)}",
                 details={"response": response}
             )
+        
+        await self._cache_store(cache_key, "sentiment", response, result.model_dump())
+        return result
     
     async def topic_extraction(self, text: str) -> TopicExtractionResult:
         """استخراج موضوعات از متن"""
-        system_prompt = """
-        You are a topic extraction assistant. Extract the main topics from the given text.
-        Identify 1-5 main topics depending on the text length and complexity.
-        Assign a confidence value between 0.0 and 1.0 for each topic.
-        Provide a brief summary of the overall content.
-        Return your analysis in the following JSON format:
-        {
-            "topics": ["topic1", "topic2", "topic3"],
-            "confidence": {"topic1": 0.95, "topic2": 0.85, "topic3": 0.78},
-            "summary": "brief summary of the text content"
-        }
-        Return ONLY the JSON without any other text or explanations.
-        """
-        
-        user_message = f"""
-        Text to analyze: {text}
+        cache_key, cached = await self._cache_lookup(text, "topic")
+        if cached is not None:
+            return TopicExtractionResult(**cached)
         
-        Extract the main topics and return the JSON result.
-        """
-        
-        response = await self._make_request(system_prompt, user_message)
+        response = await self._make_request(
+            SYSTEM_PROMPTS["topic"],
+            USER_MESSAGES["topic"].format(text=text),
+            analysis_type="topic"
+        )
         
         try:
             data = response["data"]
-            return TopicExtractionResult(
+            result = TopicExtractionResult(
                 topics=data["topics"],
                 confidence=data["confidence"],
                 summary=data.get("summary")
@@ -230,6 +561,241 @@ class AnthropicClient(TextAnalysisClient):
                 message=f"Invalid topic extraction result: {str(e)}",
                 details={"response": response}
             )
+        
+        await self._cache_store(cache_key, "topic", response, result.model_dump())
+        return result
+    
+    async def sentiment_topic_analysis(self, text: str) -> SentimentTopicResult:
+        """تحلیل احساسات و استخراج موضوع در یک درخواست"""
+        cache_key, cached = await self._cache_lookup(text, "sentiment_topic")
+        if cached is not None:
+            return SentimentTopicResult(**cached)
+        
+        response = await self._make_request(
+            SYSTEM_PROMPTS["sentiment_topic"],
+            USER_MESSAGES["sentiment_topic"].format(text=text),
+            analysis_type="sentiment_topic"
+        )
+        
+        try:
+            data = response["data"]
+            result = SentimentTopicResult(sentiment=data["sentiment"], topic=data["topic"])
+        except (KeyError, TypeError, ValidationError) as e:
+            raise AppValidationError(
+                message=f"Invalid sentiment/topic analysis result: {str(e)}",
+                details={"response": response}
+            )
+        
+        await self._cache_store(cache_key, "sentiment_topic", response, result.model_dump())
+        return result
+    
+    def _parse_batch_items(self, data: Any) -> List[Dict[str, Any]]:
+        """استخراج آرایه نتایج از پاسخ مدل"""
+        if isinstance(data, dict):
+            if isinstance(data.get("results"), list):
+                return data["results"]
+            
+            # پاسخ JSON معتبر نبوده؛ تلاش برای یافتن آرایه داخل متن (مثلاً داخل بلوک کد)
+            text = data.get("text", "")
+            start, end = text.find("["), text.rfind("]")
+            if start == -1 or end <= start:
+                return []
+            try:
+                data = json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                return []
+        
+        return [item for item in data if isinstance(item, dict)] if isinstance(data, list) else []
+    
+    async def _analyze_batch_once(
+        self, 
+        items: Dict[str, str], 
+        analysis_type: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Exception], Optional[Dict[str, Any]]]:
+        """ارسال یک دسته در یک درخواست و اعتبارسنجی جداگانه هر آیتم
+        
+        Returns:
+            نتایج معتبر، خطای آیتم‌های ناموفق و پاسخ درخواست (در صورت موفقیت)
+        """
+        user_message = json.dumps(
+            [{"id": item_id, "text": text} for item_id, text in items.items()],
+            ensure_ascii=False
+        )
+        max_tokens = max(self.max_tokens, settings.anthropic_api.batch_item_tokens * len(items))
+        
+        try:
+            response = await self._make_request(
+                BATCH_SYSTEM_PROMPTS[analysis_type], user_message, max_tokens=max_tokens,
+                analysis_type=f"{analysis_type}_batch", priority=PRIORITY_BULK
+            )
+        except AnthropicAPIError as e:
+            return {}, {item_id: e for item_id in items}, None
+        
+        result_model = BATCH_RESULT_MODELS[analysis_type]
+        results: Dict[str, Any] = {}
+        errors: Dict[str, Exception] = {}
+        
+        for item in self._parse_batch_items(response["data"]):
+            item_id = str(item.pop("id", ""))
+            if item_id not in items or item_id in results:
+                continue
+            try:
+                results[item_id] = result_model(**item)
+            except (TypeError, ValidationError) as e:
+                errors[item_id] = AppValidationError(
+                    message=f"Invalid {analysis_type} result for batch item {item_id}: {str(e)}",
+                    details={"item": item}
+                )
+        
+        for item_id in items:
+            if item_id not in results and item_id not in errors:
+                errors[item_id] = AppValidationError(
+                    message=f"Missing {analysis_type} result for batch item {item_id}",
+                    details={"response": response["data"]}
+                )
+        
+        return results, errors, response
+    
+    async def analyze_batch(
+        self, 
+        texts: List[str], 
+        analysis_type: str
+    ) -> List[Union[SentimentAnalysisResult, TopicExtractionResult, SentimentTopicResult, Dict[str, Any], Exception]]:
+        """تحلیل دسته‌ای متن‌ها با ارسال چند متن در یک پرامپت
+        
+        متن‌های کش‌شده بدون درخواست پاسخ داده می‌شوند. آیتم‌هایی که پاسخشان قابل
+        تجزیه یا معتبر نبوده، در دسته‌ای کوچک‌تر دوباره ارسال می‌شوند و آیتم‌های
+        موفق دوباره درخواست نمی‌شوند.
+        """
+        if analysis_type not in BATCH_SYSTEM_PROMPTS:
+            return await super().analyze_batch(texts, analysis_type)
+        
+        result_model = BATCH_RESULT_MODELS[analysis_type]
+        results: List[Any] = [None] * len(texts)
+        cache_keys: Dict[int, Optional[str]] = {}
+        pending: Dict[int, str] = {}
+        
+        for index, text in enumerate(texts):
+            cache_key, cached = await self._cache_lookup(text, analysis_type)
+            cache_keys[index] = cache_key
+            if cached is not None:
+                results[index] = result_model(**cached)
+            else:
+                pending[index] = text
+        
+        errors: Dict[int, Exception] = {}
+        for _ in range(settings.anthropic_api.batch_max_attempts):
+            if not pending:
+                break
+            
+            pending_indexes = list(pending)
+            batch_size = settings.anthropic_api.batch_size
+            chunks = [pending_indexes[i:i + batch_size] for i in range(0, len(pending_indexes), batch_size)]
+            
+            # شناسه هر آیتم در پرامپت، اندیس آن در لیست ورودی است
+            outcomes = await asyncio.gather(*(
+                self._analyze_batch_once({str(index): pending[index] for index in chunk}, analysis_type)
+                for chunk in chunks
+            ))
+            
+            for chunk_results, chunk_errors, response in outcomes:
+                for item_id, result in chunk_results.items():
+                    index = int(item_id)
+                    results[index] = result
+                    pending.pop(index, None)
+                    errors.pop(index, None)
+                    await self._cache_store(cache_keys[index], analysis_type, response, result.model_dump())
+                for item_id, error in chunk_errors.items():
+                    errors[int(item_id)] = error
+        
+        for index in pending:
+            results[index] = errors.get(index) or AppValidationError(message=f"No {analysis_type} result for item {index}")
+        
+        return results
+
+    def build_batch_request(self, custom_id: str, text: str, analysis_type: str) -> Dict[str, Any]:
+        """ساخت یک درخواست Message Batches API برای تحلیل یک متن"""
+        if analysis_type not in SYSTEM_PROMPTS:
+            raise AppValidationError(message=f"Unsupported batch analysis type: {analysis_type}")
+        
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": self.default_model,
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+                "system": self._system(SYSTEM_PROMPTS[analysis_type]),
+                "messages": [
+                    {"role": "user", "content": USER_MESSAGES[analysis_type].format(text=text)}
+                ]
+            }
+        }
+    
+    async def submit_message_batch(self, requests: List[Dict[str, Any]]) -> Any:
+        """ارسال دسته‌ای از درخواست‌ها به Message Batches API"""
+        if self.governor is not None:
+            self.governor.check_budget()
+        
+        try:
+            return await self.client.messages.batches.create(requests=requests)
+        except anthropic.APIError as e:
+            raise AnthropicAPIError(
+                message=f"Anthropic batch submission error: {str(e)}",
+                status_code=getattr(e, "status_code", None),
+                details={"error": str(e), "requests": len(requests)}
+            )
+    
+    async def get_message_batch(self, batch_id: str) -> Any:
+        """دریافت وضعیت یک Message Batch"""
+        try:
+            return await self.client.messages.batches.retrieve(batch_id)
+        except anthropic.APIError as e:
+            raise AnthropicAPIError(
+                message=f"Anthropic batch retrieval error: {str(e)}",
+                status_code=getattr(e, "status_code", None),
+                details={"error": str(e), "batch_id": batch_id}
+            )
+    
+    async def message_batch_results(
+        self, 
+        batch_id: str, 
+        analysis_type: str
+    ) -> AsyncIterator[Tuple[str, Optional[Union[SentimentAnalysisResult, TopicExtractionResult, SentimentTopicResult]], Optional[str], Optional[str]]]:
+        """پیمایش نتایج یک Message Batch پایان‌یافته
+        
+        Yields:
+            شناسه سفارشی، نتیجه معتبر (یا None)، پیام خطا (یا None) و مدل پاسخ‌دهنده
+        """
+        result_model = BATCH_RESULT_MODELS[analysis_type]
+        
+        try:
+            decoder = await self.client.messages.batches.results(batch_id)
+            async for entry in decoder:
+                outcome = entry.result
+                if outcome.type != "succeeded":
+                    error = getattr(outcome, "error", None)
+                    yield entry.custom_id, None, str(error) if error is not None else outcome.type, None
+                    continue
+                
+                message = outcome.message
+                self.usage_tracker.record(
+                    f"{analysis_type}_offline", getattr(message, "usage", None),
+                    cacheable=self._cacheable(SYSTEM_PROMPTS[analysis_type])
+                )
+                if self.governor is not None:
+                    # نتایج دسته‌ای در محدودیت نرخ شمرده نمی‌شوند و فقط در هزینه روزانه اثر دارند
+                    self.governor.settle(None, getattr(message, "usage", None), batch=True)
+                response_text = message.content[0].text if message.content else ""
+                try:
+                    yield entry.custom_id, result_model(**json.loads(response_text)), None, message.model
+                except (json.JSONDecodeError, TypeError, ValidationError) as e:
+                    yield entry.custom_id, None, f"Invalid {analysis_type} result: {str(e)}", message.model
+        except anthropic.APIError as e:
+            raise AnthropicAPIError(
+                message=f"Anthropic batch results error: {str(e)}",
+                status_code=getattr(e, "status_code", None),
+                details={"error": str(e), "batch_id": batch_id}
+            )
 
 
 def create_anthropic_client() -> AnthropicClient:
@@ -239,5 +805,30 @@ def create_anthropic_client() -> AnthropicClient:
         default_model=settings.anthropic_api.default_model,
         fallback_model=settings.anthropic_api.fallback_model,
         max_tokens=settings.anthropic_api.max_tokens,
-        temperature=settings.anthropic_api.temperature
-    )
\ No newline at end of file
+        temperature=settings.anthropic_api.temperature,
+        cache=AnalysisCache() if settings.anthropic_api.cache_enabled else None,
+        base_url=settings.anthropic_api.base_url,
+        max_concurrency=settings.anthropic_api.max_concurrency,
+        request_timeout=settings.anthropic_api.request_timeout,
+        connect_timeout=settings.anthropic_api.connect_timeout,
+        prompt_caching=settings.anthropic_api.prompt_caching_enabled,
+        prompt_cache_min_tokens=settings.anthropic_api.prompt_cache_min_tokens,
+        governor=anthropic_governor if settings.anthropic_api.governor_enabled else None,
+        max_attempts=settings.anthropic_api.max_attempts,
+        initial_delay=settings.anthropic_api.initial_delay,
+        exponential_factor=settings.anthropic_api.exponential_factor,
+        jitter=settings.anthropic_api.jitter
+    )
+
+
+@lru_cache()
+def get_anthropic_client() -> AnthropicClient:
+    """کلاینت مشترک پردازه؛ اتصال‌ها، کش حافظه نتایج و محدودیت هم‌زمانی بین اجراهای خط لوله حفظ می‌شوند"""
+    return create_anthropic_client()
+
+
+async def close_anthropic_client() -> None:
+    """بستن کلاینت مشترک (در صورت ساخته شدن) هنگام خاموش شدن برنامه"""
+    if get_anthropic_client.cache_info().currsize:
+        await get_anthropic_client().close()
+        get_anthropic_client.cache_clear()
@@ -0,0 +1,296 @@
+"""
+حاکم بودجه درخواست‌های Anthropic API
+
+این ماژول پیش از هر فراخوانی API، ظرفیت را از سطل‌های توکن (درخواست در دقیقه،
+توکن ورودی در دقیقه و توکن خروجی در دقیقه) رزرو می‌کند و پس از دریافت پاسخ،
+رزرو را با مصرف واقعی اصلاح می‌کند. درخواست‌های منتظر در یک صف اولویت‌دار
+قرار می‌گیرند و یک سقف هزینه روزانه از ارسال درخواست‌های بیشتر جلوگیری می‌کند.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.config.settings import settings
+from src.core.di import container
+from src.core.exceptions import BudgetExceededError
+
+logger = logging.getLogger(__name__)
+
+# اولویت‌ها (عدد کمتر یعنی اولویت بالاتر)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 5
+PRIORITY_BULK = 10
+
+# ضریب هزینه توکن‌های کش پرامپت نسبت به توکن ورودی عادی
+CACHE_WRITE_COST_FACTOR = 1.25
+CACHE_READ_COST_FACTOR = 0.1
+# تخفیف Message Batches API
+BATCH_COST_FACTOR = 0.5
+
+
+class TokenBucket:
+    """سطل توکن با ظرفیت دقیقه‌ای و پر شدن پیوسته
+    
+    موجودی می‌تواند منفی شود (وقتی مصرف واقعی از تخمین بیشتر است) که در
+    این صورت درخواست‌های بعدی تا جبران آن منتظر می‌مانند.
+    """
+    
+    def __init__(self, per_minute: int) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+    
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        """مدت انتظار تا در دسترس شدن مقدار خواسته‌شده"""
+        if self.unlimited:
+            return 0.0
+        
+        self._refill()
+        # درخواست بزرگ‌تر از ظرفیت فقط منتظر پر شدن کامل سطل می‌ماند
+        needed = min(amount, self.capacity) - self.tokens
+        return max(needed / self.rate, 0.0)
+    
+    def consume(self, amount: float) -> None:
+        if not self.unlimited:
+            self._refill()
+            self.tokens -= amount
+    
+    def adjust(self, delta: float) -> None:
+        """اصلاح موجودی پس از مشخص شدن مصرف واقعی (delta مثبت یعنی بازگرداندن)"""
+        if not self.unlimited:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+    
+    def available(self) -> Optional[float]:
+        if self.unlimited:
+            return None
+        self._refill()
+        return self.tokens
+
+
+class Reservation:
+    """ظرفیت رزروشده برای یک درخواست"""
+    
+    def __init__(self, input_tokens: int, output_tokens: int) -> None:
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+
+
+class BudgetGovernor:
+    """کنترل نرخ درخواست، نرخ توکن و هزینه روزانه با صف اولویت‌دار"""
+    
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        input_tokens_per_minute: int = 0,
+        output_tokens_per_minute: int = 0,
+        daily_spend_limit: float = 0.0,
+        input_token_cost: float = 0.0,
+        output_token_cost: float = 0.0,
+        chars_per_token: float = 2.5
+    ) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.output_tokens = TokenBucket(output_tokens_per_minute)
+        self.daily_spend_limit = daily_spend_limit
+        self.input_token_cost = input_token_cost
+        self.output_token_cost = output_token_cost
+        self.chars_per_token = chars_per_token
+        
+        self._queue: List[List[Any]] = []
+        self._counter = itertools.count()
+        self._paused_until = 0.0
+        self._spend_day = datetime.utcnow().date()
+        self._spent = 0.0
+        
+        self.stats = {
+            "requests": 0,
+            "throttled_requests": 0,
+            "throttled_seconds": 0.0,
+            "rejected_requests": 0,
+            "rate_limit_pauses": 0,
+            "max_queue_depth": 0,
+        }
+    
+    @classmethod
+    def from_settings(cls) -> "BudgetGovernor":
+        """ساخت حاکم بودجه از تنظیمات برنامه"""
+        config = settings.anthropic_api
+        return cls(
+            requests_per_minute=config.requests_per_minute,
+            input_tokens_per_minute=config.input_tokens_per_minute,
+            output_tokens_per_minute=config.output_tokens_per_minute,
+            daily_spend_limit=config.daily_spend_limit,
+            input_token_cost=config.input_token_cost,
+            output_token_cost=config.output_token_cost,
+            chars_per_token=config.chars_per_token
+        )
+    
+    def estimate_tokens(self, *texts: str) -> int:
+        """تخمین محافظه‌کارانه تعداد توکن‌های ورودی پیش از ارسال"""
+        return int(sum(len(text) for text in texts) / self.chars_per_token) + 1
+    
+    def _roll_day(self) -> None:
+        """صفر کردن هزینه در ابتدای هر روز (UTC)"""
+        today = datetime.utcnow().date()
+        if today != self._spend_day:
+            self._spend_day = today
+            self._spent = 0.0
+    
+    def _cost(self, input_tokens: float, output_tokens: float) -> float:
+        return (input_tokens * self.input_token_cost + output_tokens * self.output_token_cost) / 1_000_000
+    
+    def check_budget(self) -> None:
+        """بررسی سقف هزینه روزانه؛ پس از رسیدن به سقف، درخواست جدیدی پذیرفته نمی‌شود"""
+        if self.daily_spend_limit <= 0:
+            return
+        
+        self._roll_day()
+        if self._spent >= self.daily_spend_limit:
+            self.stats["rejected_requests"] += 1
+            raise BudgetExceededError(
+                message=f"Daily Anthropic spend limit reached: {self._spent:.4f} of {self.daily_spend_limit:.2f} USD",
+                spent=self._spent,
+                limit=self.daily_spend_limit
+            )
+    
+    def _wait_time(self, entry: List[Any]) -> float:
+        return max(
+            self._paused_until - time.monotonic(),
+            self.requests.wait_time(1),
+            self.input_tokens.wait_time(entry[2]),
+            self.output_tokens.wait_time(entry[3])
+        )
+    
+    def _wake_head(self) -> None:
+        if self._queue:
+            self._queue[0][4].set()
+    
+    async def acquire(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        priority: int = PRIORITY_NORMAL
+    ) -> Reservation:
+        """رزرو ظرفیت برای یک درخواست؛ تا آزاد شدن ظرفیت و نوبت صف منتظر می‌ماند"""
+        self.check_budget()
+        
+        entry = [priority, next(self._counter), input_tokens, output_tokens, asyncio.Event()]
+        heapq.heappush(self._queue, entry)
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._queue))
+        throttled = 0.0
+        
+        try:
+            while True:
+                if self._queue[0] is not entry:
+                    # فقط سر صف ظرفیت مصرف می‌کند؛ بقیه تا نوبتشان منتظر می‌مانند
+                    started = time.monotonic()
+                    await entry[4].wait()
+                    entry[4].clear()
+                    throttled += time.monotonic() - started
+                    continue
+                
+                wait = self._wait_time(entry)
+                if wait <= 0:
+                    break
+                
+                started = time.monotonic()
+                try:
+                    await asyncio.wait_for(entry[4].wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                entry[4].clear()
+                throttled += time.monotonic() - started
+        except BaseException:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+            self._wake_head()
+            raise
+        
+        heapq.heappop(self._queue)
+        self.requests.consume(1)
+        self.input_tokens.consume(input_tokens)
+        self.output_tokens.consume(output_tokens)
+        self._wake_head()
+        
+        self.stats["requests"] += 1
+        if throttled > 0:
+            self.stats["throttled_requests"] += 1
+            self.stats["throttled_seconds"] += throttled
+        
+        return Reservation(input_tokens, output_tokens)
+    
+    def settle(self, reservation: Optional[Reservation], usage: Any, batch: bool = False) -> float:
+        """اصلاح رزرو با مصرف واقعی و ثبت هزینه
+        
+        Returns:
+            float: هزینه درخواست (دلار)
+        """
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        output_tokens = getattr(usage, "output_tokens", 0) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        
+        if reservation is not None:
+            # توکن‌های خوانده‌شده از کش در محدودیت ورودی شمرده نمی‌شوند
+            self.input_tokens.adjust(reservation.input_tokens - (input_tokens + cache_creation))
+            self.output_tokens.adjust(reservation.output_tokens - output_tokens)
+        
+        cost = self._cost(
+            input_tokens + cache_creation * CACHE_WRITE_COST_FACTOR + cache_read * CACHE_READ_COST_FACTOR,
+            output_tokens
+        )
+        if batch:
+            cost *= BATCH_COST_FACTOR
+        
+        self._roll_day()
+        self._spent += cost
+        return cost
+    
+    def release(self, reservation: Reservation) -> None:
+        """بازگرداندن ظرفیت رزروشده (درخواست و توکن‌ها) برای درخواستی که پاسخی نگرفت"""
+        self.requests.adjust(1)
+        self.input_tokens.adjust(reservation.input_tokens)
+        self.output_tokens.adjust(reservation.output_tokens)
+    
+    def pause(self, seconds: float) -> None:
+        """توقف ارسال درخواست‌ها (مثلاً پس از پاسخ 429 با retry-after)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.stats["rate_limit_pauses"] += 1
+        logger.warning(f"Anthropic requests paused for {seconds:.1f}s after rate limit")
+    
+    def metrics(self) -> Dict[str, Any]:
+        """معیارهای صف، زمان محدودشده، ظرفیت باقی‌مانده و هزینه روز"""
+        self._roll_day()
+        return {
+            **self.stats,
+            "queue_depth": len(self._queue),
+            "paused_seconds_remaining": max(self._paused_until - time.monotonic(), 0.0),
+            "available_requests": self.requests.available(),
+            "available_input_tokens": self.input_tokens.available(),
+            "available_output_tokens": self.output_tokens.available(),
+            "spend_today": round(self._spent, 6),
+            "daily_spend_limit": self.daily_spend_limit or None,
+        }
+
+
+# نمونه سراسری حاکم بودجه؛ محدودیت‌های API برای کل سازمان اعمال می‌شوند
+anthropic_governor = BudgetGovernor.from_settings()
+
+# ثبت در مخزن وابستگی‌ها
+container.register_instance(BudgetGovernor, anthropic_governor)
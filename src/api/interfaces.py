@@ -94,6 +94,22 @@ class TopicExtractionResult(BaseModel):
     summary: Optional[str] = None
 
 
+class SentimentTopicResult(BaseModel):
+    """نتیجه تحلیل ترکیبی احساسات و موضوع در یک درخواست"""
+    sentiment: SentimentAnalysisResult
+    topic: TopicExtractionResult
+    
+    def split(self) -> Dict[str, Union[SentimentAnalysisResult, TopicExtractionResult]]:
+        """تفکیک نتیجه به نتایج جداگانه هر نوع تحلیل"""
+        return {"sentiment": self.sentiment, "topic": self.topic}
+
+
+# انواع تحلیل ترکیبی و انواع تحلیلی که نتیجه آن‌ها به تفکیک ذخیره می‌شود
+COMBINED_ANALYSIS_TYPES = {
+    "sentiment_topic": ("sentiment", "topic"),
+}
+
+
 class TextAnalysisRequest(BaseModel):
     """درخواست تحلیل متن"""
     text: str
@@ -105,7 +121,7 @@ class TextAnalysisResponse(BaseModel):
     """پاسخ تحلیل متن"""
     request_id: str
     analysis_type: str
-    result: Union[SentimentAnalysisResult, TopicExtractionResult, Dict[str, Any]]
+    result: Union[SentimentAnalysisResult, TopicExtractionResult, SentimentTopicResult, Dict[str, Any]]
     raw_response: Optional[Dict[str, Any]] = None
     processing_time: float  # seconds
 
@@ -126,4 +142,46 @@ class TextAnalysisClient(ABC):
     @abstractmethod
     async def topic_extraction(self, text: str) -> TopicExtractionResult:
         """استخراج موضوعات از متن"""
-        pass
\ No newline at end of file
+        pass
+    
+    async def sentiment_topic_analysis(self, text: str) -> SentimentTopicResult:
+        """تحلیل احساسات و استخراج موضوع
+        
+        پیاده‌سازی پیش‌فرض دو تحلیل را جداگانه انجام می‌دهد؛ کلاینت‌ها می‌توانند
+        هر دو را در یک درخواست انجام دهند.
+        """
+        return SentimentTopicResult(
+            sentiment=await self.sentiment_analysis(text),
+            topic=await self.topic_extraction(text)
+        )
+    
+    async def analyze_batch(
+        self, 
+        texts: List[str], 
+        analysis_type: str
+    ) -> List[Union[SentimentAnalysisResult, TopicExtractionResult, SentimentTopicResult, Dict[str, Any], Exception]]:
+        """تحلیل دسته‌ای متن‌ها
+        
+        پیاده‌سازی پیش‌فرض متن‌ها را تک‌به‌تک تحلیل می‌کند؛ کلاینت‌ها می‌توانند
+        چند متن را در یک درخواست ارسال کنند.
+        
+        Returns:
+            نتایج به ترتیب ورودی؛ برای متن‌هایی که تحلیلشان ناموفق بوده، شیء استثنا برگردانده می‌شود
+        """
+        results: List[Union[SentimentAnalysisResult, TopicExtractionResult, SentimentTopicResult, Dict[str, Any], Exception]] = []
+        
+        for text in texts:
+            try:
+                if analysis_type == "sentiment":
+                    results.append(await self.sentiment_analysis(text))
+                elif analysis_type == "topic":
+                    results.append(await self.topic_extraction(text))
+                elif analysis_type == "sentiment_topic":
+                    results.append(await self.sentiment_topic_analysis(text))
+                else:
+                    response = await self.analyze_text(TextAnalysisRequest(text=text, analysis_type=analysis_type))
+                    results.append(response.result)
+            except Exception as e:
+                results.append(e)
+        
+        return results
\ No newline at end of file
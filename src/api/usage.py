@@ -0,0 +1,104 @@
+"""
+ردیابی مصرف توکن Anthropic API
+
+این ماژول مصرف توکن ورودی/خروجی و توکن‌های کش پرامپت (ایجاد و خواندن) را
+به تفکیک نوع تحلیل جمع می‌زند تا صرفه‌جویی کش پرامپت در توکن ورودی و تأخیر
+قابل مشاهده باشد. برخورد و عدم برخورد فقط برای درخواست‌هایی شمرده می‌شود که
+پرامپتشان علامت کش داشته است.
+"""
+
+from typing import Any, Dict, Optional
+
+from src.core.di import container
+
+# شمارنده‌هایی که برای هر نوع تحلیل نگهداری می‌شوند
+USAGE_FIELDS = (
+    "requests",
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+    "cache_hits",
+    "cache_misses",
+    "uncacheable_requests",
+)
+
+
+class TokenUsageTracker:
+    """جمع مصرف توکن و برخورد کش پرامپت به تفکیک نوع تحلیل"""
+    
+    def __init__(self) -> None:
+        self._usage: Dict[str, Dict[str, float]] = {}
+    
+    def record(
+        self,
+        analysis_type: str,
+        usage: Any,
+        latency: Optional[float] = None,
+        cacheable: bool = True
+    ) -> None:
+        """ثبت مصرف یک پاسخ (شیء usage پیام SDK)
+        
+        Args:
+            cacheable: آیا پرامپت درخواست با cache_control ارسال شده است
+        """
+        if usage is None:
+            return
+        
+        stats = self._usage.setdefault(analysis_type, {
+            **{field: 0 for field in USAGE_FIELDS},
+            "hit_latency": 0.0,
+            "hit_samples": 0,
+            "miss_latency": 0.0,
+            "miss_samples": 0,
+        })
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+        
+        stats["requests"] += 1
+        stats["input_tokens"] += getattr(usage, "input_tokens", 0) or 0
+        stats["output_tokens"] += getattr(usage, "output_tokens", 0) or 0
+        stats["cache_creation_input_tokens"] += cache_creation
+        stats["cache_read_input_tokens"] += cache_read
+        
+        if not cacheable:
+            # پرامپت کوتاه‌تر از حداقل طول قابل کش؛ نه برخورد است و نه عدم برخورد
+            stats["uncacheable_requests"] += 1
+            return
+        
+        # برخورد یعنی بخشی از پرامپت از کش خوانده شده است
+        outcome = "hit" if cache_read else "miss"
+        stats["cache_hits" if cache_read else "cache_misses"] += 1
+        if latency is not None:
+            stats[f"{outcome}_latency"] += latency
+            stats[f"{outcome}_samples"] += 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """خلاصه مصرف هر نوع تحلیل به همراه نرخ برخورد و میانگین تأخیر"""
+        result = {}
+        for analysis_type, stats in self._usage.items():
+            # کل توکن‌های ورودی پرامپت شامل بخش‌های کش‌شده
+            prompt_tokens = (
+                stats["input_tokens"] + stats["cache_creation_input_tokens"] + stats["cache_read_input_tokens"]
+            )
+            cacheable = stats["cache_hits"] + stats["cache_misses"]
+            result[analysis_type] = {
+                **{field: int(stats[field]) for field in USAGE_FIELDS},
+                # بدون درخواست قابل کش، نرخ برخورد تعریف نشده است
+                "cache_hit_rate": stats["cache_hits"] / cacheable if cacheable else None,
+                "cached_input_ratio": stats["cache_read_input_tokens"] / prompt_tokens if prompt_tokens else 0.0,
+                "avg_hit_latency": stats["hit_latency"] / stats["hit_samples"] if stats["hit_samples"] else None,
+                "avg_miss_latency": stats["miss_latency"] / stats["miss_samples"] if stats["miss_samples"] else None,
+            }
+        return result
+    
+    def reset(self) -> None:
+        """پاک کردن شمارنده‌ها"""
+        self._usage.clear()
+
+
+# نمونه سراسری ردیاب مصرف
+usage_tracker = TokenUsageTracker()
+
+# ثبت در مخزن وابستگی‌ها
+container.register_instance(TokenUsageTracker, usage_tracker)
@@ -17,7 +17,8 @@ from src.config.settings import settings
 from src.core.exceptions import CollectorError
 from src.data.database import get_db_session
 from src.data.models import Collection, CollectionStatus
-from src.data.repositories import (CollectionRepository, KeywordRepository,
+from src.data.repositories import (ENGAGEMENT_FIELDS, CollectionRepository,
+                                               KeywordRepository, KeywordVolumeRepository,
                                                TweetRepository, UserRepository)
 
 logger = logging.getLogger(__name__)
@@ -151,6 +152,7 @@ class TweetSaver:
         self.user_repo = UserRepository(session)
         self.tweet_repo = TweetRepository(session)
         self.keyword_repo = KeywordRepository(session)
+        self.volume_repo = KeywordVolumeRepository(session)
     
     async def save_tweet(
         self, 
@@ -168,7 +170,8 @@ class TweetSaver:
                 raw_data={"username": tweet_data.author_username, "name": tweet_data.author_name}
             )
             
-            # ۲. سپس توییت را ذخیره می‌کنیم
+            # ۲. سپس توییت را ذخیره می‌کنیم (تعامل قبلی برای به‌روزرسانی تجمیع‌ها نگه داشته می‌شود)
+            previous_engagement = await self.tweet_repo.get_engagement(tweet_data.tweet_id)
             tweet = await self.tweet_repo.create_or_update(
                 twitter_id=tweet_data.tweet_id,
                 user_id=user.id,
@@ -186,9 +189,25 @@ class TweetSaver:
             
             # ۳. اگر کلیدواژه‌ها مشخص شده باشند، آن‌ها را به توییت مرتبط می‌کنیم
             if keywords:
+                engagement = {field: getattr(tweet, field) or 0 for field in ENGAGEMENT_FIELDS}
+                engagement_delta = {
+                    field: engagement[field] - previous_engagement[field]
+                    for field in ENGAGEMENT_FIELDS
+                } if previous_engagement else engagement
+                
                 for keyword_text in keywords:
                     keyword = await self.keyword_repo.get_or_create(text=keyword_text)
-                    await self.keyword_repo.associate_with_tweet(keyword.id, tweet.id)
+                    _, created = await self.keyword_repo.add_tweet_association(
+                        keyword.id, tweet.id, tweet.created_at
+                    )
+                    
+                    # ۴. به‌روزرسانی افزایشی تجمیع‌های زمانی کلیدواژه در همین تراکنش
+                    if created:
+                        await self.volume_repo.record(keyword.id, user.id, tweet.created_at, engagement)
+                    elif previous_engagement:
+                        await self.volume_repo.record(
+                            keyword.id, user.id, tweet.created_at, engagement_delta, new_tweet=False
+                        )
             
             return True, str(tweet.id)
             
@@ -35,6 +35,12 @@ load_dotenv(override=True)
 # مسیر پایه پروژه
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
+
+def env_list(name: str) -> List[str]:
+    """خواندن یک متغیر محیطی به صورت لیست جداشده با کاما"""
+    return [item.strip() for item in os.environ.get(name, "").split(",") if item.strip()]
+
+
 class DatabaseSettings(BaseModel):
     """تنظیمات دیتابیس"""
     url: str = Field(default="sqlite:///./rasad.db", alias="DATABASE_URL")
@@ -42,6 +48,26 @@ class DatabaseSettings(BaseModel):
     max_overflow: int = 10
     pool_timeout: int = 30
     pool_recycle: int = 1800
+    # آدرس replicaهای فقط‌خواندنی؛ در صورت خالی بودن، خواندن‌ها از primary انجام می‌شوند
+    read_replica_urls: List[str] = Field(default_factory=lambda: env_list("DATABASE_READ_REPLICA_URLS"))
+    replica_max_lag_seconds: float = 30.0  # حداکثر تأخیر مجاز replica
+    replica_check_interval: int = 15  # فاصله بررسی تأخیر replica (ثانیه)
+    replica_retry_interval: int = 30  # مدت کنار گذاشتن replica خراب (ثانیه)
+    # پارتیشن‌بندی ماهانه جدول‌های توییت (فقط PostgreSQL)
+    partitioning_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("DATABASE_PARTITIONING", "").lower() == "true"
+    )
+    partition_premake_months: int = 3  # تعداد پارتیشن‌های آینده که از قبل ساخته می‌شوند
+    retention_months: int = 0  # نگهداری داده‌ها بر حسب ماه؛ صفر یعنی بدون حذف
+    retention_mode: str = "drop"  # 'drop' یا 'detach'
+    partition_maintenance_interval: int = 3600  # ثانیه
+    # ایندکس تمام‌متن توییت‌ها (FTS5 در SQLite و tsvector در PostgreSQL)
+    fulltext_search_enabled: bool = True
+    # انتقال داده‌های خام قدیمی از ستون raw_data به جدول raw_payloads هنگام راه‌اندازی
+    raw_payload_migration_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("RAW_PAYLOAD_MIGRATION", "true").lower() == "true"
+    )
+    raw_payload_migration_batch_size: int = 1000
 
     class Config:
         env_prefix = ""
@@ -65,6 +91,43 @@ class AnthropicAPISettings(BaseModel):
     """تنظیمات Anthropic API"""
     api_key: str = Field(default="", alias="ANTHROPIC_API_KEY")
     default_model: str = "claude-3-7-sonnet-20250219"
+    # آدرس جایگزین API (مثلاً سرور stub برای بنچمارک)؛ خالی یعنی آدرس پیش‌فرض SDK
+    base_url: Optional[str] = Field(default_factory=lambda: os.environ.get("ANTHROPIC_BASE_URL") or None)
+    max_concurrency: int = 16  # حداکثر درخواست‌های هم‌زمان
+    request_timeout: float = 60.0  # ثانیه
+    connect_timeout: float = 10.0  # ثانیه
+    # بازتلاش خطاهای گذرا پیش از رفتن سراغ مدل جایگزین
+    max_attempts: int = 3
+    initial_delay: float = 1.0
+    exponential_factor: float = 2.0
+    jitter: float = 0.1
+    prompt_caching_enabled: bool = True  # علامت‌گذاری پرامپت‌های سیستم ثابت برای کش پرامپت API
+    # حداقل طول پیشوند قابل کش مدل (1024 توکن، برای Haiku 2048)؛ پرامپت‌های کوتاه‌تر علامت‌گذاری نمی‌شوند
+    prompt_cache_min_tokens: int = 1024
+    # تحلیل دسته‌ای: چند توییت در یک پرامپت
+    batch_size: int = 20
+    batch_max_attempts: int = 2  # تعداد دورهای تلاش مجدد فقط برای آیتم‌های ناموفق
+    batch_item_tokens: int = 200  # بودجه توکن خروجی به ازای هر آیتم
+    # کش نتایج تحلیل بر اساس هش متن نرمال‌شده
+    cache_enabled: bool = True
+    cache_memory_size: int = 10000  # حداکثر تعداد مدخل‌های کش حافظه (LRU)
+    # تحلیل آفلاین حجم بالا با Message Batches API
+    batch_jobs_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("ANTHROPIC_BATCH_JOBS_ENABLED", "").lower() == "true"
+    )
+    batch_job_max_requests: int = 10000  # حداکثر درخواست در هر Message Batch
+    batch_poll_interval: int = 60  # فاصله بررسی وضعیت دسته‌ها (ثانیه)
+    # حاکم بودجه: محدودیت نرخ درخواست و توکن و سقف هزینه روزانه (صفر یعنی بدون محدودیت)
+    governor_enabled: bool = True
+    requests_per_minute: int = 50
+    input_tokens_per_minute: int = 20000
+    output_tokens_per_minute: int = 8000
+    daily_spend_limit: float = Field(
+        default_factory=lambda: float(os.environ.get("ANTHROPIC_DAILY_SPEND_LIMIT", "0") or 0)
+    )  # دلار
+    input_token_cost: float = 3.0  # دلار به ازای هر میلیون توکن ورودی
+    output_token_cost: float = 15.0  # دلار به ازای هر میلیون توکن خروجی
+    chars_per_token: float = 2.5  # برای تخمین توکن ورودی پیش از ارسال
     # کد بقیه
 
     @field_validator('api_key')
@@ -84,6 +147,61 @@ class CollectorSettings(BaseModel):
     default_query_type: str = "Latest"
 
 
+class ProcessorSettings(BaseModel):
+    """تنظیمات خط لوله پردازش"""
+    pipeline_version: str = "1"  # تغییر نسخه باعث پردازش مجدد تمام توییت‌ها می‌شود
+    batch_size: int = 100
+    watermark_safety_seconds: int = 300  # حاشیه اطمینان برای تراکنش‌هایی که دیرتر commit می‌شوند
+    claim_timeout_seconds: int = 600  # پس از این مدت، توییت‌های رهاشده دوباره قابل برداشت هستند (مدت اجاره صف کار)
+    # صف کار پایدار: /api/process-tweets به جای پردازش در درخواست، کار را در صف ثبت می‌کند
+    queue_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("PROCESSING_QUEUE_ENABLED", "").lower() == "true"
+    )
+    # تعداد کارگرهای درون برنامه وب (صفر یعنی فقط کارگرهای پردازه جداگانه)
+    queue_workers: int = Field(default_factory=lambda: int(os.environ.get("PROCESSING_WORKERS", "2")))
+    queue_max_attempts: int = 5  # پس از این تعداد تلاش ناموفق، آیتم (در صف یا مسیر مستقیم) dead می‌شود
+    queue_retry_base_seconds: float = 30.0
+    queue_retry_max_seconds: float = 3600.0
+    queue_poll_interval: float = 5.0  # فاصله بررسی صف وقتی آیتم آماده‌ای نیست
+    # تحلیل احساسات آبشاری: ابتدا امتیازدهنده محلی و در صورت اطمینان کم، LLM
+    sentiment_cascade_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("SENTIMENT_CASCADE_ENABLED", "").lower() == "true"
+    )
+    lexicon_confidence_threshold: float = 0.75  # حداقل اطمینان برای پذیرش نتیجه محلی
+    max_concurrency: int = 16  # حداکثر توییت‌های در حال پردازش هم‌زمان در خط لوله
+    # انواع تحلیل LLM که در خط لوله اجرا می‌شوند (با کاما جدا شده، مثلاً "sentiment,topic")
+    analysis_types: List[str] = Field(
+        default_factory=lambda: [
+            analysis_type.strip()
+            for analysis_type in os.environ.get("PIPELINE_ANALYSIS_TYPES", "").split(",")
+            if analysis_type.strip()
+        ]
+    )
+    # تشخیص محلی زبان توییت‌هایی که زبانشان از API نیامده (پیش از فیلترینگ)
+    language_detection_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("LANGUAGE_DETECTION_ENABLED", "").lower() == "true"
+    )
+    # تشخیص توییت‌های تقریباً تکراری (MinHash LSH)؛ فقط نماینده هر خوشه تحلیل می‌شود
+    near_duplicate_enabled: bool = Field(
+        default_factory=lambda: os.environ.get("NEAR_DUPLICATE_ENABLED", "").lower() == "true"
+    )
+    near_duplicate_threshold: float = 0.6  # حداقل شباهت Jaccard تخمینی برای یک خوشه
+    near_duplicate_num_perm: int = 64
+    near_duplicate_bands: int = 16
+    near_duplicate_window_seconds: int = 3600  # خوشه‌های بدون نسخه جدید پس از این مدت حذف می‌شوند
+    near_duplicate_max_clusters: int = 50000  # سقف اندازه شاخص در حافظه
+
+
+class ArchiveSettings(BaseModel):
+    """تنظیمات بایگانی توییت‌های قدیمی در فایل‌های Parquet"""
+    enabled: bool = Field(default_factory=lambda: os.environ.get("ARCHIVE_ENABLED", "").lower() == "true")
+    directory: str = Field(default_factory=lambda: os.environ.get("ARCHIVE_DIR", str(BASE_DIR / "archive")))
+    older_than_days: int = 90
+    batch_size: int = 5000
+    compression: str = "zstd"
+    interval_seconds: int = 86400
+
+
 class WebSettings(BaseModel):
     """تنظیمات وب"""
     host: str = Field(default="0.0.0.0", alias="HOST")
@@ -105,6 +223,8 @@ class Settings(BaseSettings):
     twitter_api: TwitterAPISettings = Field(default_factory=TwitterAPISettings)
     anthropic_api: AnthropicAPISettings = Field(default_factory=AnthropicAPISettings)
     collector: CollectorSettings = Field(default_factory=CollectorSettings)
+    processor: ProcessorSettings = Field(default_factory=ProcessorSettings)
+    archive: ArchiveSettings = Field(default_factory=ArchiveSettings)
     web: WebSettings = Field(default_factory=WebSettings)
 
     # تغییر validator به field_validator
@@ -61,6 +61,21 @@ class RateLimitError(APIError):
         super().__init__(message, status_code, response_body, details)
 
 
+class BudgetExceededError(AnthropicAPIError):
+    """خطای عبور از سقف هزینه روزانه Anthropic API"""
+    
+    def __init__(
+        self,
+        message: str,
+        spent: float,
+        limit: float,
+        details: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.spent = spent
+        self.limit = limit
+        super().__init__(message, details=details)
+
+
 class DatabaseError(TwitterAnalysisError):
     """خطای مربوط به دیتابیس"""
     pass
@@ -0,0 +1,98 @@
+"""
+کش نتایج تحلیل متن
+
+این ماژول نتایج تحلیل LLM را بر اساس هش متن نرمال‌شده، نوع تحلیل، مدل و
+نسخه پرامپت کش می‌کند تا توییت‌های تکراری (ریتوییت‌ها، کمپین‌های کپی‌شده و
+اسپم) فقط یک بار تحلیل شوند. کش دو لایه دارد: یک LRU محدود در حافظه و
+جدول analysis_cache در دیتابیس.
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from src.config.settings import settings
+from src.data.database import get_db_session
+from src.data.repositories import AnalysisCacheRepository
+from src.processor.normalizer import normalize_persian
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """کش دو لایه (حافظه و دیتابیس) برای نتایج تحلیل"""
+    
+    def __init__(self, max_memory_entries: Optional[int] = None, use_database: bool = True) -> None:
+        self.max_memory_entries = max_memory_entries or settings.anthropic_api.cache_memory_size
+        self.use_database = use_database
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"memory_hits": 0, "database_hits": 0, "misses": 0}
+    
+    @staticmethod
+    def make_key(
+        text: str,
+        analysis_type: str,
+        model: str,
+        prompt_version: str,
+        options: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """ساخت کلید کش از متن نرمال‌شده و مشخصات تحلیل"""
+        parts = [normalize_persian(text), analysis_type, model, prompt_version]
+        if options:
+            parts.append(json.dumps(options, sort_keys=True, ensure_ascii=False))
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        """افزودن به کش حافظه و حذف قدیمی‌ترین مدخل در صورت پر بودن"""
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """دریافت نتیجه از کش حافظه و در صورت نبود، از دیتابیس"""
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return result
+        
+        if self.use_database:
+            try:
+                async with get_db_session() as session:
+                    entry = await AnalysisCacheRepository(session).get(key)
+                    if entry is not None:
+                        result = entry.result
+            except Exception as e:
+                # خطای کش نباید مانع تحلیل شود
+                logger.warning(f"Analysis cache lookup failed: {str(e)}")
+        
+        if result is None:
+            self.stats["misses"] += 1
+            return None
+        
+        self.stats["database_hits"] += 1
+        self._remember(key, result)
+        return result
+    
+    async def set(
+        self,
+        key: str,
+        analysis_type: str,
+        model: str,
+        prompt_version: str,
+        result: Dict[str, Any]
+    ) -> None:
+        """ذخیره نتیجه در هر دو لایه کش"""
+        self._remember(key, result)
+        
+        if not self.use_database:
+            return
+        
+        try:
+            async with get_db_session() as session:
+                await AnalysisCacheRepository(session).save(key, analysis_type, model, prompt_version, result)
+        except Exception as e:
+            logger.warning(f"Analysis cache store failed: {str(e)}")
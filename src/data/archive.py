@@ -0,0 +1,473 @@
+"""
+بایگانی سرد توییت‌های قدیمی
+
+این ماژول توییت‌ها، نویسندگان و تحلیل‌های قدیمی‌تر از N روز را به فایل‌های
+Parquet فشرده با پارتیشن‌بندی روزانه منتقل کرده و از دیتابیس حذف می‌کند.
+مخزن ArchivedTweetRepository کوئری‌های بازه زمانی را به صورت شفاف روی
+دیتابیس و بایگانی اجرا می‌کند.
+
+ساختار پوشه بایگانی:
+    <directory>/tweets/date=YYYY-MM-DD/part-<uuid>.parquet
+    <directory>/users/date=YYYY-MM-DD/part-<uuid>.parquet
+    <directory>/analyses/date=YYYY-MM-DD/part-<uuid>.parquet
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import delete, func, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.config.settings import settings
+from src.core.plugin import Plugin
+from src.data.database import get_db_session
+from src.data.models import Analysis, Keyword, Tweet, TweetKeyword, User
+from src.data.repositories import (ProcessingStateRepository, RawPayloadRepository,
+                                   TweetRepository)
+from src.data.search import TweetSearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivedTweetRow(NamedTuple):
+    """سطر سبک توییت بایگانی‌شده؛ هم‌شکل با سطرهای TweetRepository.list_rows"""
+    id: str
+    tweet_id: str
+    text: str
+    created_at: datetime
+    retweet_count: int
+    like_count: int
+    reply_count: int
+    quote_count: int
+    language: Optional[str]
+    author_username: str
+    author_name: str
+
+
+TWEET_ROW_FIELDS = list(ArchivedTweetRow._fields)
+COUNT_FIELDS = ["retweet_count", "like_count", "reply_count", "quote_count"]
+
+
+class TweetArchiver:
+    """انتقال توییت‌های قدیمی از دیتابیس به فایل‌های Parquet"""
+    
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        compression: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> None:
+        self.directory = Path(directory or settings.archive.directory)
+        self.compression = compression or settings.archive.compression
+        self.batch_size = batch_size or settings.archive.batch_size
+    
+    def _write_partitioned(self, dataset: str, frame: pd.DataFrame, date_column: str) -> None:
+        """نوشتن یک DataFrame در پارتیشن‌های روزانه"""
+        if frame.empty:
+            return
+        
+        part_id = uuid.uuid4().hex
+        for day, group in frame.groupby(frame[date_column].dt.date):
+            partition_dir = self.directory / dataset / f"date={day.isoformat()}"
+            partition_dir.mkdir(parents=True, exist_ok=True)
+            group.to_parquet(
+                partition_dir / f"part-{part_id}.parquet",
+                compression=self.compression,
+                index=False
+            )
+    
+    async def archive_batch(self, cutoff: datetime) -> int:
+        """بایگانی یک دسته از توییت‌های قدیمی‌تر از cutoff"""
+        async with get_db_session() as session:
+            tweet_query = (
+                select(
+                    Tweet.id, Tweet.tweet_id, Tweet.user_id, Tweet.text, Tweet.created_at,
+                    Tweet.retweet_count, Tweet.like_count, Tweet.reply_count, Tweet.quote_count,
+                    Tweet.view_count, Tweet.language, Tweet.source,
+                    func.coalesce(User.username, "").label("author_username"),
+                    func.coalesce(User.display_name, User.username, "").label("author_name"),
+                )
+                .outerjoin(User, Tweet.user_id == User.id)
+                .where(Tweet.created_at < cutoff)
+                .order_by(Tweet.created_at)
+                .limit(self.batch_size)
+            )
+            tweet_rows = (await session.execute(tweet_query)).all()
+            if not tweet_rows:
+                return 0
+            
+            tweet_ids = [row.id for row in tweet_rows]
+            tweet_dates = {row.id: row.created_at for row in tweet_rows}
+            
+            # کلیدواژه‌های هر توییت برای کوئری‌های تاریخی بر اساس کلیدواژه
+            keyword_rows = (await session.execute(
+                select(TweetKeyword.tweet_id, Keyword.text)
+                .join(Keyword, TweetKeyword.keyword_id == Keyword.id)
+                .where(TweetKeyword.tweet_id.in_(tweet_ids))
+            )).all()
+            keywords: Dict[Any, List[str]] = {}
+            for row in keyword_rows:
+                keywords.setdefault(row.tweet_id, []).append(row.text)
+            
+            analysis_rows = (await session.execute(
+                select(
+                    Analysis.id, Analysis.tweet_id, Analysis.analysis_type, Analysis.result,
+                    Analysis.processed_by, Analysis.processing_time, Analysis.created_at
+                ).where(Analysis.tweet_id.in_(tweet_ids))
+            )).all()
+            
+            # نویسندگانی که خارج از این دسته توییتی ندارند همراه توییت‌ها منتقل می‌شوند
+            user_ids = list({row.user_id for row in tweet_rows})
+            remaining = set((await session.execute(
+                select(Tweet.user_id)
+                .where(Tweet.user_id.in_(user_ids), Tweet.id.notin_(tweet_ids))
+                .distinct()
+            )).scalars().all())
+            orphan_user_ids = [user_id for user_id in user_ids if user_id not in remaining]
+            user_rows = (await session.execute(
+                select(
+                    User.id, User.user_id, User.username, User.display_name, User.description,
+                    User.followers_count, User.following_count, User.twitter_created_at,
+                    User.verified, User.profile_image_url
+                ).where(User.id.in_(orphan_user_ids))
+            )).all() if orphan_user_ids else []
+            
+            # نوشتن فایل‌ها پیش از حذف؛ در صورت قطع شدن کار، تکرار در خواندن حذف می‌شود
+            tweets_frame = pd.DataFrame([
+                {
+                    **{field: getattr(row, field) for field in TWEET_ROW_FIELDS},
+                    "id": str(row.id),
+                    "user_id": str(row.user_id),
+                    "view_count": row.view_count,
+                    "source": row.source,
+                    "keywords": keywords.get(row.id, []),
+                }
+                for row in tweet_rows
+            ])
+            self._write_partitioned("tweets", tweets_frame, "created_at")
+            
+            latest_tweet_at: Dict[Any, datetime] = {}
+            for row in tweet_rows:
+                latest_tweet_at[row.user_id] = max(row.created_at, latest_tweet_at.get(row.user_id, row.created_at))
+            users_frame = pd.DataFrame([
+                {**row._asdict(), "id": str(row.id), "archived_with": latest_tweet_at[row.id]}
+                for row in user_rows
+            ])
+            self._write_partitioned("users", users_frame, "archived_with")
+            
+            analyses_frame = pd.DataFrame([
+                {
+                    **row._asdict(),
+                    "id": str(row.id),
+                    "tweet_id": str(row.tweet_id),
+                    "result": json.dumps(row.result, ensure_ascii=False),
+                    "tweet_created_at": tweet_dates[row.tweet_id],
+                }
+                for row in analysis_rows
+            ])
+            self._write_partitioned("analyses", analyses_frame, "tweet_created_at")
+            
+            # حذف از دیتابیس داغ
+            await session.execute(delete(Analysis).where(Analysis.tweet_id.in_(tweet_ids)))
+            await session.execute(delete(TweetKeyword).where(TweetKeyword.tweet_id.in_(tweet_ids)))
+            await RawPayloadRepository(session).delete_for(RawPayloadRepository.ENTITY_TWEET, tweet_ids)
+            await ProcessingStateRepository(session).delete_for(tweet_ids)
+            if settings.database.fulltext_search_enabled:
+                await TweetSearchIndex(session).remove(tweet_ids)
+            await session.execute(delete(Tweet).where(Tweet.id.in_(tweet_ids)))
+            
+            if orphan_user_ids:
+                await RawPayloadRepository(session).delete_for(RawPayloadRepository.ENTITY_USER, orphan_user_ids)
+                await session.execute(delete(User).where(User.id.in_(orphan_user_ids)))
+            
+            logger.info(f"Archived {len(tweet_rows)} tweets, {len(analysis_rows)} analyses, {len(orphan_user_ids)} users")
+            return len(tweet_rows)
+    
+    async def archive_older_than(self, days: Optional[int] = None) -> int:
+        """بایگانی تمام توییت‌های قدیمی‌تر از N روز به صورت دسته‌ای"""
+        cutoff = datetime.utcnow() - timedelta(days=days if days is not None else settings.archive.older_than_days)
+        total = 0
+        
+        while True:
+            archived = await self.archive_batch(cutoff)
+            total += archived
+            if archived < self.batch_size:
+                break
+        
+        return total
+
+
+class ArchiveReader:
+    """خواندن داده‌های بایگانی‌شده با حذف پارتیشن‌های روزانه خارج از بازه"""
+    
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = Path(directory or settings.archive.directory)
+    
+    def _partitions(
+        self,
+        dataset: str,
+        since: Optional[datetime],
+        until: Optional[datetime]
+    ) -> List[Tuple[date, List[Path]]]:
+        """فایل‌های هر پارتیشن روزانه‌ای که با بازه زمانی هم‌پوشانی دارد، به ترتیب روز"""
+        root = self.directory / dataset
+        if not root.exists():
+            return []
+        
+        partitions: List[Tuple[date, List[Path]]] = []
+        for partition_dir in sorted(root.glob("date=*")):
+            try:
+                day = date.fromisoformat(partition_dir.name[len("date="):])
+            except ValueError:
+                continue
+            
+            if since is not None and day < since.date():
+                continue
+            if until is not None and day > until.date():
+                continue
+            
+            partitions.append((day, sorted(partition_dir.glob("*.parquet"))))
+        
+        return partitions
+    
+    def _files(self, dataset: str, since: Optional[datetime], until: Optional[datetime]) -> List[Path]:
+        """فایل‌های پارتیشن‌هایی که با بازه زمانی هم‌پوشانی دارند"""
+        return [path for _, files in self._partitions(dataset, since, until) for path in files]
+    
+    def read_tweets(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        keyword: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        newest_first: bool = False
+    ) -> pd.DataFrame:
+        """خواندن توییت‌های بایگانی‌شده در یک بازه زمانی
+        
+        Args:
+            limit: خواندن پارتیشن‌ها (از قدیمی‌ترین یا با newest_first از جدیدترین
+                روز) پس از رسیدن به این تعداد سطر متوقف می‌شود؛ سطرهای روزهای
+                خوانده‌نشده همه قدیمی‌تر (یا جدیدتر) از سطرهای برگشتی هستند
+        """
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(columns + ["tweet_id", "created_at"] + (["keywords"] if keyword else [])))
+        
+        partitions = self._partitions("tweets", since, until)
+        if newest_first:
+            partitions.reverse()
+        
+        frames: List[pd.DataFrame] = []
+        rows = 0
+        for _, files in partitions:
+            if not files:
+                continue
+            # نسخه‌های تکراری یک توییت همیشه در پارتیشن روز همان توییت هستند
+            frame = self._filter_tweets(
+                pd.concat([pd.read_parquet(path, columns=read_columns) for path in files], ignore_index=True),
+                since, until, keyword
+            )
+            frames.append(frame)
+            rows += len(frame)
+            if limit is not None and rows >= limit:
+                break
+        
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=read_columns or TWEET_ROW_FIELDS)
+        return pd.concat(frames, ignore_index=True)
+    
+    @staticmethod
+    def _filter_tweets(
+        frame: pd.DataFrame,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        keyword: Optional[str]
+    ) -> pd.DataFrame:
+        """حذف نسخه‌های تکراری و سطرهای خارج از بازه زمانی یا بدون کلیدواژه"""
+        frame = frame.drop_duplicates(subset="tweet_id", keep="last")
+        
+        if since is not None:
+            frame = frame[frame["created_at"] >= since]
+        if until is not None:
+            frame = frame[frame["created_at"] < until]
+        if keyword:
+            frame = frame[frame["keywords"].apply(lambda values: keyword in list(values))]
+        
+        return frame
+    
+    def read_analyses(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> pd.DataFrame:
+        """خواندن تحلیل‌های بایگانی‌شده در یک بازه زمانی"""
+        frames = [pd.read_parquet(path) for path in self._files("analyses", since, until)]
+        if not frames:
+            return pd.DataFrame()
+        
+        frame = pd.concat(frames, ignore_index=True).drop_duplicates(subset="id", keep="last")
+        frame["result"] = frame["result"].map(json.loads)
+        return frame
+
+
+class ArchivedTweetRepository(TweetRepository):
+    """مخزن توییت‌ها که کوئری‌های بازه زمانی را روی دیتابیس و بایگانی با هم اجرا می‌کند
+    
+    بایگانی فقط زمانی خوانده می‌شود که since یا until مشخص شده باشد؛ لیست‌های
+    بدون بازه زمانی فقط از دیتابیس داغ خوانده می‌شوند.
+    """
+    
+    def __init__(self, session: Any, reader: Optional[ArchiveReader] = None):
+        super().__init__(session)
+        self.reader = reader or ArchiveReader()
+    
+    def _archived_rows(
+        self,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        newest_first: bool = False
+    ) -> pd.DataFrame:
+        """سطرهای بایگانی در بازه زمانی"""
+        return self.reader.read_tweets(
+            since, until, keyword=keyword, columns=TWEET_ROW_FIELDS, limit=limit, newest_first=newest_first
+        )
+    
+    def _merge(
+        self,
+        db_rows: List[Any],
+        archived: pd.DataFrame,
+        skip: int,
+        limit: int,
+        order_desc: bool
+    ) -> List[Any]:
+        """ادغام سطرهای دیتابیس و بایگانی به ترتیب زمان"""
+        archived = archived.sort_values("created_at", ascending=not order_desc).head(skip + limit)
+        # شمارنده‌های NULL در Parquet به صورت NaN (float) خوانده می‌شوند
+        archived = archived.assign(
+            **{field: archived[field].fillna(0).astype(int) for field in COUNT_FIELDS},
+            id=archived["id"].astype(str),
+            language=archived["language"].astype(object).where(archived["language"].notna(), None)
+        )
+        archived_rows = [
+            ArchivedTweetRow(*values)
+            for values in archived[TWEET_ROW_FIELDS].itertuples(index=False, name=None)
+        ]
+        merged = sorted(
+            list(db_rows) + archived_rows,
+            key=lambda row: row.created_at,
+            reverse=order_desc
+        )
+        return merged[skip:skip + limit]
+    
+    async def list_rows(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        order_desc: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        where: Optional[ColumnElement] = None
+    ) -> List[Any]:
+        """لیست توییت‌ها از دیتابیس و بایگانی (فیلترها و شرط where فقط روی دیتابیس اعمال می‌شوند)"""
+        if (since is None and until is None) or filters or where is not None or order_by not in (None, "created_at"):
+            return await super().list_rows(skip, limit, filters, order_by, order_desc, since, until, where)
+        
+        db_rows = await super().list_rows(0, skip + limit, None, None, order_desc, since, until)
+        archived = await asyncio.to_thread(self._archived_rows, since, until, None, skip + limit, order_desc)
+        return self._merge(db_rows, archived, skip, limit, order_desc)
+    
+    async def get_rows_by_keyword(
+        self,
+        keyword: str,
+        skip: int = 0,
+        limit: int = 100,
+        order_by: Optional[str] = None,
+        order_desc: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Any]:
+        """سطرهای توییت‌های یک کلیدواژه از دیتابیس و بایگانی"""
+        if (since is None and until is None) or order_by not in (None, "created_at"):
+            return await super().get_rows_by_keyword(keyword, skip, limit, order_by, order_desc, since, until)
+        
+        db_rows = await super().get_rows_by_keyword(keyword, 0, skip + limit, None, order_desc, since, until)
+        archived = await asyncio.to_thread(self._archived_rows, since, until, keyword, skip + limit, order_desc)
+        return self._merge(db_rows, archived, skip, limit, order_desc)
+    
+    async def count(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        where: Optional[ColumnElement] = None
+    ) -> int:
+        """شمارش توییت‌ها در دیتابیس و بایگانی"""
+        total = await super().count(filters, since, until, where)
+        if (since is None and until is None) or filters or where is not None:
+            return total
+        
+        archived = await asyncio.to_thread(self.reader.read_tweets, since, until, None, ["tweet_id"])
+        return total + len(archived)
+    
+    async def count_by_keyword(
+        self,
+        keyword: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> int:
+        """شمارش توییت‌های یک کلیدواژه در دیتابیس و بایگانی"""
+        total = await super().count_by_keyword(keyword, since, until)
+        if since is None and until is None:
+            return total
+        
+        archived = await asyncio.to_thread(self.reader.read_tweets, since, until, keyword, ["tweet_id"])
+        return total + len(archived)
+
+
+class ArchivePlugin(Plugin):
+    """پلاگین بایگانی دوره‌ای توییت‌های قدیمی"""
+    
+    @property
+    def name(self) -> str:
+        return "archive"
+    
+    @property
+    def version(self) -> str:
+        return "0.1.0"
+    
+    @property
+    def description(self) -> str:
+        return "انتقال توییت‌های قدیمی به فایل‌های Parquet"
+    
+    async def run(self) -> None:
+        """اجرای بایگانی در حلقه تکرار"""
+        archiver = TweetArchiver()
+        
+        while True:
+            try:
+                archived = await archiver.archive_older_than()
+                logger.info(f"Archive run moved {archived} tweets to {archiver.directory}")
+            except Exception as e:
+                logger.error(f"Archive error: {str(e)}", exc_info=True)
+            
+            await asyncio.sleep(settings.archive.interval_seconds)
+    
+    def initialize(self) -> None:
+        """راه‌اندازی پلاگین"""
+        self.task = asyncio.create_task(self.run())
+        logger.info("ArchivePlugin initialized")
+    
+    def shutdown(self) -> None:
+        """خاموش کردن پلاگین"""
+        if hasattr(self, "task"):
+            self.task.cancel()
+        
+        logger.info("ArchivePlugin shutdown")
@@ -7,10 +7,11 @@
 import contextlib
 import logging
 import os  # اطمینان از import کردن os
+import time
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
-from sqlalchemy import URL, MetaData, create_engine
+from sqlalchemy import URL, MetaData, create_engine, text
 from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
                                     async_sessionmaker, create_async_engine)
 from sqlalchemy.ext.declarative import declarative_base
@@ -37,6 +38,7 @@ Base = declarative_base(metadata=metadata)
 # تنظیم موتورهای دیتابیس
 async_engine: Optional[AsyncEngine] = None
 async_session_factory: Optional[async_sessionmaker] = None
+read_replica_router: Optional["ReadReplicaRouter"] = None
 
 
 def create_async_db_engine(db_url: str, **kwargs) -> AsyncEngine:
@@ -82,9 +84,99 @@ def create_async_db_engine(db_url: str, **kwargs) -> AsyncEngine:
         logger.error(f"Failed to create async database engine: {e}", exc_info=True)
         raise DatabaseError(f"Failed to create async database engine: {str(e)}")
 
+
+class ReadReplicaRouter:
+    """مسیریاب جلسه‌های فقط‌خواندنی بین replicaها
+    
+    replicaها به صورت نوبتی (round-robin) انتخاب می‌شوند. replicaیی که در دسترس نباشد
+    یا تأخیر آن از حد مجاز بیشتر باشد برای مدتی کنار گذاشته می‌شود و در صورت نبود
+    replica سالم، فراخواننده به primary برمی‌گردد.
+    """
+    
+    def __init__(
+        self,
+        engines: List[AsyncEngine],
+        max_lag_seconds: float = 30.0,
+        check_interval: float = 15.0,
+        retry_interval: float = 30.0
+    ) -> None:
+        self.engines = engines
+        self.session_factories = [
+            async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+            for engine in engines
+        ]
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self._next_index = 0
+        self._unhealthy_until: Dict[int, float] = {}
+        self._last_checked: Dict[int, float] = {}
+    
+    def _candidates(self) -> List[int]:
+        """ترتیب نوبتی replicaهای سالم برای این درخواست"""
+        count = len(self.engines)
+        start = self._next_index
+        self._next_index = (self._next_index + 1) % count
+        now = time.monotonic()
+        
+        return [
+            index
+            for index in ((start + offset) % count for offset in range(count))
+            if self._unhealthy_until.get(index, 0.0) <= now
+        ]
+    
+    def mark_unhealthy(self, index: int, reason: str) -> None:
+        """کنار گذاشتن موقت یک replica"""
+        self._unhealthy_until[index] = time.monotonic() + self.retry_interval
+        self._last_checked.pop(index, None)
+        logger.warning(f"Read replica #{index} disabled for {self.retry_interval}s: {reason}")
+    
+    async def _replication_lag(self, session: AsyncSession) -> float:
+        """محاسبه تأخیر replica بر حسب ثانیه (فقط PostgreSQL)"""
+        if session.bind.dialect.name != "postgresql":
+            return 0.0
+        
+        result = await session.execute(text(
+            "SELECT CASE WHEN pg_is_in_recovery() "
+            "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+            "ELSE 0 END"
+        ))
+        return float(result.scalar_one() or 0.0)
+    
+    async def acquire(self) -> Optional[AsyncSession]:
+        """دریافت جلسه از اولین replica سالم یا None در صورت نبود replica سالم"""
+        for index in self._candidates():
+            session = self.session_factories[index]()
+            try:
+                now = time.monotonic()
+                if now - self._last_checked.get(index, 0.0) >= self.check_interval:
+                    lag = await self._replication_lag(session)
+                    if lag > self.max_lag_seconds:
+                        await session.close()
+                        self.mark_unhealthy(index, f"replication lag {lag:.1f}s")
+                        continue
+                    self._last_checked[index] = now
+                else:
+                    # اطمینان از برقراری اتصال پیش از تحویل جلسه
+                    await session.connection()
+                
+                return session
+            
+            except Exception as e:
+                await session.close()
+                self.mark_unhealthy(index, str(e))
+        
+        return None
+    
+    async def dispose(self) -> None:
+        """بستن اتصال‌های تمام replicaها"""
+        for engine in self.engines:
+            await engine.dispose()
+
+
 def setup_db(db_url: Optional[str] = None) -> None:
     """راه‌اندازی اتصال‌های دیتابیس"""
-    global async_engine, async_session_factory
+    global async_engine, async_session_factory, read_replica_router
     
     url = db_url or settings.database.url
     
@@ -98,6 +190,19 @@ def setup_db(db_url: Optional[str] = None) -> None:
             expire_on_commit=False,
             autoflush=False
         )
+        
+        # موتورهای replica فقط زمانی ساخته می‌شوند که دیتابیس اصلی صریحاً مشخص نشده باشد
+        replica_urls = settings.database.read_replica_urls if db_url is None else []
+        if replica_urls:
+            read_replica_router = ReadReplicaRouter(
+                engines=[create_async_db_engine(replica_url) for replica_url in replica_urls],
+                max_lag_seconds=settings.database.replica_max_lag_seconds,
+                check_interval=settings.database.replica_check_interval,
+                retry_interval=settings.database.replica_retry_interval
+            )
+            logger.info(f"Routing reads across {len(replica_urls)} read replica(s)")
+        else:
+            read_replica_router = None
     
     except Exception as e:
         raise DatabaseError(f"Failed to setup database: {str(e)}")
@@ -122,6 +227,32 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         await session.close()
 
 
+@contextlib.asynccontextmanager
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """دریافت جلسه فقط‌خواندنی از یک replica یا در صورت نبود replica سالم، از primary"""
+    if async_session_factory is None:
+        setup_db()
+    
+    assert async_session_factory is not None
+    
+    session = None
+    if read_replica_router is not None:
+        session = await read_replica_router.acquire()
+    
+    if session is None:
+        session = async_session_factory()
+    
+    try:
+        yield session
+        # جلسه فقط برای خواندن است و چیزی برای commit ندارد
+        await session.rollback()
+    except Exception as e:
+        await session.rollback()
+        raise DatabaseError(f"Database read session error: {str(e)}")
+    finally:
+        await session.close()
+
+
 async def create_tables() -> None:
     """ایجاد تمام جدول‌های تعریف شده در دیتابیس"""
     if async_engine is None:
@@ -129,6 +260,9 @@ async def create_tables() -> None:
     
     assert async_engine is not None
     
+    # import مدل‌ها (از طریق schema_upgrade) تا همه جدول‌ها پیش از create_all در Base.metadata ثبت شوند
+    from src.data.schema_upgrade import upgrade_schema
+    
     try:
         # ایجاد جدول‌ها
         async with async_engine.begin() as conn:
@@ -137,7 +271,21 @@ async def create_tables() -> None:
                 logger.warning("Dropping all database tables due to RESET_DB=true")
                 await conn.run_sync(Base.metadata.drop_all)
             
-            await conn.run_sync(Base.metadata.create_all)
+            # در حالت پارتیشن‌بندی، جدول‌های توییت پیش از create_all به صورت پارتیشن‌شده ساخته می‌شوند
+            if settings.database.partitioning_enabled and conn.dialect.name == "postgresql":
+                from src.data.partitioning import create_partitioned_tables, ensure_partitions
+                await conn.run_sync(create_partitioned_tables)
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(ensure_partitions)
+            else:
+                await conn.run_sync(Base.metadata.create_all)
+            
+            # افزودن ستون‌های جدید به جدول‌هایی که پیش از این نسخه ساخته شده‌اند
+            await conn.run_sync(upgrade_schema)
+            
+            if settings.database.fulltext_search_enabled:
+                from src.data.search import create_search_index
+                await conn.run_sync(create_search_index)
             logger.info("Database tables created or verified")
     
     except Exception as e:
@@ -147,4 +295,7 @@ async def create_tables() -> None:
 async def close_db_connections() -> None:
     """بستن تمام اتصال‌های دیتابیس"""
     if async_engine is not None:
-        await async_engine.dispose()
\ No newline at end of file
+        await async_engine.dispose()
+    
+    if read_replica_router is not None:
+        await read_replica_router.dispose()
\ No newline at end of file
@@ -10,9 +10,10 @@ from enum import Enum
 from typing import Any, Dict, List, Optional
 
 from sqlalchemy import (Boolean, Column, DateTime, Enum as SQLAEnum,
-                        ForeignKey, Integer, JSON, String, Text)
+                        ForeignKey, Integer, JSON, LargeBinary, String, Text,
+                        UniqueConstraint)
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from src.data.database import Base
 
@@ -61,7 +62,8 @@ class User(Base, UUIDMixin, TimestampMixin):
     twitter_created_at = Column(DateTime, nullable=True)
     verified = Column(Boolean, default=False)
     profile_image_url = Column(String(1024), nullable=True)
-    raw_data = Column(JSON, nullable=True)
+    # داده خام قدیمی؛ داده‌های جدید به صورت فشرده در جدول raw_payloads ذخیره می‌شوند
+    raw_data = deferred(Column(JSON, nullable=True))
     
     # روابط
     tweets = relationship("Tweet", back_populates="user")
@@ -85,7 +87,12 @@ class Tweet(Base, UUIDMixin, TimestampMixin):
     view_count = Column(Integer, nullable=True)
     language = Column(String(10), nullable=True)
     source = Column(String(255), nullable=True)
-    raw_data = Column(JSON, nullable=True)
+    # شناسه نماینده خوشه توییت‌های تقریباً تکراری (برای نماینده، شناسه خود توییت)
+    cluster_id = Column(UUID(as_uuid=True), nullable=True, index=True)
+    # زمان ورود توییت به سیستم؛ مبنای watermark خط لوله پردازش
+    ingested_at = Column(DateTime, default=datetime.utcnow, nullable=True, index=True)
+    # داده خام قدیمی؛ داده‌های جدید به صورت فشرده در جدول raw_payloads ذخیره می‌شوند
+    raw_data = deferred(Column(JSON, nullable=True))
     
     # روابط
     user = relationship("User", back_populates="tweets")
@@ -96,6 +103,20 @@ class Tweet(Base, UUIDMixin, TimestampMixin):
         return f"<Tweet {self.tweet_id}>"
 
 
+class RawPayload(Base, UUIDMixin, TimestampMixin):
+    """داده خام فشرده‌شده API برای توییت‌ها و کاربران"""
+    __tablename__ = "raw_payloads"
+    __table_args__ = (UniqueConstraint("entity_type", "entity_id"),)
+    
+    entity_type = Column(String(20), nullable=False)  # 'tweet' یا 'user'
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    codec = Column(String(10), nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<RawPayload {self.entity_type}={self.entity_id} codec={self.codec}>"
+
+
 class Keyword(Base, UUIDMixin, TimestampMixin):
     """مدل کلیدواژه"""
     __tablename__ = "keywords"
@@ -118,6 +139,8 @@ class TweetKeyword(Base, UUIDMixin):
     tweet_id = Column(UUID(as_uuid=True), ForeignKey("tweets.id"), nullable=False)
     keyword_id = Column(UUID(as_uuid=True), ForeignKey("keywords.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # زمان توییت؛ کلید پارتیشن در حالت پارتیشن‌بندی PostgreSQL
+    tweet_created_at = Column(DateTime, nullable=True, index=True)
     
     # روابط
     tweet = relationship("Tweet", back_populates="tweet_keywords")
@@ -172,9 +195,154 @@ class Analysis(Base, UUIDMixin, TimestampMixin):
     result = Column(JSON, nullable=False)
     processed_by = Column(String(100), nullable=True)  # مدل یا روش استفاده شده برای تحلیل
     processing_time = Column(Integer, nullable=True)  # زمان پردازش به میلی‌ثانیه
+    # زمان توییت؛ کلید پارتیشن در حالت پارتیشن‌بندی PostgreSQL
+    tweet_created_at = Column(DateTime, nullable=True, index=True)
     
     # روابط
     tweet = relationship("Tweet", back_populates="analyses")
     
     def __repr__(self) -> str:
-        return f"<Analysis type={self.analysis_type} tweet={self.tweet_id}>"
\ No newline at end of file
+        return f"<Analysis type={self.analysis_type} tweet={self.tweet_id}>"
+
+
+class KeywordVolume(Base, UUIDMixin):
+    """تجمیع حجم توییت‌ها، نویسندگان و تعامل هر کلیدواژه در بازه‌های ساعتی و روزانه"""
+    __tablename__ = "keyword_volumes"
+    __table_args__ = (UniqueConstraint("keyword_id", "granularity", "bucket_start"),)
+    
+    keyword_id = Column(UUID(as_uuid=True), ForeignKey("keywords.id"), nullable=False)
+    granularity = Column(String(10), nullable=False)  # 'hour' یا 'day'
+    bucket_start = Column(DateTime, nullable=False)
+    tweet_count = Column(Integer, default=0, nullable=False)
+    author_count = Column(Integer, default=0, nullable=False)
+    retweet_count = Column(Integer, default=0, nullable=False)
+    like_count = Column(Integer, default=0, nullable=False)
+    reply_count = Column(Integer, default=0, nullable=False)
+    quote_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<KeywordVolume keyword={self.keyword_id} {self.granularity}={self.bucket_start}>"
+
+
+class KeywordVolumeAuthor(Base, UUIDMixin):
+    """نویسندگان دیده‌شده در هر بازه تجمیع برای شمارش یکتای نویسندگان"""
+    __tablename__ = "keyword_volume_authors"
+    __table_args__ = (UniqueConstraint("keyword_id", "granularity", "bucket_start", "user_id"),)
+    
+    keyword_id = Column(UUID(as_uuid=True), ForeignKey("keywords.id"), nullable=False)
+    granularity = Column(String(10), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<KeywordVolumeAuthor keyword={self.keyword_id} user={self.user_id}>"
+
+
+class TweetProcessingState(Base, UUIDMixin):
+    """وضعیت پردازش هر توییت به ازای هر نسخه از خط لوله"""
+    __tablename__ = "tweet_processing_states"
+    __table_args__ = (UniqueConstraint("tweet_id", "pipeline_version"),)
+    
+    # بدون کلید خارجی تا با جدول پارتیشن‌شده tweets هم سازگار باشد
+    tweet_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    pipeline_version = Column(String(50), nullable=False)
+    # 'queued'، 'processing'، 'done'، 'filtered'، 'failed' یا 'dead' (پس از اتمام تلاش‌های صف کار)
+    status = Column(String(20), nullable=False, index=True)
+    claim_token = Column(String(36), nullable=True, index=True)
+    claimed_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    # صف کار: کار ثبت‌کننده، تعداد تلاش‌های ناموفق و زمان مجاز تلاش بعدی
+    job_id = Column(UUID(as_uuid=True), ForeignKey("processing_jobs.id"), nullable=True, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<TweetProcessingState tweet={self.tweet_id} v={self.pipeline_version} {self.status}>"
+
+
+class ProcessingJob(Base, UUIDMixin, TimestampMixin):
+    """یک درخواست پردازش ثبت‌شده در صف کار
+    
+    آیتم‌های کار همان سطرهای TweetProcessingState با job_id این کار هستند و
+    پیشرفت کار از وضعیت آن‌ها محاسبه می‌شود.
+    """
+    __tablename__ = "processing_jobs"
+    
+    pipeline_version = Column(String(50), nullable=False)
+    requested_count = Column(Integer, nullable=False)
+    enqueued_count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<ProcessingJob {self.id} v={self.pipeline_version} {self.enqueued_count}>"
+
+
+class PipelineWatermark(Base, UUIDMixin):
+    """آخرین زمان ورودی که خط لوله تا آن پیش رفته است"""
+    __tablename__ = "pipeline_watermarks"
+    
+    pipeline_version = Column(String(50), unique=True, nullable=False)
+    ingested_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<PipelineWatermark v={self.pipeline_version} {self.ingested_at}>"
+
+
+class AnalysisCacheEntry(Base, UUIDMixin, TimestampMixin):
+    """نتیجه تحلیل کش‌شده بر اساس هش متن نرمال‌شده، نوع تحلیل، مدل و نسخه پرامپت"""
+    __tablename__ = "analysis_cache"
+    
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    analysis_type = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(20), nullable=False)
+    result = Column(JSON, nullable=False)
+    hit_count = Column(Integer, default=0, nullable=False)
+    last_hit_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self) -> str:
+        return f"<AnalysisCacheEntry {self.analysis_type} {self.cache_key[:12]}>"
+
+
+class AnalysisBatchJob(Base, UUIDMixin, TimestampMixin):
+    """یک دسته تحلیل ارسال‌شده به Message Batches API"""
+    __tablename__ = "analysis_batch_jobs"
+    
+    batch_id = Column(String(100), unique=True, nullable=False, index=True)
+    analysis_type = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    status = Column(String(20), nullable=False, index=True)  # 'in_progress'، 'canceling' یا 'ended'
+    request_count = Column(Integer, default=0, nullable=False)
+    succeeded_count = Column(Integer, default=0, nullable=False)
+    errored_count = Column(Integer, default=0, nullable=False)
+    submitted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    ended_at = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)  # زمان ثبت نتایج در جدول analyses
+    error = Column(Text, nullable=True)
+    
+    # روابط
+    items = relationship("AnalysisBatchItem", back_populates="job", cascade="all, delete-orphan")
+    
+    def __repr__(self) -> str:
+        return f"<AnalysisBatchJob {self.batch_id} {self.analysis_type} {self.status}>"
+
+
+class AnalysisBatchItem(Base, UUIDMixin):
+    """یک توییت در دسته تحلیل و نتیجه آن"""
+    __tablename__ = "analysis_batch_items"
+    __table_args__ = (UniqueConstraint("job_id", "tweet_id"),)
+    
+    job_id = Column(UUID(as_uuid=True), ForeignKey("analysis_batch_jobs.id"), nullable=False, index=True)
+    # بدون کلید خارجی تا با جدول پارتیشن‌شده tweets و بایگانی هم سازگار باشد
+    tweet_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    status = Column(String(20), nullable=False)  # 'pending'، 'succeeded' یا 'errored'
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    
+    # روابط
+    job = relationship("AnalysisBatchJob", back_populates="items")
+    
+    def __repr__(self) -> str:
+        return f"<AnalysisBatchItem job={self.job_id} tweet={self.tweet_id} {self.status}>"
@@ -0,0 +1,303 @@
+"""
+پارتیشن‌بندی زمانی جدول‌های توییت در PostgreSQL
+
+این ماژول جدول‌های tweets، tweet_keywords و analyses را به صورت پارتیشن‌بندی
+ماهانه بر اساس زمان توییت ایجاد می‌کند، پارتیشن‌های ماه‌های آینده را از قبل
+می‌سازد و داده‌های قدیمی را با جدا کردن یا حذف کل پارتیشن (به جای DELETE
+سنگین) پاک می‌کند.
+
+محدودیت‌های PostgreSQL برای جدول‌های پارتیشن‌شده:
+- کلید اصلی و قیدهای یکتا باید شامل کلید پارتیشن باشند، بنابراین یکتایی
+  tweet_id در سطح برنامه (create_or_update) تضمین می‌شود.
+- کلیدهای خارجی به جدول tweets حذف می‌شوند.
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (Column, ForeignKeyConstraint, Index, MetaData,
+                        PrimaryKeyConstraint, Table, text)
+from sqlalchemy.engine import Connection
+
+from src.config.settings import settings
+from src.core.plugin import Plugin
+from src.data.database import Base, get_db_session
+
+logger = logging.getLogger(__name__)
+
+# جدول‌های پارتیشن‌شده و ستون کلید پارتیشن هر کدام
+PARTITIONED_TABLES: Dict[str, str] = {
+    "tweets": "created_at",
+    "tweet_keywords": "tweet_created_at",
+    "analyses": "tweet_created_at",
+}
+
+
+def _month_start(value: date) -> date:
+    """ابتدای ماه یک تاریخ"""
+    return date(value.year, value.month, 1)
+
+
+def _add_months(value: date, months: int) -> date:
+    """افزودن چند ماه به ابتدای ماه"""
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    """نام پارتیشن ماهانه یک جدول"""
+    return f"{table_name}_p{month.year:04d}_{month.month:02d}"
+
+
+def _parse_partition_month(table_name: str, name: str) -> Optional[date]:
+    """استخراج ماه از نام پارتیشن"""
+    prefix = f"{table_name}_p"
+    if not name.startswith(prefix):
+        return None
+    
+    try:
+        year, month = name[len(prefix):].split("_")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def _build_partitioned_table(table: Table, key: str, metadata: MetaData) -> Table:
+    """ساخت تعریف پارتیشن‌شده یک جدول بر اساس تعریف ORM آن"""
+    columns = [
+        Column(
+            column.name,
+            column.type,
+            nullable=False if column.name == key else column.nullable,
+            server_default=column.server_default
+        )
+        for column in table.columns
+    ]
+    
+    # کلیدهای خارجی به جدول‌های پارتیشن‌نشده (مثل users و keywords) حفظ می‌شوند
+    foreign_keys = [
+        ForeignKeyConstraint(
+            [element.parent.name], 
+            [element.column],
+            name=f"fk_{table.name}_{element.parent.name}_{element.column.table.name}"
+        )
+        for element in (fk for column in table.columns for fk in column.foreign_keys)
+        if element.column.table.name not in PARTITIONED_TABLES
+    ]
+    
+    partitioned = Table(
+        table.name,
+        metadata,
+        *columns,
+        *foreign_keys,
+        PrimaryKeyConstraint("id", key, name=f"pk_{table.name}"),
+        postgresql_partition_by=f"RANGE ({key})"
+    )
+    
+    # یکتایی روی جدول پارتیشن‌شده فقط زمانی ممکن است که کلید پارتیشن را شامل شود
+    for index in table.indexes:
+        column_names = [column.name for column in index.columns]
+        if index.unique and key not in column_names:
+            column_names.append(key)
+        Index(index.name, *[partitioned.c[name] for name in column_names], unique=index.unique)
+    
+    # ستون‌هایی که کلید خارجی‌شان حذف شده برای پیوندها ایندکس می‌شوند
+    for column in table.columns:
+        if any(fk.column.table.name in PARTITIONED_TABLES for fk in column.foreign_keys):
+            Index(f"ix_{table.name}_{column.name}", partitioned.c[column.name])
+    
+    return partitioned
+
+
+def create_partitioned_tables(connection: Connection) -> None:
+    """ایجاد جدول‌های پارتیشن‌شده پیش از create_all (فقط در صورت عدم وجود)"""
+    # جدول‌های پارتیشن‌نشده‌ای که کلید خارجی به آن‌ها اشاره می‌کند باید از قبل وجود داشته باشند
+    Base.metadata.create_all(connection, tables=[
+        table for table in Base.metadata.sorted_tables if table.name not in PARTITIONED_TABLES
+    ])
+    
+    partitioned_metadata = MetaData()
+    
+    for table_name, key in PARTITIONED_TABLES.items():
+        table = Base.metadata.tables[table_name]
+        partitioned = _build_partitioned_table(table, key, partitioned_metadata)
+        partitioned.create(connection, checkfirst=True)
+        
+        connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{table_name}_default" '
+            f'PARTITION OF "{table_name}" DEFAULT'
+        ))
+    
+    logger.info("Partitioned tweet tables created or verified")
+
+
+def _split_default_partition(connection: Connection, table_name: str, key: str, month: date) -> None:
+    """انتقال سطرهای یک ماه از پارتیشن پیش‌فرض به پارتیشن اختصاصی آن ماه"""
+    name = partition_name(table_name, month)
+    lower, upper = month.isoformat(), _add_months(month, 1).isoformat()
+    
+    connection.execute(text(f'CREATE TABLE "{name}" (LIKE "{table_name}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'))
+    connection.execute(text(
+        f'WITH moved AS (DELETE FROM "{table_name}_default" '
+        f"WHERE {key} >= :lower AND {key} < :upper RETURNING *) "
+        f'INSERT INTO "{name}" SELECT * FROM moved'
+    ), {"lower": lower, "upper": upper})
+    connection.execute(text(
+        f'ALTER TABLE "{table_name}" ATTACH PARTITION "{name}" '
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+    logger.info(f"Moved {month:%Y-%m} rows of {table_name} out of the default partition")
+
+
+def _existing_partitions(connection: Connection, table_name: str) -> List[str]:
+    """لیست پارتیشن‌های یک جدول"""
+    result = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+        "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+        "WHERE parent.relname = :table_name"
+    ), {"table_name": table_name})
+    return [row[0] for row in result]
+
+
+def ensure_partitions(connection: Connection, today: Optional[date] = None) -> int:
+    """ساخت پارتیشن ماه جاری و ماه‌های آینده و خالی کردن پارتیشن پیش‌فرض"""
+    current = _month_start(today or datetime.utcnow().date())
+    created = 0
+    
+    for table_name, key in PARTITIONED_TABLES.items():
+        existing = set(_existing_partitions(connection, table_name))
+        
+        # ماه‌هایی که سطرهایشان در پارتیشن پیش‌فرض افتاده‌اند (مثلاً توییت‌های قدیمی)
+        result = connection.execute(text(
+            f"SELECT DISTINCT date_trunc('month', {key})::date FROM \"{table_name}_default\" "
+            f"WHERE {key} IS NOT NULL"
+        ))
+        for (month,) in result.all():
+            if partition_name(table_name, month) not in existing:
+                _split_default_partition(connection, table_name, key, month)
+                existing.add(partition_name(table_name, month))
+                created += 1
+        
+        for offset in range(settings.database.partition_premake_months + 1):
+            month = _add_months(current, offset)
+            name = partition_name(table_name, month)
+            if name in existing:
+                continue
+            
+            connection.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table_name}" '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+            created += 1
+    
+    return created
+
+
+def apply_retention(
+    connection: Connection,
+    retention_months: int,
+    mode: str = "drop",
+    today: Optional[date] = None
+) -> List[str]:
+    """جدا کردن یا حذف پارتیشن‌های قدیمی‌تر از بازه نگهداری
+    
+    در حالت drop سطرهای جدول‌های جانبی توییت‌های حذف‌شده هم پاک می‌شوند.
+    """
+    if retention_months <= 0:
+        return []
+    
+    cutoff = _add_months(_month_start(today or datetime.utcnow().date()), -retention_months)
+    removed: List[str] = []
+    
+    # ابتدا جدول‌های وابسته و در آخر خود توییت‌ها
+    for table_name in ("analyses", "tweet_keywords", "tweets"):
+        for name in sorted(_existing_partitions(connection, table_name)):
+            month = _parse_partition_month(table_name, name)
+            if month is None or _add_months(month, 1) > cutoff:
+                continue
+            
+            if table_name == "tweets" and mode == "drop":
+                # داده خام، ایندکس تمام‌متن و وضعیت پردازش توییت‌های این پارتیشن در جدول‌های جانبی است؛
+                # در حالت detach سطرهای جانبی باقی می‌مانند تا پارتیشن بتواند دوباره متصل شود
+                connection.execute(text(
+                    f"DELETE FROM raw_payloads WHERE entity_type = 'tweet' "
+                    f'AND entity_id IN (SELECT id FROM "{name}")'
+                ))
+                if settings.database.fulltext_search_enabled:
+                    connection.execute(text(
+                        f'DELETE FROM tweet_search WHERE tweet_id IN (SELECT id FROM "{name}")'
+                    ))
+                connection.execute(text(
+                    f'DELETE FROM tweet_processing_states WHERE tweet_id IN (SELECT id FROM "{name}")'
+                ))
+            
+            connection.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{name}"'))
+            if mode == "drop":
+                connection.execute(text(f'DROP TABLE "{name}"'))
+            
+            removed.append(name)
+    
+    if removed:
+        logger.info(f"Retention {mode}: {', '.join(removed)}")
+    
+    return removed
+
+
+async def run_partition_maintenance() -> Tuple[int, List[str]]:
+    """اجرای یک دور نگهداری پارتیشن‌ها"""
+    async with get_db_session() as session:
+        connection = await session.connection()
+        if connection.dialect.name != "postgresql":
+            return 0, []
+        
+        created = await connection.run_sync(ensure_partitions)
+        removed = await connection.run_sync(
+            lambda sync_conn: apply_retention(
+                sync_conn,
+                settings.database.retention_months,
+                settings.database.retention_mode
+            )
+        )
+        return created, removed
+
+
+class PartitionMaintenancePlugin(Plugin):
+    """پلاگین نگهداری دوره‌ای پارتیشن‌ها"""
+    
+    @property
+    def name(self) -> str:
+        return "partition_maintenance"
+    
+    @property
+    def version(self) -> str:
+        return "0.1.0"
+    
+    @property
+    def description(self) -> str:
+        return "ساخت پارتیشن‌های ماهانه و حذف پارتیشن‌های قدیمی توییت‌ها"
+    
+    async def run(self) -> None:
+        """اجرای نگهداری در حلقه تکرار"""
+        while True:
+            try:
+                created, removed = await run_partition_maintenance()
+                logger.info(f"Partition maintenance: created={created}, removed={len(removed)}")
+            except Exception as e:
+                logger.error(f"Partition maintenance error: {str(e)}", exc_info=True)
+            
+            await asyncio.sleep(settings.database.partition_maintenance_interval)
+    
+    def initialize(self) -> None:
+        """راه‌اندازی پلاگین"""
+        self.task = asyncio.create_task(self.run())
+        logger.info("PartitionMaintenancePlugin initialized")
+    
+    def shutdown(self) -> None:
+        """خاموش کردن پلاگین"""
+        if hasattr(self, "task"):
+            self.task.cancel()
+        
+        logger.info("PartitionMaintenancePlugin shutdown")
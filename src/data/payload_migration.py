@@ -0,0 +1,115 @@
+"""
+انتقال داده‌های خام قدیمی به جدول جانبی
+
+سطرهای توییت و کاربری که پیش از جدول raw_payloads ذخیره شده‌اند داده خام را
+هنوز در ستون raw_data نگه می‌دارند. این ماژول آن‌ها را دسته به دسته (هر دسته
+در یک تراکنش) به جدول جانبی منتقل می‌کند؛ یک بار هنگام راه‌اندازی برنامه
+(RawPayloadMigrationPlugin) یا به صورت دستی:
+
+    python -m src.data.payload_migration --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from typing import Optional
+
+from src.config.settings import settings
+from src.core.plugin import Plugin
+from src.data.database import close_db_connections, create_tables, get_db_session
+from src.data.models import Tweet, User
+from src.data.repositories import RawPayloadRepository
+
+logger = logging.getLogger(__name__)
+
+_ENTITIES = (
+    (Tweet, RawPayloadRepository.ENTITY_TWEET),
+    (User, RawPayloadRepository.ENTITY_USER),
+)
+
+
+async def migrate_raw_payloads(batch_size: Optional[int] = None) -> int:
+    """انتقال همه داده‌های خام درون‌خطی به جدول جانبی
+    
+    Returns:
+        int: تعداد سطرهای منتقل‌شده
+    """
+    batch_size = batch_size or settings.database.raw_payload_migration_batch_size
+    total = 0
+    
+    for model, entity_type in _ENTITIES:
+        while True:
+            async with get_db_session() as session:
+                moved = await RawPayloadRepository(session).migrate_inline(model, entity_type, batch_size)
+            
+            total += moved
+            if moved < batch_size:
+                break
+            # میدان دادن به درخواست‌های دیگر بین دسته‌ها
+            await asyncio.sleep(0)
+    
+    return total
+
+
+class RawPayloadMigrationPlugin(Plugin):
+    """پلاگین انتقال یک‌باره داده‌های خام قدیمی هنگام راه‌اندازی"""
+    
+    @property
+    def name(self) -> str:
+        return "raw_payload_migration"
+    
+    @property
+    def version(self) -> str:
+        return "0.1.0"
+    
+    @property
+    def description(self) -> str:
+        return "انتقال داده‌های خام قدیمی از ستون raw_data به جدول raw_payloads"
+    
+    async def run(self) -> None:
+        """اجرای انتقال تا خالی شدن ستون‌های raw_data"""
+        try:
+            moved = await migrate_raw_payloads()
+            if moved:
+                logger.info(f"Moved {moved} inline raw payloads to raw_payloads")
+        except Exception as e:
+            logger.error(f"Raw payload migration error: {str(e)}", exc_info=True)
+    
+    def initialize(self) -> None:
+        """راه‌اندازی پلاگین"""
+        self.task = asyncio.create_task(self.run())
+        logger.info("RawPayloadMigrationPlugin initialized")
+    
+    def shutdown(self) -> None:
+        """خاموش کردن پلاگین"""
+        if hasattr(self, "task"):
+            self.task.cancel()
+        
+        logger.info("RawPayloadMigrationPlugin shutdown")
+
+
+async def _run(batch_size: int) -> None:
+    await create_tables()
+    try:
+        moved = await migrate_raw_payloads(batch_size)
+        logger.info(f"Moved {moved} inline raw payloads to raw_payloads")
+    finally:
+        await close_db_connections()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move inline raw_data payloads to the raw_payloads table")
+    parser.add_argument("--batch-size", type=int, default=settings.database.raw_payload_migration_batch_size)
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    asyncio.run(_run(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
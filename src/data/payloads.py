@@ -0,0 +1,51 @@
+"""
+فشرده‌سازی داده‌های خام API
+
+این ماژول داده‌های خام JSON دریافتی از API را پیش از ذخیره در جدول جانبی
+فشرده می‌کند و هنگام خواندن آن‌ها را بازمی‌گرداند.
+"""
+
+import json
+import zlib
+from typing import Any, Tuple
+
+try:
+    import zstandard
+except ImportError:  # وابستگی اختیاری
+    zstandard = None
+
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def default_codec() -> str:
+    """بهترین کدک در دسترس؛ zstd در صورت نصب بودن، در غیر این صورت zlib"""
+    return CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def encode_payload(data: Any, codec: str = "") -> Tuple[str, bytes]:
+    """تبدیل داده به JSON فشرده و برگرداندن (کدک، بایت‌ها)"""
+    codec = codec or default_codec()
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    if codec == CODEC_ZSTD and zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    
+    return CODEC_ZLIB, zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decode_payload(codec: str, blob: bytes) -> Any:
+    """بازگرداندن داده از بایت‌های فشرده"""
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to decode zstd payloads")
+        raw = zstandard.ZstdDecompressor().decompress(blob)
+    elif codec == CODEC_ZLIB:
+        raw = zlib.decompress(blob)
+    else:
+        raise ValueError(f"Unknown payload codec: {codec}")
+    
+    return json.loads(raw.decode("utf-8"))
@@ -4,21 +4,36 @@
 این ماژول واسط‌هایی برای دسترسی به داده‌های دیتابیس فراهم می‌کند.
 """
 
+import random
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Type, TypeVar, Union
 
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import and_, case, delete, func, insert, null, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 
+from src.api.interfaces import COMBINED_ANALYSIS_TYPES
+from src.config.settings import settings
 from src.core.exceptions import DatabaseError
-from src.data.models import (Analysis, Collection, CollectionKeyword,
+from src.data.models import (Analysis, AnalysisBatchItem, AnalysisBatchJob,
+                                         AnalysisCacheEntry, Collection, CollectionKeyword,
                                          CollectionStatus, CollectionType,
-                                         Keyword, Tweet, TweetKeyword, User)
+                                         Keyword, KeywordVolume,
+                                         KeywordVolumeAuthor, PipelineWatermark,
+                                         ProcessingJob, RawPayload, Tweet, TweetKeyword,
+                                         TweetProcessingState, User)
+from src.data.payloads import decode_payload, encode_payload
+from src.data.search import TweetSearchIndex
 
 T = TypeVar('T')
 
+# شمارنده‌های تعامل توییت که در تجمیع‌های زمانی جمع زده می‌شوند
+ENGAGEMENT_FIELDS = ("retweet_count", "like_count", "reply_count", "quote_count")
+
 
 class BaseRepository:
     """پایه برای تمام مخازن داده"""
@@ -36,6 +51,102 @@ class BaseRepository:
             raise DatabaseError(f"Database error: {str(e)}")
         except Exception as e:
             raise DatabaseError(f"Unexpected error: {str(e)}")
+    
+    def _insert(self, model: Type[Any]) -> Any:
+        """دستور insert وابسته به دیتابیس برای پشتیبانی از ON CONFLICT"""
+        if self.session.get_bind().dialect.name == "postgresql":
+            return postgresql_insert(model)
+        return sqlite_insert(model)
+    
+    async def _get_tweet_created_at(self, tweet_id: uuid.UUID) -> Optional[datetime]:
+        """دریافت زمان توییت برای پر کردن کلید پارتیشن جدول‌های وابسته"""
+        query = select(Tweet.created_at).where(Tweet.id == tweet_id)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+
+
+class RawPayloadRepository(BaseRepository):
+    """مخزن برای داده‌های خام فشرده‌شده API"""
+    
+    ENTITY_TWEET = "tweet"
+    ENTITY_USER = "user"
+    
+    async def save(
+        self, 
+        entity_type: str, 
+        entity_id: uuid.UUID, 
+        data: Dict[str, Any],
+        is_new: bool = False
+    ) -> None:
+        """ذخیره یا جایگزینی داده خام یک موجودیت"""
+        codec, blob = encode_payload(data)
+        
+        payload = None
+        if not is_new:
+            query = select(RawPayload).where(
+                RawPayload.entity_type == entity_type,
+                RawPayload.entity_id == entity_id
+            )
+            result = await self._execute_with_error_handling(self.session.execute(query))
+            payload = result.scalar_one_or_none()
+        
+        if payload:
+            payload.codec = codec
+            payload.data = blob
+        else:
+            self.session.add(RawPayload(
+                entity_type=entity_type, 
+                entity_id=entity_id, 
+                codec=codec, 
+                data=blob
+            ))
+        
+        await self._execute_with_error_handling(self.session.flush())
+    
+    async def get(self, entity_type: str, entity_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """خواندن داده خام یک موجودیت"""
+        query = select(RawPayload.codec, RawPayload.data).where(
+            RawPayload.entity_type == entity_type,
+            RawPayload.entity_id == entity_id
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        row = result.one_or_none()
+        return decode_payload(row.codec, row.data) if row else None
+    
+    async def delete_for(self, entity_type: str, entity_ids: List[uuid.UUID]) -> int:
+        """حذف داده‌های خام مجموعه‌ای از موجودیت‌ها"""
+        if not entity_ids:
+            return 0
+        
+        query = delete(RawPayload).where(
+            RawPayload.entity_type == entity_type,
+            RawPayload.entity_id.in_(entity_ids)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.rowcount
+    
+    async def migrate_inline(self, model: Any, entity_type: str, limit: int = 1000) -> int:
+        """انتقال داده‌های خام قدیمی از ستون raw_data به جدول جانبی"""
+        query = (
+            select(model.id, model.raw_data)
+            .where(model.raw_data.is_not(None))
+            .limit(limit)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        rows = result.all()
+        
+        for row in rows:
+            await self.save(entity_type, row.id, row.raw_data)
+        
+        if rows:
+            await self._execute_with_error_handling(self.session.execute(
+                update(model)
+                .where(model.id.in_([row.id for row in rows]))
+                # NULL در SQL؛ None در ستون JSON به صورت مقدار 'null' ذخیره می‌شود
+                .values(raw_data=null())
+            ))
+        
+        return len(rows)
 
 
 class UserRepository(BaseRepository):
@@ -43,9 +154,15 @@ class UserRepository(BaseRepository):
     
     async def create(self, **kwargs) -> User:
         """ایجاد کاربر جدید"""
+        raw_data = kwargs.pop("raw_data", None)
         user = User(**kwargs)
         self.session.add(user)
         await self._execute_with_error_handling(self.session.flush())
+        
+        if raw_data is not None:
+            await RawPayloadRepository(self.session).save(
+                RawPayloadRepository.ENTITY_USER, user.id, raw_data, is_new=True
+            )
         return user
     
     async def get_by_id(self, user_id: uuid.UUID) -> Optional[User]:
@@ -73,15 +190,33 @@ class UserRepository(BaseRepository):
         await self.session.flush()
         return result.scalar_one_or_none()
     
+    async def get_raw_data(self, user_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """دریافت داده خام API کاربر (فقط در صورت درخواست صریح)"""
+        raw_data = await RawPayloadRepository(self.session).get(RawPayloadRepository.ENTITY_USER, user_id)
+        if raw_data is not None:
+            return raw_data
+        
+        # داده‌های قدیمی که هنوز در ستون raw_data هستند
+        query = select(User.raw_data).where(User.id == user_id)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+    
     async def create_or_update(self, twitter_id: str, **kwargs) -> User:
         """ایجاد یا به‌روزرسانی کاربر"""
         user = await self.get_by_twitter_id(twitter_id)
         
         if user:
+            raw_data = kwargs.pop("raw_data", None)
+            
             # به‌روزرسانی فیلدهای موجود
             for key, value in kwargs.items():
                 setattr(user, key, value)
             await self._execute_with_error_handling(self.session.flush())
+            
+            if raw_data is not None:
+                await RawPayloadRepository(self.session).save(
+                    RawPayloadRepository.ENTITY_USER, user.id, raw_data
+                )
             return user
         else:
             # ایجاد کاربر جدید
@@ -123,9 +258,18 @@ class TweetRepository(BaseRepository):
     
     async def create(self, **kwargs) -> Tweet:
         """ایجاد توییت جدید"""
+        raw_data = kwargs.pop("raw_data", None)
         tweet = Tweet(**kwargs)
         self.session.add(tweet)
         await self._execute_with_error_handling(self.session.flush())
+        
+        if raw_data is not None:
+            await RawPayloadRepository(self.session).save(
+                RawPayloadRepository.ENTITY_TWEET, tweet.id, raw_data, is_new=True
+            )
+        
+        if settings.database.fulltext_search_enabled:
+            await TweetSearchIndex(self.session).index_tweet(tweet.id, tweet.text, tweet.created_at, is_new=True)
         return tweet
     
     async def get_by_id(self, tweet_id: uuid.UUID) -> Optional[Tweet]:
@@ -140,15 +284,62 @@ class TweetRepository(BaseRepository):
         result = await self._execute_with_error_handling(self.session.execute(query))
         return result.scalar_one_or_none()
     
+    async def get_engagement(self, twitter_id: str) -> Optional[Dict[str, int]]:
+        """دریافت شمارنده‌های تعامل فعلی یک توییت با شناسه توییتر"""
+        query = select(*[getattr(Tweet, field) for field in ENGAGEMENT_FIELDS]).where(Tweet.tweet_id == twitter_id)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        row = result.first()
+        if row is None:
+            return None
+        return {field: value or 0 for field, value in zip(ENGAGEMENT_FIELDS, row)}
+    
+    async def get_raw_data(self, tweet_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """دریافت داده خام API توییت (فقط در صورت درخواست صریح)"""
+        raw_data = await RawPayloadRepository(self.session).get(RawPayloadRepository.ENTITY_TWEET, tweet_id)
+        if raw_data is not None:
+            return raw_data
+        
+        # داده‌های قدیمی که هنوز در ستون raw_data هستند
+        query = select(Tweet.raw_data).where(Tweet.id == tweet_id)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+    
+    async def set_cluster_ids(self, cluster_ids: Dict[uuid.UUID, uuid.UUID]) -> None:
+        """ثبت دسته‌ای خوشه تکراری توییت‌ها (شناسه توییت -> شناسه نماینده خوشه)"""
+        if not cluster_ids:
+            return
+        
+        values = [{"id": tweet_id, "cluster_id": cluster_id} for tweet_id, cluster_id in cluster_ids.items()]
+        await self._execute_with_error_handling(self.session.execute(update(Tweet), values))
+    
+    async def set_languages(self, languages: Dict[uuid.UUID, str]) -> None:
+        """ثبت دسته‌ای زبان تشخیص‌داده‌شده توییت‌ها (شناسه توییت -> کد زبان)"""
+        if not languages:
+            return
+        
+        values = [{"id": tweet_id, "language": language} for tweet_id, language in languages.items()]
+        await self._execute_with_error_handling(self.session.execute(update(Tweet), values))
+    
     async def create_or_update(self, twitter_id: str, **kwargs) -> Tweet:
         """ایجاد یا به‌روزرسانی توییت"""
         tweet = await self.get_by_twitter_id(twitter_id)
         
         if tweet:
+            raw_data = kwargs.pop("raw_data", None)
+            
             # به‌روزرسانی فیلدهای موجود
             for key, value in kwargs.items():
                 setattr(tweet, key, value)
             await self._execute_with_error_handling(self.session.flush())
+            
+            if raw_data is not None:
+                await RawPayloadRepository(self.session).save(
+                    RawPayloadRepository.ENTITY_TWEET, tweet.id, raw_data
+                )
+            
+            # ایندکس تمام‌متن فقط با تغییر متن یا زمان توییت به‌روز می‌شود
+            if settings.database.fulltext_search_enabled and ("text" in kwargs or "created_at" in kwargs):
+                await TweetSearchIndex(self.session).index_tweet(tweet.id, tweet.text, tweet.created_at)
             return tweet
         else:
             # ایجاد توییت جدید
@@ -181,7 +372,174 @@ class TweetRepository(BaseRepository):
         result = await self._execute_with_error_handling(self.session.execute(query))
         return result.scalars().all()
     
-    async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+    def _list_columns(self) -> List[Any]:
+        """ستون‌های مورد نیاز برای نمایش لیست توییت‌ها به همراه نویسنده"""
+        return [
+            Tweet.id,
+            Tweet.tweet_id,
+            Tweet.text,
+            Tweet.created_at,
+            Tweet.retweet_count,
+            Tweet.like_count,
+            Tweet.reply_count,
+            Tweet.quote_count,
+            Tweet.language,
+            func.coalesce(User.username, "").label("author_username"),
+            func.coalesce(User.display_name, User.username, "").label("author_name"),
+        ]
+    
+    def _apply_time_range(
+        self, 
+        query: Any, 
+        since: Optional[datetime] = None, 
+        until: Optional[datetime] = None
+    ) -> Any:
+        """محدود کردن کوئری به بازه زمانی توییت (امکان حذف پارتیشن‌های نامرتبط)"""
+        if since is not None:
+            query = query.where(Tweet.created_at >= since)
+        if until is not None:
+            query = query.where(Tweet.created_at < until)
+        return query
+    
+    def _keyword_join_condition(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Any:
+        """شرط پیوند توییت و کلیدواژه؛ در حالت پارتیشن‌بندی کلید پارتیشن هم مقایسه می‌شود"""
+        condition = Tweet.id == TweetKeyword.tweet_id
+        
+        if settings.database.partitioning_enabled:
+            condition = and_(condition, TweetKeyword.tweet_created_at == Tweet.created_at)
+            if since is not None:
+                condition = and_(condition, TweetKeyword.tweet_created_at >= since)
+            if until is not None:
+                condition = and_(condition, TweetKeyword.tweet_created_at < until)
+        
+        return condition
+    
+    def _apply_order(self, query: Any, order_by: Optional[str], order_desc: bool) -> Any:
+        """اعمال مرتب‌سازی روی کوئری توییت‌ها"""
+        if order_by and hasattr(Tweet, order_by):
+            order_attr = getattr(Tweet, order_by)
+        else:
+            # مرتب‌سازی پیش‌فرض بر اساس زمان ایجاد
+            order_attr = Tweet.created_at
+        
+        return query.order_by(order_attr.desc() if order_desc else order_attr)
+    
+    async def list_rows(
+        self, 
+        skip: int = 0, 
+        limit: int = 100, 
+        filters: Optional[Dict[str, Any]] = None,
+        order_by: Optional[str] = None,
+        order_desc: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        where: Optional[ColumnElement] = None
+    ) -> List[Any]:
+        """لیست توییت‌ها به صورت سطرهای سبک (بدون نمونه‌های ORM) همراه با اطلاعات نویسنده
+        
+        Args:
+            where: شرط اضافی روی جدول توییت‌ها (مثلاً فیلترهای منتقل‌شده به دیتابیس)
+        """
+        query = (
+            select(*self._list_columns())
+            .outerjoin(User, Tweet.user_id == User.id)
+        )
+        
+        if filters:
+            for key, value in filters.items():
+                if hasattr(Tweet, key):
+                    query = query.where(getattr(Tweet, key) == value)
+        
+        if where is not None:
+            query = query.where(where)
+        
+        query = self._apply_time_range(query, since, until)
+        query = self._apply_order(query, order_by, order_desc).offset(skip).limit(limit)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.all()
+    
+    async def get_rows_by_keyword(
+        self, 
+        keyword: str, 
+        skip: int = 0, 
+        limit: int = 100,
+        order_by: Optional[str] = None,
+        order_desc: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Any]:
+        """دریافت سطرهای سبک توییت‌ها بر اساس کلیدواژه"""
+        query = (
+            select(*self._list_columns())
+            .join(TweetKeyword, self._keyword_join_condition(since, until))
+            .join(Keyword, TweetKeyword.keyword_id == Keyword.id)
+            .outerjoin(User, Tweet.user_id == User.id)
+            .where(Keyword.text == keyword)
+        )
+        
+        query = self._apply_time_range(query, since, until)
+        query = self._apply_order(query, order_by, order_desc).offset(skip).limit(limit)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.all()
+    
+    async def search_rows(
+        self, 
+        query: str, 
+        skip: int = 0, 
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Any]:
+        """جستجوی تمام‌متن توییت‌ها و برگرداندن سطرهای سبک به ترتیب رتبه"""
+        tweet_ids = await TweetSearchIndex(self.session).search(query, skip, limit, since, until)
+        if not tweet_ids:
+            return []
+        
+        rows_query = (
+            select(*self._list_columns())
+            .outerjoin(User, Tweet.user_id == User.id)
+            .where(Tweet.id.in_(tweet_ids))
+        )
+        result = await self._execute_with_error_handling(self.session.execute(rows_query))
+        
+        # حفظ ترتیب رتبه‌بندی ایندکس
+        rows_by_id = {row.id: row for row in result.all()}
+        return [rows_by_id[tweet_id] for tweet_id in tweet_ids if tweet_id in rows_by_id]
+    
+    async def count_search(
+        self, 
+        query: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> int:
+        """شمارش نتایج جستجوی تمام‌متن"""
+        return await TweetSearchIndex(self.session).count(query, since, until)
+    
+    async def count_by_keyword(
+        self, 
+        keyword: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> int:
+        """شمارش تعداد توییت‌های یک کلیدواژه"""
+        query = (
+            select(func.count())
+            .select_from(Tweet)
+            .join(TweetKeyword, self._keyword_join_condition(since, until))
+            .join(Keyword, TweetKeyword.keyword_id == Keyword.id)
+            .where(Keyword.text == keyword)
+        )
+        query = self._apply_time_range(query, since, until)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one()
+    
+    async def count(
+        self, 
+        filters: Optional[Dict[str, Any]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        where: Optional[ColumnElement] = None
+    ) -> int:
         """شمارش تعداد توییت‌ها"""
         query = select(func.count()).select_from(Tweet)
         
@@ -190,6 +548,10 @@ class TweetRepository(BaseRepository):
                 if hasattr(Tweet, key):
                     query = query.where(getattr(Tweet, key) == value)
         
+        if where is not None:
+            query = query.where(where)
+        
+        query = self._apply_time_range(query, since, until)
         result = await self._execute_with_error_handling(self.session.execute(query))
         return result.scalar_one()
     
@@ -284,24 +646,658 @@ class KeywordRepository(BaseRepository):
         result = await self._execute_with_error_handling(self.session.execute(query))
         return result.scalar_one()
     
-    async def associate_with_tweet(self, keyword_id: uuid.UUID, tweet_id: uuid.UUID) -> TweetKeyword:
+    async def associate_with_tweet(
+        self, 
+        keyword_id: uuid.UUID, 
+        tweet_id: uuid.UUID,
+        tweet_created_at: Optional[datetime] = None
+    ) -> TweetKeyword:
         """ایجاد ارتباط بین کلیدواژه و توییت"""
-        # بررسی عدم وجود ارتباط قبلی
+        tweet_keyword, _ = await self.add_tweet_association(keyword_id, tweet_id, tweet_created_at)
+        return tweet_keyword
+    
+    async def get_association(self, keyword_id: uuid.UUID, tweet_id: uuid.UUID) -> Optional[TweetKeyword]:
+        """دریافت ارتباط موجود بین کلیدواژه و توییت"""
         query = select(TweetKeyword).where(
             TweetKeyword.keyword_id == keyword_id,
             TweetKeyword.tweet_id == tweet_id
         )
         result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+    
+    async def add_tweet_association(
+        self, 
+        keyword_id: uuid.UUID, 
+        tweet_id: uuid.UUID,
+        tweet_created_at: Optional[datetime] = None
+    ) -> Tuple[TweetKeyword, bool]:
+        """ایجاد ارتباط بین کلیدواژه و توییت و مشخص کردن جدید بودن آن"""
+        # بررسی عدم وجود ارتباط قبلی
+        existing = await self.get_association(keyword_id, tweet_id)
         
-        if result.scalar_one_or_none():
+        if existing:
             # ارتباط قبلاً وجود دارد
-            return result.scalar_one()
+            return existing, False
+        
+        if tweet_created_at is None:
+            tweet_created_at = await self._get_tweet_created_at(tweet_id)
         
         # ایجاد ارتباط جدید
-        tweet_keyword = TweetKeyword(keyword_id=keyword_id, tweet_id=tweet_id)
+        tweet_keyword = TweetKeyword(
+            keyword_id=keyword_id, 
+            tweet_id=tweet_id, 
+            tweet_created_at=tweet_created_at
+        )
         self.session.add(tweet_keyword)
         await self._execute_with_error_handling(self.session.flush())
-        return tweet_keyword
+        return tweet_keyword, True
+
+
+class KeywordVolumeRepository(BaseRepository):
+    """مخزن تجمیع‌های زمانی حجم کلیدواژه‌ها (به‌روزرسانی افزایشی در تراکنش ذخیره توییت)"""
+    
+    GRANULARITIES = ("hour", "day")
+    
+    @staticmethod
+    def bucket_start(value: datetime, granularity: str) -> datetime:
+        """ابتدای بازه زمانی (به وقت UTC) یک زمان"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        
+        value = value.replace(minute=0, second=0, microsecond=0)
+        if granularity == "day":
+            value = value.replace(hour=0)
+        return value
+    
+    async def record(
+        self, 
+        keyword_id: uuid.UUID, 
+        user_id: uuid.UUID,
+        tweet_created_at: datetime,
+        engagement: Dict[str, int],
+        new_tweet: bool = True
+    ) -> None:
+        """ثبت یک توییت جدید یا تغییر تعامل یک توییت موجود در تجمیع‌ها"""
+        for granularity in self.GRANULARITIES:
+            bucket_start = self.bucket_start(tweet_created_at, granularity)
+            author_delta = 0
+            
+            if new_tweet:
+                # نویسنده فقط اولین بار در هر بازه شمرده می‌شود
+                author_insert = self._insert(KeywordVolumeAuthor).values(
+                    keyword_id=keyword_id,
+                    granularity=granularity,
+                    bucket_start=bucket_start,
+                    user_id=user_id
+                ).on_conflict_do_nothing(index_elements=["keyword_id", "granularity", "bucket_start", "user_id"])
+                result = await self._execute_with_error_handling(self.session.execute(author_insert))
+                author_delta = 1 if result.rowcount else 0
+            
+            counters = {
+                "tweet_count": 1 if new_tweet else 0,
+                "author_count": author_delta,
+                **{field: engagement.get(field, 0) for field in ENGAGEMENT_FIELDS}
+            }
+            if not any(counters.values()):
+                continue
+            
+            volume_insert = self._insert(KeywordVolume).values(
+                keyword_id=keyword_id,
+                granularity=granularity,
+                bucket_start=bucket_start,
+                **counters
+            )
+            volume_insert = volume_insert.on_conflict_do_update(
+                index_elements=["keyword_id", "granularity", "bucket_start"],
+                set_={
+                    **{
+                        field: getattr(KeywordVolume, field) + getattr(volume_insert.excluded, field)
+                        for field in counters
+                    },
+                    "updated_at": datetime.utcnow()
+                }
+            )
+            await self._execute_with_error_handling(self.session.execute(volume_insert))
+    
+    async def get_series(
+        self, 
+        keyword: str, 
+        granularity: str = "hour",
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[KeywordVolume]:
+        """دریافت سری زمانی یک کلیدواژه فقط از جدول تجمیع"""
+        query = (
+            select(KeywordVolume)
+            .join(Keyword, KeywordVolume.keyword_id == Keyword.id)
+            .where(Keyword.text == keyword, KeywordVolume.granularity == granularity)
+        )
+        
+        if since is not None:
+            query = query.where(KeywordVolume.bucket_start >= self.bucket_start(since, granularity))
+        if until is not None:
+            query = query.where(KeywordVolume.bucket_start < until)
+        
+        query = query.order_by(KeywordVolume.bucket_start)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalars().all()
+    
+    async def rebuild(self, batch_size: int = 5000) -> int:
+        """ساخت مجدد تجمیع‌ها از داده‌های خام (برای داده‌های ذخیره‌شده پیش از فعال‌سازی تجمیع)"""
+        await self._execute_with_error_handling(self.session.execute(delete(KeywordVolumeAuthor)))
+        await self._execute_with_error_handling(self.session.execute(delete(KeywordVolume)))
+        
+        processed = 0
+        while True:
+            query = (
+                select(
+                    TweetKeyword.keyword_id, Tweet.user_id, Tweet.created_at,
+                    *[getattr(Tweet, field) for field in ENGAGEMENT_FIELDS]
+                )
+                .join(Tweet, Tweet.id == TweetKeyword.tweet_id)
+                .order_by(TweetKeyword.id)
+                .offset(processed)
+                .limit(batch_size)
+            )
+            result = await self._execute_with_error_handling(self.session.execute(query))
+            rows = result.all()
+            
+            for row in rows:
+                engagement = {field: getattr(row, field) or 0 for field in ENGAGEMENT_FIELDS}
+                await self.record(row.keyword_id, row.user_id, row.created_at, engagement)
+            
+            processed += len(rows)
+            if len(rows) < batch_size:
+                break
+        
+        return processed
+
+
+class ClaimedBatch(NamedTuple):
+    """نتیجه برداشت یک دسته توییت برای پردازش"""
+    claim_token: str
+    tweets: List[Tweet]  # توییت‌هایی که از شرط where عبور کرده‌اند
+    claimed_count: int  # تعداد کل توییت‌های برداشته‌شده (شامل فیلترشده‌ها)
+    max_ingested_at: Optional[datetime]
+    attempts: Dict[uuid.UUID, int]  # تعداد تلاش‌های ناموفق قبلی هر توییت
+
+
+class LeasedBatch(NamedTuple):
+    """نتیجه اجاره یک دسته آیتم از صف کار"""
+    claim_token: str
+    tweets: List[Tweet]
+    attempts: Dict[uuid.UUID, int]  # تعداد تلاش‌های ناموفق قبلی هر توییت
+    job_ids: Dict[uuid.UUID, uuid.UUID]
+
+
+class ProcessingStateRepository(BaseRepository):
+    """مخزن وضعیت پردازش توییت‌ها و watermark خط لوله
+    
+    سطرهای وضعیت دو مسیر دارند: برداشت مستقیم در process_all_unprocessed
+    (job_id خالی) و صف کار پایدار (job_id پر) که در آن آیتم‌ها با وضعیت queued
+    ثبت، توسط کارگرها برای مدت claim_timeout_seconds اجاره و در صورت خطا با
+    تأخیر نمایی دوباره در صف قرار می‌گیرند یا پس از اتمام تلاش‌ها dead می‌شوند.
+    در مسیر مستقیم، سطرهای failed پس از همان تأخیر دوباره برداشته می‌شوند.
+    """
+    
+    STATUS_QUEUED = "queued"
+    STATUS_PROCESSING = "processing"
+    STATUS_DONE = "done"
+    STATUS_FILTERED = "filtered"
+    STATUS_FAILED = "failed"
+    STATUS_DEAD = "dead"
+    
+    @staticmethod
+    def retry_delay(attempts: int) -> float:
+        """تأخیر تلاش بعدی پس از attempts تلاش ناموفق (نمایی با jitter)"""
+        config = settings.processor
+        delay = min(config.queue_retry_base_seconds * (2 ** attempts), config.queue_retry_max_seconds)
+        return delay * (0.5 + random.random() / 2)
+    
+    async def get_watermark(self, pipeline_version: str) -> Optional[datetime]:
+        """دریافت watermark یک نسخه از خط لوله"""
+        query = select(PipelineWatermark.ingested_at).where(PipelineWatermark.pipeline_version == pipeline_version)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+    
+    async def advance_watermark(self, pipeline_version: str, ingested_at: datetime) -> None:
+        """جلو بردن watermark (هرگز به عقب برنمی‌گردد)"""
+        statement = self._insert(PipelineWatermark).values(
+            id=uuid.uuid4(),
+            pipeline_version=pipeline_version,
+            ingested_at=ingested_at,
+            updated_at=datetime.utcnow()
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=["pipeline_version"],
+            set_={"ingested_at": statement.excluded.ingested_at, "updated_at": statement.excluded.updated_at},
+            where=PipelineWatermark.ingested_at < statement.excluded.ingested_at
+        )
+        await self._execute_with_error_handling(self.session.execute(statement))
+    
+    async def _reclaim_stale(self, pipeline_version: str, claim_token: str, limit: int) -> None:
+        """برداشت مجدد توییت‌هایی که پردازششان نیمه‌کاره رها شده است"""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.processor.claim_timeout_seconds)
+        stale_query = (
+            select(TweetProcessingState.id)
+            .where(
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.status == self.STATUS_PROCESSING,
+                TweetProcessingState.claimed_at < stale_before,
+                # اجاره‌های منقضی صف کار در lease_batch با شمارش تلاش بازگردانده می‌شوند
+                TweetProcessingState.job_id.is_(None)
+            )
+            .limit(limit)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(stale_query))
+        stale_ids = result.scalars().all()
+        if not stale_ids:
+            return
+        
+        # شرط claimed_at تضمین می‌کند که دو پردازشگر هم‌زمان یک سطر را برندارند
+        await self._execute_with_error_handling(self.session.execute(
+            update(TweetProcessingState)
+            .where(TweetProcessingState.id.in_(stale_ids), TweetProcessingState.claimed_at < stale_before)
+            .values(claim_token=claim_token, claimed_at=now)
+        ))
+    
+    async def _reclaim_failed(self, pipeline_version: str, claim_token: str, limit: int, max_attempts: int) -> None:
+        """برداشت مجدد توییت‌های ناموفق مسیر مستقیم که زمان تلاش بعدی‌شان رسیده است"""
+        now = datetime.utcnow()
+        failed_query = (
+            select(TweetProcessingState.id)
+            .where(
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.status == self.STATUS_FAILED,
+                TweetProcessingState.job_id.is_(None),
+                TweetProcessingState.attempts < max_attempts,
+                or_(TweetProcessingState.available_at.is_(None), TweetProcessingState.available_at <= now)
+            )
+            .order_by(TweetProcessingState.available_at)
+            .limit(limit)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(failed_query))
+        failed_ids = result.scalars().all()
+        if not failed_ids:
+            return
+        
+        # شرط وضعیت تضمین می‌کند که دو پردازشگر هم‌زمان یک سطر را برندارند
+        await self._execute_with_error_handling(self.session.execute(
+            update(TweetProcessingState)
+            .where(TweetProcessingState.id.in_(failed_ids), TweetProcessingState.status == self.STATUS_FAILED)
+            .values(status=self.STATUS_PROCESSING, claim_token=claim_token, claimed_at=now, completed_at=None)
+            .execution_options(synchronize_session=False)
+        ))
+    
+    async def _insert_states(
+        self,
+        pipeline_version: str,
+        claim_token: str,
+        status: str,
+        limit: int,
+        since: Optional[datetime],
+        where: Optional[ColumnElement],
+        **values: Any
+    ) -> Tuple[int, Optional[datetime]]:
+        """ثبت سطر وضعیت برای توییت‌های بدون وضعیت به ترتیب زمان ورود
+        
+        سطرهای ثبت‌شده با claim_token مشخص می‌شوند؛ توییت‌هایی که از شرط where
+        عبور نکنند بلافاصله filtered می‌شوند.
+        
+        Returns:
+            Tuple[int, Optional[datetime]]: تعداد سطرهای ثبت‌شده و بیشترین زمان ورود آن‌ها
+        """
+        now = datetime.utcnow()
+        already_claimed = (
+            select(TweetProcessingState.id)
+            .where(
+                TweetProcessingState.tweet_id == Tweet.id,
+                TweetProcessingState.pipeline_version == pipeline_version
+            )
+            .exists()
+        )
+        candidates_query = select(Tweet.id).where(~already_claimed)
+        if since is not None:
+            candidates_query = candidates_query.where(or_(Tweet.ingested_at.is_(None), Tweet.ingested_at >= since))
+        candidates_query = candidates_query.order_by(Tweet.ingested_at, Tweet.id).limit(limit)
+        
+        result = await self._execute_with_error_handling(self.session.execute(candidates_query))
+        candidate_ids = result.scalars().all()
+        
+        if candidate_ids:
+            # قید یکتای (tweet_id, pipeline_version) مانع برداشت هم‌زمان یک توییت توسط دو پردازشگر می‌شود
+            claim = self._insert(TweetProcessingState).values([
+                {
+                    "id": uuid.uuid4(),
+                    "tweet_id": tweet_id,
+                    "pipeline_version": pipeline_version,
+                    "status": status,
+                    "claim_token": claim_token,
+                    **values
+                }
+                for tweet_id in candidate_ids
+            ]).on_conflict_do_nothing(index_elements=["tweet_id", "pipeline_version"])
+            await self._execute_with_error_handling(self.session.execute(claim))
+        
+        claimed = and_(
+            TweetProcessingState.pipeline_version == pipeline_version,
+            TweetProcessingState.claim_token == claim_token
+        )
+        stats_query = (
+            select(func.count(), func.max(Tweet.ingested_at))
+            .select_from(TweetProcessingState)
+            .join(Tweet, TweetProcessingState.tweet_id == Tweet.id)
+            .where(claimed)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(stats_query))
+        claimed_count, max_ingested_at = result.one()
+        
+        if where is not None and claimed_count:
+            # ثبت توییت‌های ردشده توسط شرط؛ مقایسه با NULL رد نمی‌شود و در پایتون بررسی می‌شود
+            # زیرپرس‌وجو به سطر وضعیت وابسته است تا فقط توییت همان سطر بررسی شود، نه کل جدول توییت‌ها
+            rejected = (
+                select(Tweet.id)
+                .where(Tweet.id == TweetProcessingState.tweet_id, ~where)
+                .exists()
+            )
+            await self._execute_with_error_handling(self.session.execute(
+                update(TweetProcessingState)
+                .where(claimed, rejected)
+                .values(status=self.STATUS_FILTERED, completed_at=now, claim_token=None)
+                .execution_options(synchronize_session=False)
+            ))
+        
+        return claimed_count, max_ingested_at
+    
+    async def claim_batch(
+        self, 
+        pipeline_version: str, 
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        where: Optional[ColumnElement] = None,
+        max_attempts: Optional[int] = None
+    ) -> ClaimedBatch:
+        """برداشت دسته‌ای از توییت‌های پردازش‌نشده به ترتیب زمان ورود
+        
+        Args:
+            since: فقط توییت‌هایی که پس از این زمان وارد شده‌اند بررسی می‌شوند (watermark منهای حاشیه اطمینان)
+            where: شرط فیلترهای منتقل‌شده به دیتابیس؛ توییت‌هایی که از آن عبور نکنند
+                بدون بارگذاری سطر کامل با وضعیت filtered ثبت می‌شوند
+            max_attempts: توییت‌های ناموفق تا این تعداد تلاش دوباره برداشته می‌شوند
+        
+        Returns:
+            ClaimedBatch: شناسه برداشت، توییت‌های عبورکرده و آمار برداشت
+        """
+        claim_token = str(uuid.uuid4())
+        now = datetime.utcnow()
+        
+        await self._reclaim_stale(pipeline_version, claim_token, limit)
+        await self._reclaim_failed(
+            pipeline_version, claim_token, limit, max_attempts or settings.processor.queue_max_attempts
+        )
+        claimed_count, max_ingested_at = await self._insert_states(
+            pipeline_version, claim_token, self.STATUS_PROCESSING, limit, since, where, claimed_at=now
+        )
+        
+        claimed = and_(
+            TweetProcessingState.pipeline_version == pipeline_version,
+            TweetProcessingState.claim_token == claim_token
+        )
+        claimed_query = (
+            select(Tweet, TweetProcessingState.attempts)
+            .join(TweetProcessingState, TweetProcessingState.tweet_id == Tweet.id)
+            .where(claimed)
+            .order_by(Tweet.ingested_at, Tweet.id)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(claimed_query))
+        rows = result.all()
+        return ClaimedBatch(
+            claim_token,
+            [row.Tweet for row in rows],
+            claimed_count,
+            max_ingested_at,
+            {row.Tweet.id: row.attempts for row in rows}
+        )
+    
+    async def mark(
+        self, 
+        tweet_ids: List[uuid.UUID], 
+        pipeline_version: str,
+        status: str,
+        claim_token: str,
+        error: Optional[str] = None
+    ) -> int:
+        """ثبت نتیجه پردازش توییت‌های یک برداشت"""
+        if not tweet_ids:
+            return 0
+        
+        statement = (
+            update(TweetProcessingState)
+            .where(
+                TweetProcessingState.tweet_id.in_(tweet_ids),
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.claim_token == claim_token
+            )
+            .values(status=status, completed_at=datetime.utcnow(), error=error, claim_token=None)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(statement))
+        return result.rowcount
+    
+    async def enqueue(
+        self,
+        pipeline_version: str,
+        job_id: uuid.UUID,
+        limit: int,
+        since: Optional[datetime] = None,
+        where: Optional[ColumnElement] = None
+    ) -> Tuple[int, Optional[datetime]]:
+        """ثبت توییت‌های پردازش‌نشده به عنوان آیتم‌های صف کار
+        
+        Returns:
+            Tuple[int, Optional[datetime]]: تعداد آیتم‌های ثبت‌شده (شامل فیلترشده‌ها) و بیشترین زمان ورود
+        """
+        claim_token = str(uuid.uuid4())
+        enqueued_count, max_ingested_at = await self._insert_states(
+            pipeline_version, claim_token, self.STATUS_QUEUED, limit, since, where,
+            job_id=job_id, attempts=0, available_at=datetime.utcnow()
+        )
+        
+        # شناسه ثبت فقط برای شمارش همین دسته بود؛ آیتم‌های صف بدون اجاره‌اند
+        await self._execute_with_error_handling(self.session.execute(
+            update(TweetProcessingState)
+            .where(TweetProcessingState.claim_token == claim_token)
+            .values(claim_token=None)
+        ))
+        return enqueued_count, max_ingested_at
+    
+    async def _expire_leases(self, pipeline_version: str, max_attempts: int) -> None:
+        """بازگرداندن آیتم‌های اجاره‌شده‌ای که کارگرشان در مهلت اجاره کار را تمام نکرده است
+        
+        اجاره منقضی یک تلاش ناموفق شمرده می‌شود تا توییتی که پردازشگر را از کار
+        می‌اندازد، پس از max_attempts بار dead شود و صف را متوقف نکند.
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.processor.claim_timeout_seconds)
+        await self._execute_with_error_handling(self.session.execute(
+            update(TweetProcessingState)
+            .where(
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.job_id.is_not(None),
+                TweetProcessingState.status == self.STATUS_PROCESSING,
+                TweetProcessingState.claimed_at < stale_before
+            )
+            .values(
+                status=case(
+                    (TweetProcessingState.attempts + 1 >= max_attempts, self.STATUS_DEAD),
+                    else_=self.STATUS_QUEUED
+                ),
+                attempts=TweetProcessingState.attempts + 1,
+                available_at=now,
+                claim_token=None,
+                error="Lease expired"
+            )
+            .execution_options(synchronize_session=False)
+        ))
+    
+    async def lease_batch(self, pipeline_version: str, limit: int, max_attempts: int) -> LeasedBatch:
+        """اجاره دسته‌ای از آیتم‌های آماده صف کار به ترتیب زمان آماده شدن"""
+        claim_token = str(uuid.uuid4())
+        await self._expire_leases(pipeline_version, max_attempts)
+        # زمان پس از بازگرداندن اجاره‌های منقضی گرفته می‌شود تا همان آیتم‌ها در این فراخوانی اجاره شوند
+        now = datetime.utcnow()
+        
+        ready_query = (
+            select(TweetProcessingState.id)
+            .where(
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.status == self.STATUS_QUEUED,
+                TweetProcessingState.available_at <= now
+            )
+            .order_by(TweetProcessingState.available_at)
+            .limit(limit)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(ready_query))
+        ready_ids = result.scalars().all()
+        if not ready_ids:
+            return LeasedBatch(claim_token, [], {}, {})
+        
+        # شرط وضعیت تضمین می‌کند که دو کارگر هم‌زمان یک آیتم را اجاره نکنند
+        await self._execute_with_error_handling(self.session.execute(
+            update(TweetProcessingState)
+            .where(TweetProcessingState.id.in_(ready_ids), TweetProcessingState.status == self.STATUS_QUEUED)
+            .values(status=self.STATUS_PROCESSING, claim_token=claim_token, claimed_at=now)
+            .execution_options(synchronize_session=False)
+        ))
+        
+        leased_query = (
+            select(Tweet, TweetProcessingState.attempts, TweetProcessingState.job_id)
+            .join(TweetProcessingState, TweetProcessingState.tweet_id == Tweet.id)
+            .where(
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.claim_token == claim_token
+            )
+            .order_by(Tweet.ingested_at, Tweet.id)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(leased_query))
+        rows = result.all()
+        return LeasedBatch(
+            claim_token,
+            [row.Tweet for row in rows],
+            {row.Tweet.id: row.attempts for row in rows},
+            {row.Tweet.id: row.job_id for row in rows}
+        )
+    
+    async def retry_or_dead(
+        self,
+        tweet_id: uuid.UUID,
+        pipeline_version: str,
+        claim_token: str,
+        error: str,
+        attempts: int,
+        max_attempts: int,
+        retry_delay: float,
+        retry_status: str = STATUS_QUEUED
+    ) -> str:
+        """ثبت خطای یک آیتم صف؛ بازگشت به صف پس از retry_delay ثانیه یا dead پس از اتمام تلاش‌ها
+        
+        Args:
+            retry_status: وضعیت آیتم تا تلاش بعدی؛ queued برای صف کار و failed برای مسیر مستقیم
+        
+        Returns:
+            str: وضعیت جدید آیتم
+        """
+        now = datetime.utcnow()
+        attempts += 1
+        if attempts >= max_attempts:
+            values = {"status": self.STATUS_DEAD, "completed_at": now}
+        else:
+            values = {"status": retry_status, "available_at": now + timedelta(seconds=retry_delay)}
+        
+        await self._execute_with_error_handling(self.session.execute(
+            update(TweetProcessingState)
+            .where(
+                TweetProcessingState.tweet_id == tweet_id,
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.claim_token == claim_token
+            )
+            .values(attempts=attempts, error=error, claim_token=None, **values)
+        ))
+        return values["status"]
+    
+    async def count_by_status(
+        self,
+        pipeline_version: Optional[str] = None,
+        job_id: Optional[uuid.UUID] = None
+    ) -> Dict[str, int]:
+        """تعداد سطرهای وضعیت به تفکیک وضعیت (برای یک کار یا کل صف)"""
+        query = select(TweetProcessingState.status, func.count()).group_by(TweetProcessingState.status)
+        if pipeline_version is not None:
+            query = query.where(TweetProcessingState.pipeline_version == pipeline_version)
+        if job_id is not None:
+            query = query.where(TweetProcessingState.job_id == job_id)
+        
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return {status: count for status, count in result.all()}
+    
+    async def requeue_dead(self, pipeline_version: str, job_id: Optional[uuid.UUID] = None) -> int:
+        """بازگرداندن آیتم‌های dead به صف با شمارنده تلاش صفر
+        
+        آیتم‌های مسیر مستقیم (بدون job_id) failed می‌شوند تا process_all_unprocessed آن‌ها را بردارد.
+        """
+        statement = (
+            update(TweetProcessingState)
+            .where(
+                TweetProcessingState.pipeline_version == pipeline_version,
+                TweetProcessingState.status == self.STATUS_DEAD
+            )
+            .values(
+                status=case(
+                    (TweetProcessingState.job_id.is_(None), self.STATUS_FAILED),
+                    else_=self.STATUS_QUEUED
+                ),
+                attempts=0,
+                available_at=datetime.utcnow(),
+                completed_at=None
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if job_id is not None:
+            statement = statement.where(TweetProcessingState.job_id == job_id)
+        result = await self._execute_with_error_handling(self.session.execute(statement))
+        return result.rowcount
+    
+    async def delete_for(self, tweet_ids: List[uuid.UUID]) -> int:
+        """حذف وضعیت پردازش توییت‌ها"""
+        if not tweet_ids:
+            return 0
+        
+        statement = delete(TweetProcessingState).where(TweetProcessingState.tweet_id.in_(tweet_ids))
+        result = await self._execute_with_error_handling(self.session.execute(statement))
+        return result.rowcount
+
+
+class ProcessingJobRepository(BaseRepository):
+    """مخزن کارهای صف پردازش"""
+    
+    async def create_job(self, pipeline_version: str, requested_count: int) -> ProcessingJob:
+        """ایجاد کار جدید"""
+        job = ProcessingJob(pipeline_version=pipeline_version, requested_count=requested_count)
+        self.session.add(job)
+        await self._execute_with_error_handling(self.session.flush())
+        return job
+    
+    async def get_by_id(self, job_id: uuid.UUID) -> Optional[ProcessingJob]:
+        """دریافت کار با شناسه"""
+        query = select(ProcessingJob).where(ProcessingJob.id == job_id)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+    
+    async def set_enqueued(self, job_id: uuid.UUID, enqueued_count: int) -> None:
+        """ثبت تعداد آیتم‌های صف‌شده کار"""
+        await self._execute_with_error_handling(self.session.execute(
+            update(ProcessingJob).where(ProcessingJob.id == job_id).values(enqueued_count=enqueued_count)
+        ))
 
 
 class CollectionRepository(BaseRepository):
@@ -432,6 +1428,9 @@ class AnalysisRepository(BaseRepository):
     
     async def create(self, tweet_id: uuid.UUID, analysis_type: str, result: Dict[str, Any], **kwargs) -> Analysis:
         """ایجاد تحلیل جدید"""
+        if kwargs.get("tweet_created_at") is None:
+            kwargs["tweet_created_at"] = await self._get_tweet_created_at(tweet_id)
+        
         analysis = Analysis(
             tweet_id=tweet_id,
             analysis_type=analysis_type,
@@ -485,4 +1484,271 @@ class AnalysisRepository(BaseRepository):
             return analysis
         else:
             # ایجاد تحلیل جدید
-            return await self.create(tweet_id, analysis_type, result, **kwargs)
\ No newline at end of file
+            return await self.create(tweet_id, analysis_type, result, **kwargs)
+
+    async def analyzed_tweet_ids(self, analysis_type: str, tweet_ids: List[uuid.UUID]) -> Set[uuid.UUID]:
+        """شناسه توییت‌هایی که تحلیل این نوع (برای تحلیل ترکیبی، همه انواع جزء) را دارند"""
+        if not tweet_ids:
+            return set()
+        
+        analysis_types = COMBINED_ANALYSIS_TYPES.get(analysis_type, (analysis_type,))
+        query = (
+            select(Analysis.tweet_id)
+            .where(Analysis.tweet_id.in_(tweet_ids), Analysis.analysis_type.in_(analysis_types))
+            .group_by(Analysis.tweet_id)
+            .having(func.count(func.distinct(Analysis.analysis_type)) == len(analysis_types))
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return set(result.scalars().all())
+    
+    async def count_by_processor(
+        self, 
+        analysis_type: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """تعداد تحلیل‌ها به تفکیک پردازشگر (لایه محلی یا مدل LLM)"""
+        query = (
+            select(Analysis.processed_by, func.count(Analysis.id))
+            .where(Analysis.analysis_type == analysis_type)
+            .group_by(Analysis.processed_by)
+        )
+        if since is not None:
+            query = query.where(Analysis.created_at >= since)
+        if until is not None:
+            query = query.where(Analysis.created_at < until)
+        
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return {processed_by or "unknown": count for processed_by, count in result.all()}
+    
+    async def save_result(
+        self, 
+        tweet_id: uuid.UUID, 
+        analysis_type: str, 
+        result: Dict[str, Any], 
+        **kwargs
+    ) -> List[Analysis]:
+        """ذخیره نتیجه تحلیل؛ نتیجه تحلیل ترکیبی به تفکیک هر نوع تحلیل جزء ذخیره می‌شود"""
+        if analysis_type not in COMBINED_ANALYSIS_TYPES:
+            return [await self.create_or_update(tweet_id, analysis_type, result, **kwargs)]
+        
+        return [
+            await self.create_or_update(tweet_id, component_type, result[component_type], **kwargs)
+            for component_type in COMBINED_ANALYSIS_TYPES[analysis_type]
+        ]
+
+    async def bulk_create(
+        self, 
+        analysis_type: str, 
+        results: Dict[uuid.UUID, Dict[str, Any]], 
+        row_values: Optional[Dict[uuid.UUID, Dict[str, Any]]] = None,
+        **kwargs
+    ) -> int:
+        """ایجاد دسته‌ای تحلیل‌ها در یک دستور
+        
+        توییت‌هایی که دیگر وجود ندارند (مثلاً بایگانی شده‌اند) یا تحلیل این نوع را
+        دارند نادیده گرفته می‌شوند. نتیجه تحلیل ترکیبی به صورت یک سطر برای هر نوع
+        تحلیل جزء ذخیره می‌شود. مقادیر row_values (مثلاً processed_by هر توییت)
+        روی مقادیر مشترک kwargs اعمال می‌شوند.
+        
+        Returns:
+            int: تعداد تحلیل‌های ایجادشده
+        """
+        if not results:
+            return 0
+        
+        if analysis_type in COMBINED_ANALYSIS_TYPES:
+            created = 0
+            for component_type in COMBINED_ANALYSIS_TYPES[analysis_type]:
+                created += await self.bulk_create(
+                    component_type,
+                    {tweet_id: result[component_type] for tweet_id, result in results.items()},
+                    row_values,
+                    **kwargs
+                )
+            return created
+        
+        query = (
+            select(Tweet.id, Tweet.created_at)
+            .where(Tweet.id.in_(list(results)))
+            .where(~select(Analysis.id).where(
+                Analysis.tweet_id == Tweet.id,
+                Analysis.analysis_type == analysis_type
+            ).exists())
+        )
+        rows = (await self._execute_with_error_handling(self.session.execute(query))).all()
+        if not rows:
+            return 0
+        
+        now = datetime.utcnow()
+        await self._execute_with_error_handling(self.session.execute(
+            insert(Analysis),
+            [
+                {
+                    "id": uuid.uuid4(),
+                    "tweet_id": row.id,
+                    "analysis_type": analysis_type,
+                    "result": results[row.id],
+                    "tweet_created_at": row.created_at,
+                    "created_at": now,
+                    "updated_at": now,
+                    **kwargs,
+                    **(row_values or {}).get(row.id, {})
+                }
+                for row in rows
+            ]
+        ))
+        return len(rows)
+
+
+class AnalysisCacheRepository(BaseRepository):
+    """مخزن لایه دیتابیس کش نتایج تحلیل"""
+    
+    async def get(self, cache_key: str) -> Optional[AnalysisCacheEntry]:
+        """دریافت مدخل کش و ثبت برخورد"""
+        query = select(AnalysisCacheEntry).where(AnalysisCacheEntry.cache_key == cache_key)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        entry = result.scalar_one_or_none()
+        
+        if entry:
+            await self._execute_with_error_handling(self.session.execute(
+                update(AnalysisCacheEntry)
+                .where(AnalysisCacheEntry.id == entry.id)
+                .values(hit_count=AnalysisCacheEntry.hit_count + 1, last_hit_at=datetime.utcnow())
+            ))
+        return entry
+    
+    async def save(
+        self, 
+        cache_key: str, 
+        analysis_type: str, 
+        model: str, 
+        prompt_version: str,
+        result: Dict[str, Any]
+    ) -> None:
+        """ذخیره نتیجه تحلیل در کش (در صورت وجود، مقدار قبلی حفظ می‌شود)"""
+        now = datetime.utcnow()
+        statement = self._insert(AnalysisCacheEntry).values(
+            id=uuid.uuid4(),
+            cache_key=cache_key,
+            analysis_type=analysis_type,
+            model=model,
+            prompt_version=prompt_version,
+            result=result,
+            hit_count=0,
+            created_at=now,
+            updated_at=now
+        ).on_conflict_do_nothing(index_elements=["cache_key"])
+        await self._execute_with_error_handling(self.session.execute(statement))
+
+
+class AnalysisBatchRepository(BaseRepository):
+    """مخزن دسته‌های تحلیل Message Batches API و آیتم‌های آن‌ها"""
+    
+    STATUS_IN_PROGRESS = "in_progress"
+    STATUS_ENDED = "ended"
+    
+    ITEM_PENDING = "pending"
+    ITEM_SUCCEEDED = "succeeded"
+    ITEM_ERRORED = "errored"
+    
+    async def get_unanalyzed_tweets(self, analysis_type: str, limit: int = 1000) -> List[Any]:
+        """توییت‌هایی که تحلیل این نوع را ندارند و در دسته در حال اجرایی هم نیستند
+        
+        برای تحلیل ترکیبی، توییت‌هایی که هر یک از انواع تحلیل جزء را ندارند برگردانده می‌شوند.
+        """
+        analyzed = and_(*[
+            select(Analysis.id)
+            .where(Analysis.tweet_id == Tweet.id, Analysis.analysis_type == component_type)
+            .exists()
+            for component_type in COMBINED_ANALYSIS_TYPES.get(analysis_type, (analysis_type,))
+        ])
+        pending = (
+            select(AnalysisBatchItem.id)
+            .join(AnalysisBatchJob, AnalysisBatchJob.id == AnalysisBatchItem.job_id)
+            .where(
+                AnalysisBatchItem.tweet_id == Tweet.id,
+                AnalysisBatchItem.status == self.ITEM_PENDING,
+                AnalysisBatchJob.analysis_type == analysis_type
+            )
+            .exists()
+        )
+        query = (
+            select(Tweet.id, Tweet.text)
+            .where(~analyzed, ~pending)
+            .order_by(Tweet.created_at.desc())
+            .limit(limit)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.all()
+    
+    async def create_job(
+        self, 
+        batch_id: str, 
+        analysis_type: str, 
+        model: str, 
+        tweet_ids: List[uuid.UUID],
+        status: str = STATUS_IN_PROGRESS
+    ) -> AnalysisBatchJob:
+        """ثبت دسته ارسال‌شده و آیتم‌های آن"""
+        job = AnalysisBatchJob(
+            batch_id=batch_id,
+            analysis_type=analysis_type,
+            model=model,
+            status=status,
+            request_count=len(tweet_ids)
+        )
+        self.session.add(job)
+        await self._execute_with_error_handling(self.session.flush())
+        
+        if tweet_ids:
+            await self._execute_with_error_handling(self.session.execute(
+                insert(AnalysisBatchItem),
+                [
+                    {"id": uuid.uuid4(), "job_id": job.id, "tweet_id": tweet_id, "status": self.ITEM_PENDING}
+                    for tweet_id in tweet_ids
+                ]
+            ))
+        return job
+    
+    async def get_by_batch_id(self, batch_id: str) -> Optional[AnalysisBatchJob]:
+        """دریافت دسته با شناسه Message Batch"""
+        query = select(AnalysisBatchJob).where(AnalysisBatchJob.batch_id == batch_id)
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalar_one_or_none()
+    
+    async def list_unprocessed(self, limit: int = 100) -> List[AnalysisBatchJob]:
+        """دسته‌هایی که نتایجشان هنوز ثبت نشده است"""
+        query = (
+            select(AnalysisBatchJob)
+            .where(AnalysisBatchJob.processed_at.is_(None))
+            .order_by(AnalysisBatchJob.submitted_at)
+            .limit(limit)
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return result.scalars().all()
+    
+    async def update_job(self, job_id: uuid.UUID, **kwargs) -> None:
+        """به‌روزرسانی وضعیت دسته"""
+        statement = (
+            update(AnalysisBatchJob)
+            .where(AnalysisBatchJob.id == job_id)
+            .values(updated_at=datetime.utcnow(), **kwargs)
+        )
+        await self._execute_with_error_handling(self.session.execute(statement))
+    
+    async def get_item_ids(self, job_id: uuid.UUID) -> Dict[uuid.UUID, uuid.UUID]:
+        """نگاشت شناسه توییت به شناسه آیتم برای آیتم‌های در انتظار یک دسته"""
+        query = select(AnalysisBatchItem.tweet_id, AnalysisBatchItem.id).where(
+            AnalysisBatchItem.job_id == job_id,
+            AnalysisBatchItem.status == self.ITEM_PENDING
+        )
+        result = await self._execute_with_error_handling(self.session.execute(query))
+        return {row.tweet_id: row.id for row in result.all()}
+    
+    async def update_items(self, values: List[Dict[str, Any]]) -> None:
+        """به‌روزرسانی دسته‌ای آیتم‌ها بر اساس شناسه (هر مقدار شامل id است)"""
+        if not values:
+            return
+        
+        await self._execute_with_error_handling(self.session.execute(update(AnalysisBatchItem), values))
@@ -0,0 +1,100 @@
+"""
+ارتقای طرح دیتابیس‌های موجود
+
+Base.metadata.create_all فقط جدول‌های تازه را می‌سازد و ستون‌هایی را که بعداً
+به جدول‌های موجود اضافه شده‌اند ایجاد نمی‌کند. این ماژول پس از create_all
+ستون‌های ADDED_COLUMNS را که در جدول موجود نیستند با ALTER TABLE ... ADD COLUMN
+اضافه می‌کند، در صورت نیاز مقدار سطرهای موجود را پر می‌کند و ایندکس‌های
+جاافتاده همان جدول‌ها را می‌سازد. ستون‌ها و ایندکس‌های موجود نادیده گرفته
+می‌شوند، پس اجرای دوباره آن هنگام هر راه‌اندازی تغییری ایجاد نمی‌کند.
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, inspect, literal, text
+from sqlalchemy.engine import Connection
+
+from src.data.models import Base
+
+logger = logging.getLogger(__name__)
+
+
+def _backfill_tweet_created_at(table_name: str) -> str:
+    """پر کردن زمان توییت سطرهای موجود یک جدول وابسته از جدول tweets"""
+    return (
+        f"UPDATE {table_name} SET tweet_created_at = "
+        f"(SELECT tweets.created_at FROM tweets WHERE tweets.id = {table_name}.tweet_id) "
+        f"WHERE tweet_created_at IS NULL"
+    )
+
+
+# ستون‌های افزوده‌شده به جدول‌های موجود: جدول، ستون و دستور پر کردن سطرهای قبلی (در صورت نیاز)
+ADDED_COLUMNS: List[Tuple[str, str, Optional[str]]] = [
+    ("tweets", "ingested_at", None),
+    ("tweets", "cluster_id", None),
+    ("tweet_keywords", "tweet_created_at", _backfill_tweet_created_at("tweet_keywords")),
+    ("analyses", "tweet_created_at", _backfill_tweet_created_at("analyses")),
+    ("tweet_processing_states", "job_id", None),
+    ("tweet_processing_states", "attempts", None),
+    ("tweet_processing_states", "available_at", None),
+]
+
+
+def _column_definition(connection: Connection, column: Column) -> str:
+    """تعریف ستون برای ALTER TABLE ... ADD COLUMN"""
+    dialect = connection.dialect
+    preparer = dialect.identifier_preparer
+    definition = f"{preparer.quote(column.name)} {column.type.compile(dialect=dialect)}"
+    
+    if not column.nullable:
+        # ستون NOT NULL در جدول دارای سطر فقط با مقدار پیش‌فرض اضافه می‌شود
+        if column.default is None or not column.default.is_scalar:
+            raise ValueError(f"Column {column.table.name}.{column.name} needs a scalar default to be added")
+        default = literal(column.default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={"literal_binds": True}
+        )
+        definition += f" NOT NULL DEFAULT {default}"
+    
+    for foreign_key in column.foreign_keys:
+        target = foreign_key.column
+        definition += f" REFERENCES {preparer.quote(target.table.name)} ({preparer.quote(target.name)})"
+    
+    return definition
+
+
+def upgrade_schema(connection: Connection) -> List[str]:
+    """افزودن ستون‌ها و ایندکس‌های جاافتاده جدول‌های موجود
+    
+    Returns:
+        List[str]: ستون‌های افزوده‌شده به صورت table.column
+    """
+    inspector = inspect(connection)
+    existing = {}
+    added = []
+    
+    for table_name, column_name, backfill in ADDED_COLUMNS:
+        if table_name not in existing:
+            existing[table_name] = {column["name"] for column in inspector.get_columns(table_name)}
+        if column_name in existing[table_name]:
+            continue
+        
+        table = Base.metadata.tables[table_name]
+        column = table.c[column_name]
+        connection.execute(text(
+            f"ALTER TABLE {connection.dialect.identifier_preparer.quote(table_name)} "
+            f"ADD COLUMN {_column_definition(connection, column)}"
+        ))
+        if backfill:
+            connection.execute(text(backfill))
+        
+        existing[table_name].add(column_name)
+        added.append(f"{table_name}.{column_name}")
+        logger.info(f"Added column {table_name}.{column_name} to existing table")
+    
+    # ایندکس‌های ستون‌های افزوده‌شده و ایندکس‌هایی که بعداً روی ستون‌های قدیمی تعریف شده‌اند
+    for table_name in existing:
+        for index in Base.metadata.tables[table_name].indexes:
+            index.create(connection, checkfirst=True)
+    
+    return added
@@ -0,0 +1,208 @@
+"""
+جستجوی تمام‌متن توییت‌ها
+
+این ماژول یک ایندکس تمام‌متن جانبی برای متن توییت‌ها نگهداری می‌کند:
+- SQLite: جدول مجازی FTS5 با رتبه‌بندی bm25
+- PostgreSQL: ستون tsvector با ایندکس GIN و رتبه‌بندی ts_rank
+
+متن پیش از ایندکس شدن و عبارت جستجو پیش از اجرا با normalize_persian
+یکسان‌سازی می‌شوند تا تفاوت‌های نوشتاری (ي/ی، ك/ک، نیم‌فاصله، اعراب و ارقام)
+روی نتایج اثر نگذارد.
+"""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.exceptions import DatabaseError
+from src.data.models import Tweet
+from src.processor.normalizer import normalize_persian, tokenize
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "tweet_search"
+
+
+def create_search_index(connection: Connection) -> None:
+    """ایجاد جدول ایندکس تمام‌متن (فقط در صورت عدم وجود)"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "tweet_id UUID PRIMARY KEY, "
+            "created_at TIMESTAMP NOT NULL, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document "
+            f"ON {SEARCH_TABLE} USING GIN (document)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_created_at ON {SEARCH_TABLE} (created_at)"
+        ))
+    elif connection.dialect.name == "sqlite":
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "tweet_id UNINDEXED, created_at UNINDEXED, body, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+    else:
+        logger.warning(f"Full-text search is not supported on {connection.dialect.name}")
+        return
+    
+    logger.info("Full-text search index created or verified")
+
+
+class TweetSearchIndex:
+    """نگهداری و جستجوی ایندکس تمام‌متن توییت‌ها"""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    @property
+    def dialect(self) -> str:
+        return self.session.get_bind().dialect.name
+    
+    async def _execute(self, statement: Any, params: Any = None) -> Any:
+        """اجرای یک دستور SQL با مدیریت خطاها"""
+        try:
+            return await self.session.execute(statement, params)
+        except SQLAlchemyError as e:
+            raise DatabaseError(f"Search index error: {str(e)}")
+    
+    async def index_tweet(self, tweet_id: uuid.UUID, body: str, created_at: datetime, is_new: bool = False) -> None:
+        """افزودن یا به‌روزرسانی متن یک توییت در ایندکس
+        
+        Args:
+            is_new: توییت تازه ایجاد شده و سطری در ایندکس ندارد
+        """
+        params = {"tweet_id": str(tweet_id), "body": normalize_persian(body), "created_at": created_at}
+        
+        if self.dialect == "postgresql":
+            await self._execute(text(
+                f"INSERT INTO {SEARCH_TABLE} (tweet_id, created_at, document) "
+                "VALUES (CAST(:tweet_id AS UUID), :created_at, to_tsvector('simple', :body)) "
+                "ON CONFLICT (tweet_id) DO UPDATE SET "
+                "created_at = EXCLUDED.created_at, document = EXCLUDED.document"
+            ), params)
+        elif self.dialect == "sqlite":
+            # FTS5 کلید یکتا ندارد؛ سطر قبلی حذف و دوباره درج می‌شود. ستون tweet_id
+            # ایندکس ندارد و حذف کل جدول را پیمایش می‌کند، پس برای توییت جدید انجام نمی‌شود
+            if not is_new:
+                await self._execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE tweet_id = :tweet_id"), params)
+            await self._execute(text(
+                f"INSERT INTO {SEARCH_TABLE} (tweet_id, created_at, body) "
+                "VALUES (:tweet_id, :created_at, :body)"
+            ), {**params, "created_at": created_at.isoformat(sep=" ")})
+    
+    async def remove(self, tweet_ids: List[uuid.UUID]) -> None:
+        """حذف توییت‌ها از ایندکس"""
+        if not tweet_ids or self.dialect not in ("postgresql", "sqlite"):
+            return
+        
+        cast = "CAST(:tweet_id AS UUID)" if self.dialect == "postgresql" else ":tweet_id"
+        await self._execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE tweet_id = {cast}"),
+            [{"tweet_id": str(tweet_id)} for tweet_id in tweet_ids]
+        )
+    
+    def _match(self, query: str) -> Optional[Tuple[str, str]]:
+        """ساخت شرط تطبیق و عبارت جستجو بر اساس دیتابیس"""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        
+        if self.dialect == "postgresql":
+            return "document @@ plainto_tsquery('simple', :query)", " ".join(tokens)
+        
+        # هر توکن داخل گیومه قرار می‌گیرد تا به عنوان عملگر FTS5 تفسیر نشود
+        return f"{SEARCH_TABLE} MATCH :query", " ".join(f'"{token}"' for token in tokens)
+    
+    def _time_range(self, since: Optional[datetime], until: Optional[datetime]) -> Tuple[str, dict]:
+        """شرط بازه زمانی روی ایندکس"""
+        clauses, params = "", {}
+        to_param = (lambda value: value) if self.dialect == "postgresql" else (lambda value: value.isoformat(sep=" "))
+        
+        if since is not None:
+            clauses += " AND created_at >= :since"
+            params["since"] = to_param(since)
+        if until is not None:
+            clauses += " AND created_at < :until"
+            params["until"] = to_param(until)
+        
+        return clauses, params
+    
+    async def search(
+        self,
+        query: str,
+        skip: int = 0,
+        limit: int = 100,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[uuid.UUID]:
+        """جستجوی توییت‌ها و برگرداندن شناسه‌ها به ترتیب رتبه"""
+        match = self._match(query)
+        if match is None or self.dialect not in ("postgresql", "sqlite"):
+            return []
+        
+        condition, search_query = match
+        time_clause, params = self._time_range(since, until)
+        
+        if self.dialect == "postgresql":
+            rank = "ts_rank(document, plainto_tsquery('simple', :query)) DESC"
+        else:
+            # bm25 در FTS5 برای نتایج مرتبط‌تر مقدار کوچک‌تری برمی‌گرداند
+            rank = f"bm25({SEARCH_TABLE})"
+        
+        result = await self._execute(text(
+            f"SELECT tweet_id FROM {SEARCH_TABLE} WHERE {condition}{time_clause} "
+            f"ORDER BY {rank}, created_at DESC LIMIT :limit OFFSET :skip"
+        ), {**params, "query": search_query, "limit": limit, "skip": skip})
+        
+        return [
+            tweet_id if isinstance(tweet_id, uuid.UUID) else uuid.UUID(tweet_id)
+            for tweet_id in result.scalars().all()
+        ]
+    
+    async def count(
+        self,
+        query: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> int:
+        """شمارش نتایج جستجو"""
+        match = self._match(query)
+        if match is None or self.dialect not in ("postgresql", "sqlite"):
+            return 0
+        
+        condition, search_query = match
+        time_clause, params = self._time_range(since, until)
+        result = await self._execute(text(
+            f"SELECT count(*) FROM {SEARCH_TABLE} WHERE {condition}{time_clause}"
+        ), {**params, "query": search_query})
+        return result.scalar_one()
+    
+    async def rebuild(self, batch_size: int = 5000) -> int:
+        """ساخت مجدد ایندکس برای توییت‌های موجود (مثلاً پس از فعال‌سازی روی دیتابیس قدیمی)"""
+        indexed, last_id = 0, None
+        while True:
+            query = select(Tweet.id, Tweet.text, Tweet.created_at).order_by(Tweet.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(Tweet.id > last_id)
+            
+            rows = (await self._execute(query)).all()
+            for row in rows:
+                await self.index_tweet(row.id, row.text, row.created_at)
+            
+            indexed += len(rows)
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1].id
+        
+        logger.info(f"Rebuilt full-text index for {indexed} tweets")
+        return indexed
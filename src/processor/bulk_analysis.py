@@ -0,0 +1,217 @@
+"""
+تحلیل آفلاین حجم بالا با Message Batches API
+
+برای پس‌افت‌های بزرگ (صدها هزار توییت) که به تأخیر تعاملی نیاز ندارند،
+توییت‌های تحلیل‌نشده در قالب Message Batch ارسال می‌شوند. شناسه دسته و
+آیتم‌های آن در دیتابیس ثبت می‌شود، یک پلاگین پس‌زمینه وضعیت دسته‌ها را
+بررسی می‌کند و پس از پایان، نتایج به صورت دسته‌ای در جدول analyses نوشته
+می‌شوند.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.api.anthropic import AnthropicClient, SYSTEM_PROMPTS, create_anthropic_client
+from src.config.settings import settings
+from src.core.exceptions import ValidationError
+from src.core.plugin import Plugin
+from src.data.database import get_db_session
+from src.data.models import AnalysisBatchJob
+from src.data.repositories import AnalysisBatchRepository, AnalysisRepository
+
+logger = logging.getLogger(__name__)
+
+# تعداد نتایجی که در هر تراکنش ثبت می‌شوند
+RESULT_CHUNK_SIZE = 1000
+
+
+class BulkAnalysisService:
+    """ارسال توییت‌ها به Message Batches API و ثبت نتایج"""
+    
+    def __init__(self, client: Optional[AnthropicClient] = None):
+        self.client = client or create_anthropic_client()
+    
+    async def close(self) -> None:
+        """بستن کلاینت"""
+        await self.client.close()
+    
+    async def submit(self, analysis_type: str, limit: Optional[int] = None) -> Optional[AnalysisBatchJob]:
+        """ارسال توییت‌های تحلیل‌نشده در یک Message Batch
+        
+        Returns:
+            Optional[AnalysisBatchJob]: دسته ثبت‌شده یا None در صورت نبود توییت تحلیل‌نشده
+        """
+        if analysis_type not in SYSTEM_PROMPTS:
+            raise ValidationError(message=f"Unsupported batch analysis type: {analysis_type}")
+        
+        max_requests = settings.anthropic_api.batch_job_max_requests
+        limit = min(limit or max_requests, max_requests)
+        
+        async with get_db_session() as session:
+            tweets = await AnalysisBatchRepository(session).get_unanalyzed_tweets(analysis_type, limit)
+        
+        if not tweets:
+            logger.info(f"No tweets without {analysis_type} analysis to submit")
+            return None
+        
+        # شناسه توییت به عنوان custom_id برای تطبیق نتایج استفاده می‌شود
+        requests = [self.client.build_batch_request(str(tweet.id), tweet.text, analysis_type) for tweet in tweets]
+        batch = await self.client.submit_message_batch(requests)
+        
+        async with get_db_session() as session:
+            job = await AnalysisBatchRepository(session).create_job(
+                batch_id=batch.id,
+                analysis_type=analysis_type,
+                model=self.client.default_model,
+                tweet_ids=[tweet.id for tweet in tweets],
+                status=batch.processing_status
+            )
+        
+        logger.info(f"Submitted message batch {batch.id} with {len(tweets)} {analysis_type} requests")
+        return job
+    
+    async def poll_once(self) -> int:
+        """بررسی وضعیت دسته‌های در جریان و ثبت نتایج دسته‌های پایان‌یافته
+        
+        Returns:
+            int: تعداد تحلیل‌های ثبت‌شده
+        """
+        async with get_db_session() as session:
+            jobs = await AnalysisBatchRepository(session).list_unprocessed()
+        
+        created = 0
+        for job in jobs:
+            try:
+                created += await self.poll_job(job)
+            except Exception as e:
+                logger.error(f"Error polling message batch {job.batch_id}: {str(e)}", exc_info=True)
+                async with get_db_session() as session:
+                    await AnalysisBatchRepository(session).update_job(job.id, error=str(e))
+        
+        return created
+    
+    async def poll_job(self, job: AnalysisBatchJob) -> int:
+        """بررسی یک دسته و در صورت پایان، ثبت نتایج آن"""
+        batch = await self.client.get_message_batch(job.batch_id)
+        counts = batch.request_counts
+        
+        async with get_db_session() as session:
+            await AnalysisBatchRepository(session).update_job(
+                job.id,
+                status=batch.processing_status,
+                succeeded_count=counts.succeeded,
+                errored_count=counts.errored + counts.canceled + counts.expired,
+                ended_at=batch.ended_at.replace(tzinfo=None) if batch.ended_at else None
+            )
+        
+        if batch.processing_status != AnalysisBatchRepository.STATUS_ENDED:
+            return 0
+        
+        return await self._store_results(job)
+    
+    async def _store_results(self, job: AnalysisBatchJob) -> int:
+        """ثبت نتایج یک دسته پایان‌یافته به صورت تکه‌تکه"""
+        async with get_db_session() as session:
+            item_ids = await AnalysisBatchRepository(session).get_item_ids(job.id)
+        
+        created = 0
+        chunk: List[Any] = []
+        
+        async for custom_id, result, error, model in self.client.message_batch_results(job.batch_id, job.analysis_type):
+            chunk.append((custom_id, result, error, model))
+            if len(chunk) >= RESULT_CHUNK_SIZE:
+                created += await self._store_chunk(job, item_ids, chunk)
+                chunk = []
+        
+        if chunk:
+            created += await self._store_chunk(job, item_ids, chunk)
+        
+        async with get_db_session() as session:
+            await AnalysisBatchRepository(session).update_job(job.id, processed_at=datetime.utcnow(), error=None)
+        
+        logger.info(f"Stored {created} {job.analysis_type} analyses from message batch {job.batch_id}")
+        return created
+    
+    async def _store_chunk(self, job: AnalysisBatchJob, item_ids: Dict[uuid.UUID, uuid.UUID], chunk: List[Any]) -> int:
+        """ثبت یک تکه از نتایج: به‌روزرسانی آیتم‌ها و درج دسته‌ای تحلیل‌ها"""
+        item_values: List[Dict[str, Any]] = []
+        results_by_model: Dict[str, Dict[uuid.UUID, Dict[str, Any]]] = {}
+        
+        for custom_id, result, error, model in chunk:
+            tweet_id = self._tweet_id(custom_id)
+            item_id = item_ids.get(tweet_id)
+            if item_id is None:
+                continue
+            
+            if result is None:
+                item_values.append({"id": item_id, "status": AnalysisBatchRepository.ITEM_ERRORED, "error": error})
+                continue
+            
+            data = result.model_dump()
+            item_values.append({"id": item_id, "status": AnalysisBatchRepository.ITEM_SUCCEEDED, "result": data})
+            results_by_model.setdefault(model or job.model, {})[tweet_id] = data
+        
+        created = 0
+        async with get_db_session() as session:
+            await AnalysisBatchRepository(session).update_items(item_values)
+            analysis_repo = AnalysisRepository(session)
+            for model, results in results_by_model.items():
+                created += await analysis_repo.bulk_create(job.analysis_type, results, processed_by=model)
+        
+        return created
+    
+    @staticmethod
+    def _tweet_id(custom_id: str) -> Optional[uuid.UUID]:
+        """تبدیل custom_id به شناسه توییت"""
+        try:
+            return uuid.UUID(custom_id)
+        except ValueError:
+            return None
+
+
+class AnalysisBatchPollerPlugin(Plugin):
+    """پلاگین بررسی دوره‌ای دسته‌های Message Batches API"""
+    
+    @property
+    def name(self) -> str:
+        return "analysis_batch_poller"
+    
+    @property
+    def version(self) -> str:
+        return "0.1.0"
+    
+    @property
+    def description(self) -> str:
+        return "بررسی وضعیت دسته‌های تحلیل و ثبت نتایج پایان‌یافته"
+    
+    async def run(self) -> None:
+        """بررسی دسته‌ها در حلقه تکرار"""
+        service = BulkAnalysisService()
+        
+        try:
+            while True:
+                try:
+                    created = await service.poll_once()
+                    if created:
+                        logger.info(f"Analysis batch poller stored {created} analyses")
+                except Exception as e:
+                    logger.error(f"Analysis batch poller error: {str(e)}", exc_info=True)
+                
+                await asyncio.sleep(settings.anthropic_api.batch_poll_interval)
+        finally:
+            await service.close()
+    
+    def initialize(self) -> None:
+        """راه‌اندازی پلاگین"""
+        self.task = asyncio.create_task(self.run())
+        logger.info("AnalysisBatchPollerPlugin initialized")
+    
+    def shutdown(self) -> None:
+        """خاموش کردن پلاگین"""
+        if hasattr(self, "task"):
+            self.task.cancel()
+        
+        logger.info("AnalysisBatchPollerPlugin shutdown")
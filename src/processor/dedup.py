@@ -0,0 +1,206 @@
+"""
+تشخیص توییت‌های تقریباً تکراری
+
+این ماژول برای هر توییت یک امضای MinHash روی شینگل‌های حرفی متن نرمال‌شده
+می‌سازد؛ نسبت مؤلفه‌های برابر دو امضا تخمینی از شباهت Jaccard دو متن است.
+امضاها در یک شاخص LSH درون حافظه نگهداری می‌شوند: امضا به چند باند تقسیم
+می‌شود و فقط خوشه‌هایی که دست‌کم در یک باند با امضای جدید برابرند بررسی
+می‌شوند، بنابراین هزینه هر جستجو به تعداد باندها بستگی دارد و نه به اندازه
+شاخص. فقط نماینده هر خوشه در شاخص قرار می‌گیرد و خوشه‌ها پس از پایان پنجره
+زمانی یا رسیدن به سقف تعداد حذف می‌شوند، پس حافظه محدود است.
+"""
+
+import re
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config.settings import settings
+from src.processor.normalizer import normalize_persian
+
+# لینک‌ها (مثلاً t.co) و منشن‌ها در هر نسخه متفاوت‌اند و در امضا شرکت نمی‌کنند
+_NOISE_PATTERN = re.compile(r"https?://\S+|www\.\S+|@\w+")
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def shingles(text: str, size: int = 4) -> Set[str]:
+    """شینگل‌های حرفی متن نرمال‌شده (بدون لینک، منشن و علائم)"""
+    normalized = _NON_WORD_PATTERN.sub(" ", normalize_persian(_NOISE_PATTERN.sub(" ", text or ""))).strip()
+    if not normalized:
+        return set()
+    
+    count = max(len(normalized) - size + 1, 1)
+    return {normalized[index:index + size] for index in range(count)}
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """تخمین شباهت Jaccard دو امضای MinHash"""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class MinHasher:
+    """محاسبه امضای MinHash با num_perm تابع درهم‌سازی a * x + b (به پیمانه 2^64)
+    
+    هش شینگل‌ها با hash داخلی پایتون محاسبه می‌شود که بین پردازه‌ها ثابت نیست؛
+    امضا فقط برای شاخص درون حافظه همان پردازه به کار می‌رود.
+    """
+    
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """امضای متن (نیمه بالایی هر کمینه به صورت uint32)؛ برای متن بدون محتوا None"""
+        features = shingles(text)
+        if not features:
+            return None
+        
+        hashes = np.fromiter((hash(feature) for feature in features), dtype=np.int64, count=len(features))
+        with np.errstate(over="ignore"):
+            permuted = hashes.view(np.uint64)[:, None] * self._a + self._b
+        return (permuted.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+
+class _Cluster:
+    """نماینده یک خوشه در شاخص"""
+    
+    __slots__ = ("signature", "band_keys", "last_seen", "size")
+    
+    def __init__(self, signature: np.ndarray, band_keys: List[int], last_seen: float) -> None:
+        self.signature = signature
+        self.band_keys = band_keys
+        self.last_seen = last_seen
+        self.size = 1
+
+
+class NearDuplicateIndex:
+    """شاخص LSH امضاهای MinHash روی یک پنجره زمانی لغزان
+    
+    با b باند r ردیفی، احتمال بررسی دو متن با شباهت s برابر 1 - (1 - s^r)^b است؛
+    نامزدها سپس با آستانه threshold روی شباهت تخمینی تأیید می‌شوند.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        num_perm: int = 64,
+        bands: int = 16,
+        window_seconds: float = 3600,
+        max_clusters: int = 50000
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of the number of bands")
+        
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.max_clusters = max_clusters
+        self.hasher = MinHasher(num_perm)
+        self._rows = num_perm // bands
+        
+        # خوشه‌ها به ترتیب آخرین مشاهده؛ قدیمی‌ترین خوشه در ابتدای فهرست است
+        self._clusters: "OrderedDict[uuid.UUID, _Cluster]" = OrderedDict()
+        self._buckets: List[Dict[int, Set[uuid.UUID]]] = [{} for _ in range(bands)]
+        
+        self.stats = {"lookups": 0, "duplicates": 0, "evicted": 0}
+    
+    @classmethod
+    def from_settings(cls) -> "NearDuplicateIndex":
+        """ساخت شاخص از تنظیمات خط لوله پردازش"""
+        config = settings.processor
+        return cls(
+            threshold=config.near_duplicate_threshold,
+            num_perm=config.near_duplicate_num_perm,
+            bands=config.near_duplicate_bands,
+            window_seconds=config.near_duplicate_window_seconds,
+            max_clusters=config.near_duplicate_max_clusters
+        )
+    
+    def __len__(self) -> int:
+        return len(self._clusters)
+    
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        # هش هر باند کلید سطل است؛ برخورد هش فقط یک نامزد اضافه برای تأیید می‌سازد
+        data = signature.tobytes()
+        width = self._rows * signature.itemsize
+        return [hash(data[start:start + width]) for start in range(0, len(data), width)]
+    
+    def _evict(self, now: float) -> None:
+        """حذف خوشه‌های خارج از پنجره زمانی و خوشه‌های مازاد بر سقف"""
+        while self._clusters:
+            cluster_id, cluster = next(iter(self._clusters.items()))
+            if len(self._clusters) <= self.max_clusters and now - cluster.last_seen <= self.window_seconds:
+                break
+            
+            self._clusters.popitem(last=False)
+            for buckets, key in zip(self._buckets, cluster.band_keys):
+                members = buckets[key]
+                members.discard(cluster_id)
+                if not members:
+                    del buckets[key]
+            self.stats["evicted"] += 1
+    
+    def _lookup(self, signature: np.ndarray, band_keys: List[int]) -> Optional[uuid.UUID]:
+        """شبیه‌ترین خوشه با شباهت حداقل threshold (یا None)"""
+        best_id, best_similarity = None, self.threshold
+        seen: Set[uuid.UUID] = set()
+        
+        for buckets, key in zip(self._buckets, band_keys):
+            for cluster_id in buckets.get(key, ()):
+                if cluster_id in seen:
+                    continue
+                seen.add(cluster_id)
+                similarity = estimate_similarity(signature, self._clusters[cluster_id].signature)
+                if similarity >= best_similarity:
+                    best_id, best_similarity = cluster_id, similarity
+        
+        return best_id
+    
+    def assign(self, item_id: uuid.UUID, text: str, now: Optional[float] = None) -> Tuple[uuid.UUID, bool]:
+        """تعیین خوشه یک متن؛ در صورت نبود خوشه مشابه، خود مورد نماینده خوشه جدید می‌شود
+        
+        Returns:
+            Tuple[uuid.UUID, bool]: شناسه خوشه (شناسه نماینده) و تکراری بودن مورد
+        """
+        now = time.monotonic() if now is None else now
+        self._evict(now)
+        self.stats["lookups"] += 1
+        
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return item_id, False
+        
+        band_keys = self._band_keys(signature)
+        cluster_id = self._lookup(signature, band_keys)
+        if cluster_id == item_id:
+            return item_id, False
+        
+        if cluster_id is not None:
+            # خوشه فعال تا زمانی که نسخه‌های جدید می‌رسند در پنجره باقی می‌ماند
+            cluster = self._clusters[cluster_id]
+            cluster.last_seen = now
+            cluster.size += 1
+            self._clusters.move_to_end(cluster_id)
+            self.stats["duplicates"] += 1
+            return cluster_id, True
+        
+        self._clusters[item_id] = _Cluster(signature, band_keys, now)
+        for buckets, key in zip(self._buckets, band_keys):
+            buckets.setdefault(key, set()).add(item_id)
+        self._evict(now)
+        return item_id, False
+    
+    def metrics(self) -> Dict[str, int]:
+        """آمار شاخص: تعداد جستجو، تکراری‌ها، خوشه‌های حذف‌شده و اندازه فعلی"""
+        return {**self.stats, "clusters": len(self._clusters)}
+
+
+@lru_cache()
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """شاخص مشترک پردازه؛ خوشه‌ها بین اجراهای خط لوله حفظ می‌شوند"""
+    return NearDuplicateIndex.from_settings()
@@ -5,14 +5,38 @@
 """
 
 import logging
-import re
+import operator
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Set, Union
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, func, or_, true
+from sqlalchemy.sql.elements import ColumnElement
 
 from src.data.models import Tweet
+from src.processor.matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# ستون‌های توییت که در حالت ستونی فیلترینگ بارگذاری می‌شوند
+FILTER_COLUMNS = ("language", "like_count", "retweet_count", "reply_count", "quote_count")
+ENGAGEMENT_COLUMNS = ("like_count", "retweet_count", "reply_count", "quote_count")
+
+
+def tweets_to_frame(tweets: Iterable[Any]) -> pd.DataFrame:
+    """بارگذاری ستون‌های فیلترینگ یک دسته توییت (ORM یا سطر سبک) در DataFrame"""
+    # یک بار خواندن ویژگی‌ها برای هر توییت و سپس جابه‌جایی سطرها به ستون‌ها
+    getter = operator.attrgetter(*FILTER_COLUMNS)
+    columns = list(zip(*(getter(tweet) for tweet in tweets))) or [()] * len(FILTER_COLUMNS)
+    
+    frame = pd.DataFrame({"language": pd.Series(columns[0], dtype=object)})
+    for column, values in zip(ENGAGEMENT_COLUMNS, columns[1:]):
+        frame[column] = np.array([value or 0 for value in values], dtype=np.int64)
+    return frame
+
 
 class BaseFilter(ABC):
     """کلاس پایه برای فیلترها"""
@@ -21,6 +45,24 @@ class BaseFilter(ABC):
     def apply(self, tweet: Tweet) -> bool:
         """اعمال فیلتر روی توییت و برگرداندن نتیجه"""
         pass
+    
+    def mask(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        """اعمال فیلتر روی دسته‌ای از توییت‌ها در قالب ستونی
+        
+        Returns:
+            Optional[np.ndarray]: ماسک بولی سطرهای قبول‌شده، یا None اگر فیلتر
+            حالت ستونی ندارد و باید روی تک‌تک توییت‌ها اجرا شود
+        """
+        return None
+
+    def to_sql(self) -> Optional[ColumnElement]:
+        """ترجمه فیلتر به شرط where روی جدول توییت‌ها
+        
+        Returns:
+            Optional[ColumnElement]: شرط SQLAlchemy معادل apply، یا None اگر فیلتر
+            قابل انتقال به دیتابیس نیست و باید در پایتون اجرا شود
+        """
+        return None
 
 
 class LanguageFilter(BaseFilter):
@@ -40,28 +82,54 @@ class LanguageFilter(BaseFilter):
             return True
         
         return tweet.language in self.allowed_languages
+    
+    def mask(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        """ماسک توییت‌های با زبان مجاز یا بدون زبان"""
+        if not self.allowed_languages:
+            return np.ones(len(frame), dtype=bool)
+        
+        language = frame["language"]
+        return (language.isna() | (language == "") | language.isin(self.allowed_languages)).to_numpy()
+    
+    def to_sql(self) -> Optional[ColumnElement]:
+        """شرط زبان مجاز یا بدون زبان"""
+        if not self.allowed_languages:
+            return true()
+        
+        return or_(
+            Tweet.language.is_(None),
+            Tweet.language == "",
+            Tweet.language.in_(sorted(self.allowed_languages))
+        )
 
 
 class KeywordFilter(BaseFilter):
-    """فیلتر بر اساس کلید واژه‌ها"""
+    """فیلتر بر اساس کلید واژه‌ها
+    
+    کلیدواژه‌های اجباری و ممنوع در یک تطبیق‌دهنده مشترک قرار می‌گیرند و متن
+    هر توییت فقط یک بار پیمایش می‌شود.
+    """
     
     def __init__(self, include_keywords: List[str], exclude_keywords: List[str] = None):
-        self.include_patterns = [re.compile(r'\b' + re.escape(kw) + r'\b', re.IGNORECASE) for kw in include_keywords]
-        self.exclude_patterns = [re.compile(r'\b' + re.escape(kw) + r'\b', re.IGNORECASE) for kw in (exclude_keywords or [])]
+        self.include_keywords = set(include_keywords)
+        self.exclude_keywords = set(exclude_keywords or [])
+        self.matcher = KeywordMatcher(self.include_keywords | self.exclude_keywords)
+    
+    def matches(self, tweet: Tweet) -> Set[str]:
+        """کلیدواژه‌های (اجباری یا ممنوع) موجود در متن توییت"""
+        return self.matcher.find(tweet.text)
     
     def apply(self, tweet: Tweet) -> bool:
         """بررسی می‌کند که آیا توییت شامل کلیدواژه‌های مورد نظر است"""
-        text = tweet.text.lower()
+        found = self.matches(tweet)
         
         # بررسی کلیدواژه‌های اجباری
-        if self.include_patterns:
-            if not any(pattern.search(text) for pattern in self.include_patterns):
-                return False
+        if self.include_keywords and not found & self.include_keywords:
+            return False
         
         # بررسی کلیدواژه‌های ممنوع
-        if self.exclude_patterns:
-            if any(pattern.search(text) for pattern in self.exclude_patterns):
-                return False
+        if found & self.exclude_keywords:
+            return False
         
         return True
 
@@ -85,53 +153,264 @@ class EngagementFilter(BaseFilter):
     
     def apply(self, tweet: Tweet) -> bool:
         """بررسی می‌کند که آیا توییت حداقل تعامل مورد نیاز را دارد"""
+        # تعداد خالی (NULL) مانند mask و to_sql صفر در نظر گرفته می‌شود
+        likes = tweet.like_count or 0
+        retweets = tweet.retweet_count or 0
+        replies = tweet.reply_count or 0
+        quotes = tweet.quote_count or 0
+        
         # بررسی حداقل مقادیر جداگانه
-        if tweet.like_count < self.min_likes:
+        if likes < self.min_likes:
             return False
         
-        if tweet.retweet_count < self.min_retweets:
+        if retweets < self.min_retweets:
             return False
         
-        if tweet.reply_count < self.min_replies:
+        if replies < self.min_replies:
             return False
         
-        if tweet.quote_count < self.min_quotes:
+        if quotes < self.min_quotes:
             return False
         
         # بررسی حداقل مجموع تعاملات
-        total_engagement = tweet.like_count + tweet.retweet_count + tweet.reply_count + tweet.quote_count
+        total_engagement = likes + retweets + replies + quotes
         if total_engagement < self.min_total:
             return False
         
         return True
 
+    def mask(self, frame: pd.DataFrame) -> Optional[np.ndarray]:
+        """ماسک توییت‌هایی که حداقل تعامل مورد نیاز را دارند"""
+        likes = frame["like_count"].to_numpy()
+        retweets = frame["retweet_count"].to_numpy()
+        replies = frame["reply_count"].to_numpy()
+        quotes = frame["quote_count"].to_numpy()
+        
+        return (
+            (likes >= self.min_likes)
+            & (retweets >= self.min_retweets)
+            & (replies >= self.min_replies)
+            & (quotes >= self.min_quotes)
+            & (likes + retweets + replies + quotes >= self.min_total)
+        )
+
+    def to_sql(self) -> Optional[ColumnElement]:
+        """شرط حداقل تعامل (فقط حداقل‌های غیرصفر به کوئری اضافه می‌شوند)"""
+        counts = {
+            Tweet.like_count: self.min_likes,
+            Tweet.retweet_count: self.min_retweets,
+            Tweet.reply_count: self.min_replies,
+            Tweet.quote_count: self.min_quotes,
+        }
+        conditions = [func.coalesce(column, 0) >= minimum for column, minimum in counts.items() if minimum > 0]
+        
+        if self.min_total > 0:
+            like, retweet, reply, quote = (func.coalesce(column, 0) for column in counts)
+            conditions.append(like + retweet + reply + quote >= self.min_total)
+        
+        return and_(*conditions) if conditions else true()
+
+
+class FilterStats:
+    """آمار اجرای یک فیلتر: تعداد ارزیابی، تعداد قبول و زمان صرف‌شده"""
+    
+    __slots__ = ("calls", "passed", "seconds")
+    
+    def __init__(self) -> None:
+        self.calls = 0
+        self.passed = 0
+        self.seconds = 0.0
+    
+    def record(self, calls: int, passed: int, seconds: float) -> None:
+        self.calls += calls
+        self.passed += passed
+        self.seconds += seconds
+    
+    @property
+    def pass_rate(self) -> float:
+        return self.passed / self.calls if self.calls else 1.0
+    
+    @property
+    def avg_cost(self) -> float:
+        """میانگین زمان هر ارزیابی (ثانیه)"""
+        return self.seconds / self.calls if self.calls else 0.0
+    
+    @property
+    def rank(self) -> float:
+        """هزینه به ازای هر توییت ردشده؛ فیلتر با رتبه کمتر زودتر اجرا می‌شود
+        
+        فیلتر بدون آمار رتبه صفر دارد تا به ابتدا منتقل و اندازه‌گیری شود.
+        """
+        if not self.calls:
+            return 0.0
+        return self.avg_cost / max(1.0 - self.pass_rate, 1e-6)
+
 
 class FilterPipeline:
-    """خط لوله فیلترینگ توییت‌ها"""
+    """خط لوله فیلترینگ توییت‌ها
+    
+    نرخ قبول و هزینه هر فیلتر در زمان اجرا اندازه‌گیری می‌شود و پس از هر
+    reorder_interval ارزیابی، فیلترها به ترتیب هزینه به ازای هر رد (cost / (1 - pass_rate))
+    مرتب می‌شوند تا هزینه مورد انتظار کمینه شود. فیلترهای ثابت‌شده (pinned) جای
+    خود را حفظ می‌کنند و فقط فیلترهای بین آن‌ها جابه‌جا می‌شوند.
+    """
     
-    def __init__(self, filters: Optional[List[BaseFilter]] = None):
+    def __init__(self, filters: Optional[List[BaseFilter]] = None, reorder_interval: int = 1000):
         self.filters = filters or []
+        self.reorder_interval = reorder_interval
+        self.pinned: Set[BaseFilter] = set()
+        self.stats: Dict[BaseFilter, FilterStats] = {}
+        self._evaluations = 0
     
-    def add_filter(self, filter_obj: BaseFilter) -> None:
-        """افزودن یک فیلتر به خط لوله"""
+    def add_filter(self, filter_obj: BaseFilter, pinned: bool = False) -> None:
+        """افزودن یک فیلتر به خط لوله (فیلتر pinned جابه‌جا نمی‌شود)"""
         self.filters.append(filter_obj)
+        if pinned:
+            self.pinned.add(filter_obj)
+    
+    def _stats_for(self, filter_obj: BaseFilter) -> FilterStats:
+        stats = self.stats.get(filter_obj)
+        if stats is None:
+            stats = self.stats[filter_obj] = FilterStats()
+        return stats
+    
+    def _count_evaluations(self, count: int) -> None:
+        """شمارش ارزیابی‌ها و مرتب‌سازی مجدد در پایان هر بازه"""
+        before = self._evaluations
+        self._evaluations += count
+        if self.reorder_interval and before // self.reorder_interval != self._evaluations // self.reorder_interval:
+            self.reorder()
+    
+    def _apply_filters(self, tweet: Tweet, filters: List[BaseFilter]) -> bool:
+        """اعمال فیلترها به ترتیب روی یک توییت با ثبت آمار"""
+        for filter_obj in filters:
+            start_time = time.perf_counter()
+            try:
+                passed = filter_obj.apply(tweet)
+            except Exception as e:
+                logger.error(f"Error applying filter {filter_obj.__class__.__name__}: {str(e)}")
+                # در صورت خطا در فیلتر، به صورت پیش‌فرض توییت را قبول می‌کنیم
+                continue
+        
+            self._stats_for(filter_obj).record(1, int(bool(passed)), time.perf_counter() - start_time)
+            if not passed:
+                return False
+        
+        return True
     
     def apply_all(self, tweet: Tweet) -> bool:
         """اعمال تمام فیلترها روی یک توییت"""
+        result = self._apply_filters(tweet, self.filters)
+        self._count_evaluations(1)
+        return result
+    
+    def reorder(self) -> None:
+        """مرتب‌سازی فیلترهای غیرثابت بر اساس آمار اندازه‌گیری‌شده"""
+        order: List[BaseFilter] = []
+        segment: List[BaseFilter] = []
+        
+        for filter_obj in self.filters + [None]:
+            if filter_obj is None or filter_obj in self.pinned:
+                order.extend(sorted(segment, key=lambda item: self._stats_for(item).rank))
+                segment = []
+                if filter_obj is not None:
+                    order.append(filter_obj)
+            else:
+                segment.append(filter_obj)
+        
+        if order != self.filters:
+            self.filters = order
+            logger.info(f"Reordered filters: {', '.join(filter_obj.__class__.__name__ for filter_obj in order)}")
+    
+    def report(self) -> List[Dict[str, Any]]:
+        """ترتیب فعلی فیلترها به همراه آمار هر کدام"""
+        report = []
+        for position, filter_obj in enumerate(self.filters):
+            stats = self._stats_for(filter_obj)
+            report.append({
+                "position": position,
+                "filter": filter_obj.__class__.__name__,
+                "pinned": filter_obj in self.pinned,
+                "calls": stats.calls,
+                "pass_rate": round(stats.pass_rate, 4),
+                "avg_cost_us": round(stats.avg_cost * 1e6, 3),
+                "rank": stats.rank,
+            })
+        return report
+    
+    def mask(self, frame: pd.DataFrame) -> Tuple[np.ndarray, List[BaseFilter]]:
+        """اعمال فیلترهای ستونی روی یک DataFrame
+        
+        Returns:
+            ماسک ترکیبی (AND) فیلترهای ستونی و فیلترهایی که حالت ستونی ندارند
+        """
+        combined = np.ones(len(frame), dtype=bool)
+        remaining: List[BaseFilter] = []
+        
         for filter_obj in self.filters:
+            start_time = time.perf_counter()
             try:
-                if not filter_obj.apply(tweet):
-                    return False
+                filter_mask = filter_obj.mask(frame)
             except Exception as e:
                 logger.error(f"Error applying filter {filter_obj.__class__.__name__}: {str(e)}")
-                # در صورت خطا در فیلتر، به صورت پیش‌فرض توییت را قبول می‌کنیم
+                # در صورت خطا در فیلتر، به صورت پیش‌فرض توییت‌ها را قبول می‌کنیم
                 continue
+            
+            if filter_mask is None:
+                remaining.append(filter_obj)
+            else:
+                self._stats_for(filter_obj).record(
+                    len(frame), int(filter_mask.sum()), time.perf_counter() - start_time
+                )
+                combined &= filter_mask
         
-        return True
+        return combined, remaining
+    
+    def to_sql(self) -> Tuple[Optional[ColumnElement], List[BaseFilter]]:
+        """ترجمه فیلترهای قابل انتقال به یک شرط where
+        
+        Returns:
+            شرط ترکیبی (AND) فیلترهای قابل انتقال (یا None) و فیلترهایی که باید
+            در پایتون اجرا شوند
+        """
+        conditions = []
+        remaining: List[BaseFilter] = []
+        
+        for filter_obj in self.filters:
+            condition = filter_obj.to_sql()
+            if condition is None:
+                remaining.append(filter_obj)
+            else:
+                conditions.append(condition)
+        
+        return (and_(*conditions) if conditions else None), remaining
+    
+    def apply_batch(self, tweets: List[Tweet]) -> List[bool]:
+        """اعمال تمام فیلترها روی یک دسته توییت
+        
+        فیلترهای ستونی یک بار روی کل دسته اجرا می‌شوند و سایر فیلترها فقط روی
+        توییت‌هایی که از فیلترهای ستونی عبور کرده‌اند.
+        """
+        if not tweets:
+            return []
+        
+        combined, remaining = self.mask(tweets_to_frame(tweets))
+        if remaining:
+            for index in np.flatnonzero(combined):
+                combined[index] = self._apply_filters(tweets[index], remaining)
+        
+        self._count_evaluations(len(tweets))
+        return combined.tolist()
     
     def filter_tweets(self, tweets: List[Tweet]) -> List[Tweet]:
         """فیلتر کردن لیستی از توییت‌ها"""
-        return [tweet for tweet in tweets if self.apply_all(tweet)]
+        return [tweet for tweet, passed in zip(tweets, self.apply_batch(tweets)) if passed]
+
+
+@lru_cache()
+def get_default_filter_pipeline() -> FilterPipeline:
+    """خط لوله فیلترینگ پایه مشترک؛ آمار و ترتیب فیلترها بین اجراها حفظ می‌شود"""
+    return create_basic_filter_pipeline()
 
 
 def create_basic_filter_pipeline() -> FilterPipeline:
@@ -0,0 +1,126 @@
+"""
+تشخیص محلی زبان توییت‌ها
+
+این ماژول زبان توییت‌هایی را که API زبانی برایشان برنگردانده، بدون فراخوانی
+شبکه تشخیص می‌دهد. ابتدا خط غالب متن (عربی یا لاتین) مشخص می‌شود. سپس در
+خط عربی، فارسی، عربی و اردو با وزن n-gramهای حرفی متمایزکننده هر زبان (حروف
+خاص، پیشوندها و پسوندها و کلمات پرتکرار) از هم جدا می‌شوند و در خط لاتین،
+انگلیسی با n-gramهای پرتکرار آن شناخته می‌شود. شمارش هر n-gram با str.count
+انجام می‌شود، بنابراین هزینه هر توییت چند میکروثانیه است.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+# زبان نامشخص یا خارج از زبان‌های پشتیبانی‌شده (همان کد Twitter API)
+UNDETERMINED = "und"
+
+# لینک‌ها، منشن‌ها و ارقام در تشخیص زبان شرکت نمی‌کنند
+_NOISE_PATTERN = re.compile(r"https?://\S+|www\.\S+|@\w+|\d+")
+_NON_WORD_PATTERN = re.compile(r"[\W_]+", re.UNICODE)
+_LETTER_PATTERN = re.compile(r"[^\W\d_]", re.UNICODE)
+_ARABIC_SCRIPT_PATTERN = re.compile(r"[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]")
+_LATIN_PATTERN = re.compile(r"[a-z]")
+# حروف لاتین زبان‌های دیگر (ترکی، آلمانی، فرانسوی، اسپانیایی و ...)
+_NON_ENGLISH_LATIN_PATTERN = re.compile(r"[à-ÿçğışœß]")
+
+# وزن n-gramهای هر زبان خط عربی؛ فاصله ابتدا و انتهای n-gram مرز کلمه است
+_ARABIC_SCRIPT_PROFILES: Dict[str, Dict[str, float]] = {
+    "fa": {
+        # حروف فارسی که در عربی نیستند و ی و ک فارسی
+        "پ": 3, "چ": 3, "ژ": 3, "گ": 3, "ی": 1, "ک": 0.5,
+        # پیشوند فعل (پس از تبدیل نیم‌فاصله به فاصله)، نشانه جمع و کلمات پرتکرار
+        " می ": 3, "های ": 3, " را ": 3, " است ": 3, " این ": 2, " که ": 2,
+        " از ": 2, " با ": 1, " برای ": 3, " به ": 1, " و ": 0.5, " هم ": 2,
+        " بود ": 2, " شد ": 2, " من ": 1, " ما ": 1, " خیلی ": 3,
+        # شناسه‌های فعل
+        "یم ": 1, "ید ": 1, "ند ": 1,
+    },
+    "ar": {
+        # تاء مربوطه، الف مقصوره، همزه روی الف و ی و ک عربی
+        "ة": 3, "ى ": 2, "أ": 2, "إ": 2, "ي": 1.5, "ك": 1.5,
+        # حرف تعریف و کلمات پرتکرار
+        " ال": 2, " في ": 3, " من ": 1, " على ": 3, " الى ": 3, " هذا ": 3, " هذه ": 3,
+        " التي ": 3, " الذي ": 3, " ان ": 1, " لا ": 1,
+        "ون ": 1,
+    },
+    "ur": {
+        # حروف خاص اردو و حروف مشترک با فارسی (با همان وزن، تا فقط موارد خاص تعیین‌کننده باشند)
+        "ٹ": 4, "ڈ": 4, "ڑ": 4, "ں": 3, "ے": 3, "ہ": 2, "ھ": 2,
+        "پ": 3, "چ": 3, "گ": 3, "ی": 1, "ک": 0.5,
+        # حروف اضافه و کلمات پرتکرار
+        " کے ": 3, " ہے ": 3, " میں ": 3, " کی ": 2, " کا ": 2, " اور ": 2,
+        " سے ": 2, " کو ": 2, " نے ": 3, " نہیں ": 3,
+    },
+}
+
+_ENGLISH_PROFILE: Dict[str, float] = {
+    " the ": 3, " and ": 3, " to ": 2, " of ": 2, " is ": 2, " in ": 1, " you ": 2,
+    " for ": 2, " that ": 2, " it ": 1, " this ": 2, " are ": 2, " with ": 2, " on ": 1,
+    " be ": 1, " was ": 2, " have ": 2, " not ": 2, " we ": 1, " my ": 1, " i ": 1,
+    "ing ": 1, "tion": 1, " th": 0.5, "ed ": 0.5, "ly ": 0.5,
+}
+
+
+class LanguageIdentifier:
+    """تشخیص‌دهنده سبک زبان برای fa، ar، ur و en
+    
+    Args:
+        min_letters: حداقل تعداد حروف برای تصمیم‌گیری
+        min_english_score: حداقل امتیاز انگلیسی به ازای هر کلمه متن لاتین
+    """
+    
+    def __init__(self, min_letters: int = 4, min_english_score: float = 0.15) -> None:
+        self.min_letters = min_letters
+        self.min_english_score = min_english_score
+        self._profiles = [(language, list(profile.items())) for language, profile in _ARABIC_SCRIPT_PROFILES.items()]
+        self._english = list(_ENGLISH_PROFILE.items())
+    
+    def scores(self, text: str) -> Dict[str, float]:
+        """امتیاز هر زبان خط عربی برای متن"""
+        padded = f" {text} "
+        return {
+            language: sum(weight * padded.count(ngram) for ngram, weight in profile)
+            for language, profile in self._profiles
+        }
+    
+    def detect(self, text: str) -> Optional[str]:
+        """تشخیص زبان متن
+        
+        Returns:
+            Optional[str]: کد زبان، UNDETERMINED برای متنی که به زبان‌های
+            پشتیبانی‌شده نیست، یا None وقتی شواهد کافی وجود ندارد
+        """
+        cleaned = _NON_WORD_PATTERN.sub(" ", _NOISE_PATTERN.sub(" ", (text or "").lower())).strip()
+        letters = len(_LETTER_PATTERN.findall(cleaned))
+        if letters < self.min_letters:
+            return None
+        
+        arabic = len(_ARABIC_SCRIPT_PATTERN.findall(cleaned))
+        latin = len(_LATIN_PATTERN.findall(cleaned))
+        
+        if arabic >= latin and arabic * 2 >= letters:
+            scores = self.scores(cleaned)
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            if scores[ranked[0]] <= 0 or scores[ranked[0]] == scores[ranked[1]]:
+                return None
+            return ranked[0]
+        
+        if latin * 2 >= letters:
+            if _NON_ENGLISH_LATIN_PATTERN.search(cleaned):
+                return UNDETERMINED
+            
+            padded = f" {cleaned} "
+            words = cleaned.count(" ") + 1
+            score = sum(weight * padded.count(ngram) for ngram, weight in self._english)
+            if score / words >= self.min_english_score:
+                return "en"
+            # متن کوتاه لاتین بدون شواهد کافی (مثلاً فینگلیش) رد نمی‌شود
+            return UNDETERMINED if words >= 4 else None
+        
+        # خطوط دیگر (سیریلیک، CJK، عبری و ...)
+        return UNDETERMINED
+    
+    def detect_many(self, texts: Iterable[str]) -> List[Optional[str]]:
+        """تشخیص زبان دسته‌ای از متن‌ها"""
+        return [self.detect(text) for text in texts]
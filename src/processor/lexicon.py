@@ -0,0 +1,182 @@
+"""
+تحلیل احساسات محلی مبتنی بر واژه‌نامه
+
+این ماژول یک امتیازدهنده احساسات سبک برای متن فارسی و انگلیسی پیاده‌سازی
+می‌کند که بدون فراخوانی API، موارد ساده را تشخیص می‌دهد: توییت‌های فقط
+ایموجی، اسپم آشکار و متن‌هایی با واژه‌های قطبی قوی. خروجی همان
+SentimentAnalysisResult کلاینت تحلیل متن است و میزان اطمینان آن تعیین می‌کند
+که آیا به تحلیل LLM نیاز است یا نه.
+"""
+
+import re
+from typing import Iterable, List, Set, Tuple
+
+from src.api.interfaces import SentimentAnalysisResult
+from src.processor.normalizer import normalize_persian, tokenize
+
+# با تغییر واژه‌نامه یا قواعد امتیازدهی باید افزایش یابد (در processed_by ثبت می‌شود)
+LEXICON_VERSION = "1"
+
+_POSITIVE_WORDS = (
+    # فارسی
+    "خوب", "خوبه", "عالی", "عالیه", "فوق العاده", "زیبا", "قشنگ", "خوشحال", "شاد", "شادی",
+    "ممنون", "مرسی", "سپاس", "تشکر", "متشکرم", "دوست دارم", "عاشق", "عشق", "موفق", "موفقیت",
+    "پیروزی", "بهترین", "لذت", "امید", "امیدوار", "افتخار", "تبریک", "مبارک", "آفرین", "دمت گرم",
+    "خوشمزه", "محشر", "بی نظیر", "شگفت انگیز", "راضی",
+    # انگلیسی
+    "good", "great", "excellent", "love", "loved", "happy", "awesome", "best", "thanks", "thank you",
+    "amazing", "beautiful", "wonderful", "win", "congrats", "congratulations", "perfect", "nice",
+    "glad", "proud", "fantastic",
+)
+
+_NEGATIVE_WORDS = (
+    # فارسی
+    "بد", "بده", "افتضاح", "زشت", "غمگین", "ناراحت", "متنفر", "نفرت", "شکست", "فاجعه", "ظلم",
+    "دروغ", "دروغگو", "فساد", "بدترین", "خشم", "عصبانی", "ترس", "وحشتناک", "مزخرف", "حیف",
+    "تاسف", "متاسفم", "غم", "درد", "بیزار", "کثیف", "شرم", "خیانت", "نابود", "بیچاره",
+    # انگلیسی
+    "bad", "terrible", "awful", "hate", "hated", "sad", "worst", "angry", "fail", "failed",
+    "disaster", "corrupt", "liar", "lie", "ugly", "horrible", "disgusting", "shame", "sucks",
+    "pathetic", "useless",
+)
+
+# واژه‌های نفی؛ قطبیت واژه‌های نزدیک را برعکس می‌کنند
+_NEGATORS = (
+    "نه", "نیست", "نبود", "نیستم", "نمی", "نخواهد", "هیچ", "اصلا", "بدون",
+    "not", "no", "never", "dont", "don't", "isnt", "isn't", "wasnt", "wasn't", "without",
+)
+
+_POSITIVE_EMOJI = "😀😃😄😁😊🙂😍🥰😘😻❤💕💖💯👍👏🙌🎉🥳🌹💐🙏✨😂🤩"
+_NEGATIVE_EMOJI = "😢😭😡😠👎💔😞😔🤬😤😒😩😫🤮😱☹🙁"
+
+_HASHTAG_PATTERN = re.compile(r"#\w+", re.UNICODE)
+_MENTION_PATTERN = re.compile(r"@\w+", re.UNICODE)
+_URL_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
+
+# فاصله (تعداد توکن) که واژه نفی در آن روی واژه قطبی اثر می‌گذارد
+_NEGATION_WINDOW = 2
+
+
+def _normalized_phrases(words: Iterable[str]) -> Set[Tuple[str, ...]]:
+    """نرمال‌سازی واژه‌ها و عبارت‌های واژه‌نامه به صورت تاپل توکن‌ها"""
+    return {tuple(tokenize(word)) for word in words if tokenize(word)}
+
+
+class LexiconSentimentScorer:
+    """امتیازدهنده احساسات مبتنی بر واژه‌نامه و ایموجی"""
+    
+    def __init__(
+        self,
+        positive_words: Iterable[str] = _POSITIVE_WORDS,
+        negative_words: Iterable[str] = _NEGATIVE_WORDS,
+        negators: Iterable[str] = _NEGATORS
+    ) -> None:
+        self.positive = _normalized_phrases(positive_words)
+        self.negative = _normalized_phrases(negative_words)
+        self.negators = {token for word in negators for token in tokenize(word)}
+        self.max_phrase_length = max(len(phrase) for phrase in self.positive | self.negative)
+    
+    @property
+    def name(self) -> str:
+        """نام و نسخه امتیازدهنده برای ثبت در processed_by"""
+        return f"lexicon-v{LEXICON_VERSION}"
+    
+    @staticmethod
+    def _label(positive: int, negative: int) -> str:
+        """برچسب احساس بر اساس قطب غالب"""
+        if positive > negative:
+            return "positive"
+        if negative > positive:
+            return "negative"
+        return "neutral"
+    
+    def _is_spam(self, text: str, tokens: List[str]) -> bool:
+        """تشخیص اسپم آشکار (انبوه هشتگ، لینک یا منشن و تکرار زیاد)"""
+        if len(_HASHTAG_PATTERN.findall(text)) >= 6:
+            return True
+        if len(_URL_PATTERN.findall(text)) >= 3 or len(_MENTION_PATTERN.findall(text)) >= 8:
+            return True
+        return len(tokens) >= 12 and len(set(tokens)) / len(tokens) < 0.3
+    
+    def _lexicon_hits(self, tokens: List[str]) -> Tuple[int, int, List[str]]:
+        """شمارش واژه‌های مثبت و منفی با در نظر گرفتن نفی"""
+        positive, negative, matched = 0, 0, []
+        index = 0
+        
+        while index < len(tokens):
+            for length in range(min(self.max_phrase_length, len(tokens) - index), 0, -1):
+                phrase = tuple(tokens[index:index + length])
+                polarity = 1 if phrase in self.positive else -1 if phrase in self.negative else 0
+                if not polarity:
+                    continue
+                
+                window = tokens[max(0, index - _NEGATION_WINDOW):index] + \
+                    tokens[index + length:index + length + _NEGATION_WINDOW]
+                if any(token in self.negators for token in window):
+                    polarity = -polarity
+                
+                if polarity > 0:
+                    positive += 1
+                else:
+                    negative += 1
+                matched.append(" ".join(phrase))
+                index += length - 1
+                break
+            index += 1
+        
+        return positive, negative, matched
+    
+    def score(self, text: str) -> SentimentAnalysisResult:
+        """امتیازدهی احساسات متن
+        
+        اطمینان بالا فقط برای موارد آشکار برگردانده می‌شود؛ متن بدون واژه قطبی
+        یا با واژه‌های متناقض اطمینان پایینی دارد و باید به LLM سپرده شود.
+        """
+        # ایموجی‌ها در توکن‌ها حذف می‌شوند و جداگانه شمرده می‌شوند
+        positive_emoji = sum(text.count(emoji) for emoji in _POSITIVE_EMOJI)
+        negative_emoji = sum(text.count(emoji) for emoji in _NEGATIVE_EMOJI)
+        
+        words_text = _URL_PATTERN.sub(" ", _MENTION_PATTERN.sub(" ", text))
+        tokens = tokenize(words_text)
+        
+        if self._is_spam(text, tokens):
+            return SentimentAnalysisResult(
+                sentiment="neutral",
+                confidence=0.9,
+                text_snippet=normalize_persian(text)[:100],
+                justification="spam-like content"
+            )
+        
+        if not tokens and (positive_emoji or negative_emoji):
+            # توییت فقط ایموجی
+            emoji_total = positive_emoji + negative_emoji
+            margin = abs(positive_emoji - negative_emoji) / emoji_total
+            return SentimentAnalysisResult(
+                sentiment=self._label(positive_emoji, negative_emoji),
+                confidence=round(0.6 + 0.35 * margin, 3),
+                text_snippet=text.strip()[:100],
+                justification="emoji-only text"
+            )
+        
+        positive, negative, matched = self._lexicon_hits(tokens)
+        positive += positive_emoji
+        negative += negative_emoji
+        total = positive + negative
+        
+        if not total:
+            return SentimentAnalysisResult(
+                sentiment="neutral",
+                confidence=0.3,
+                text_snippet=" ".join(tokens[:10]),
+                justification="no lexicon hits"
+            )
+        
+        # اطمینان با غلبه یک قطب و تعداد شواهد افزایش می‌یابد
+        margin = abs(positive - negative) / total
+        strength = min(total / 3, 1.0)
+        return SentimentAnalysisResult(
+            sentiment=self._label(positive, negative),
+            confidence=round(0.4 + 0.55 * margin * strength, 3),
+            text_snippet=" ".join(matched[:5]) or text.strip()[:100],
+            justification=f"lexicon hits: {positive} positive, {negative} negative"
+        )
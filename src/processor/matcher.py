@@ -0,0 +1,88 @@
+"""
+تطبیق هم‌زمان چند کلیدواژه
+
+این ماژول مجموعه‌ای از کلیدواژه‌ها و عبارت‌ها را به یک درخت پیشوندی (trie) روی
+توکن‌های متن نرمال‌شده تبدیل می‌کند. متن یک بار توکن‌بندی و یک بار پیمایش
+می‌شود، بنابراین هزینه تطبیق به طول متن و طول بلندترین عبارت بستگی دارد و نه
+به تعداد کلیدواژه‌ها. مرز کلمه همان مرز توکن‌های نرمال‌ساز فارسی است، پس
+نیم‌فاصله، حروف عربی معادل و اعراب مانع تطبیق نمی‌شوند.
+
+علامت # و @ هشتگ‌ها و منشن‌ها در توکن باقی می‌ماند: کلیدواژه #foo فقط با
+هشتگ #foo تطبیق دارد، ولی کلیدواژه foo هم با foo و هم با #foo و @foo.
+"""
+
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from src.processor.normalizer import tokenize
+
+# کلید انتهای عبارت در گره‌های درخت (توکن‌ها هیچ‌وقت None نیستند)
+_END = None
+
+_SIGILS = ("#", "@")
+
+
+def _forms(token: str) -> Tuple[str, ...]:
+    """شکل‌های قابل تطبیق یک توکن متن: خود توکن و برای هشتگ و منشن، کلمه بدون علامت"""
+    return (token, token[1:]) if token.startswith(_SIGILS) else (token,)
+
+
+class KeywordMatcher:
+    """تطبیق‌دهنده چند کلیدواژه در یک گذر روی متن"""
+    
+    def __init__(self, keywords: Iterable[str] = ()) -> None:
+        self._root: Dict[Any, Any] = {}
+        self._size = 0
+        self.max_phrase_length = 0
+        
+        for keyword in keywords:
+            self.add(keyword)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, keyword: str) -> None:
+        """افزودن یک کلیدواژه یا عبارت چندکلمه‌ای"""
+        tokens = tokenize(keyword, keep_sigils=True)
+        if not tokens:
+            return
+        
+        node = self._root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        
+        # کلیدواژه‌های متفاوتی ممکن است به یک توکن نرمال‌شده برسند
+        originals = node.setdefault(_END, [])
+        if keyword not in originals:
+            originals.append(keyword)
+            self._size += 1
+        self.max_phrase_length = max(self.max_phrase_length, len(tokens))
+    
+    def find_tokens(self, tokens: List[str]) -> Set[str]:
+        """کلیدواژه‌هایی که در توکن‌های داده‌شده آمده‌اند"""
+        found: Set[str] = set()
+        forms = [_forms(token) for token in tokens]
+        
+        for start in range(len(tokens)):
+            # هر توکن هشتگ یا منشن می‌تواند دو مسیر در درخت داشته باشد
+            nodes = [child for form in forms[start] if (child := self._root.get(form)) is not None]
+            index = start + 1
+            while nodes:
+                for node in nodes:
+                    if _END in node:
+                        found.update(node[_END])
+                if index == len(tokens):
+                    break
+                nodes = [child for node in nodes for form in forms[index] if (child := node.get(form)) is not None]
+                index += 1
+        
+        return found
+    
+    def find(self, text: str) -> Set[str]:
+        """کلیدواژه‌هایی که در متن آمده‌اند (به همان شکلی که افزوده شده‌اند)"""
+        if not self._size or not text:
+            return set()
+        return self.find_tokens(tokenize(text, keep_sigils=True))
+    
+    def search(self, text: str) -> bool:
+        """آیا حداقل یکی از کلیدواژه‌ها در متن آمده است"""
+        return bool(self.find(text))
@@ -0,0 +1,56 @@
+"""
+نرمال‌سازی متن فارسی
+
+این ماژول متن فارسی را برای جستجو و تطبیق یکسان‌سازی می‌کند: حروف عربی
+معادل (ی، ک، ه، الف)، نیم‌فاصله، اعراب و ارقام فارسی/عربی.
+"""
+
+import re
+from typing import List
+
+# حروف عربی و معادل فارسی آن‌ها
+_CHARACTER_MAP = {
+    "\u064a": "\u06cc",  # ي -> ی
+    "\u0649": "\u06cc",  # ى -> ی
+    "\u0643": "\u06a9",  # ك -> ک
+    "\u0629": "\u0647",  # ة -> ه
+    "\u06c0": "\u0647",  # ۀ -> ه
+    "\u0623": "\u0627",  # أ -> ا
+    "\u0625": "\u0627",  # إ -> ا
+    "\u0622": "\u0627",  # آ -> ا
+    "\u0671": "\u0627",  # ٱ -> ا
+    "\u0624": "\u0648",  # ؤ -> و
+    "\u200c": " ",  # نیم‌فاصله -> فاصله
+    "\u200d": "",  # اتصال‌دهنده صفر-پهنا
+    "\u0640": "",  # کشیده (تطویل)
+}
+
+# ارقام فارسی و عربی -> ارقام لاتین
+_CHARACTER_MAP.update({chr(0x06F0 + digit): str(digit) for digit in range(10)})
+_CHARACTER_MAP.update({chr(0x0660 + digit): str(digit) for digit in range(10)})
+
+# اعراب (فتحه، ضمه، کسره، تنوین، تشدید، سکون و ...) حذف می‌شوند
+_CHARACTER_MAP.update({chr(code): "" for code in range(0x064B, 0x0660)})
+_CHARACTER_MAP["\u0670"] = ""
+
+_TRANSLATION_TABLE = str.maketrans(_CHARACTER_MAP)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# هشتگ و منشن (# یا @ در ابتدای کلمه) همراه با علامتشان
+_SIGIL_TOKEN_PATTERN = re.compile(r"(?<!\w)[#@]\w+|\w+", re.UNICODE)
+_SPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_persian(text: str) -> str:
+    """نرمال‌سازی متن فارسی برای جستجو"""
+    if not text:
+        return ""
+    
+    normalized = text.translate(_TRANSLATION_TABLE).lower()
+    return _SPACE_PATTERN.sub(" ", normalized).strip()
+
+
+def tokenize(text: str, keep_sigils: bool = False) -> List[str]:
+    """تقسیم متن نرمال‌شده به توکن‌ها؛ با keep_sigils علامت # و @ هشتگ‌ها و منشن‌ها حفظ می‌شود"""
+    pattern = _SIGIL_TOKEN_PATTERN if keep_sigils else _TOKEN_PATTERN
+    return pattern.findall(normalize_persian(text))
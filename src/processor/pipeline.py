@@ -4,16 +4,29 @@
 این ماژول خط لوله پردازش داده را تعریف می‌کند.
 """
 
+import asyncio
 import logging
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar
 
+from sqlalchemy import and_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 
-from src.data.database import get_db_session
-from src.data.models import Tweet
-from src.data.repositories import TweetRepository
-from src.processor.filters import FilterPipeline, create_basic_filter_pipeline
+from src.api.anthropic import get_anthropic_client
+from src.api.interfaces import TextAnalysisClient, TextAnalysisRequest
+from src.config.settings import settings
+from src.data.database import get_db_session, get_read_session
+from src.data.models import ProcessingJob, Tweet
+from src.data.repositories import (AnalysisRepository, ProcessingJobRepository,
+                                   ProcessingStateRepository, TweetRepository)
+from src.processor.dedup import NearDuplicateIndex, get_near_duplicate_index
+from src.processor.filters import FilterPipeline, get_default_filter_pipeline
+from src.processor.langid import LanguageIdentifier
+from src.processor.lexicon import LexiconSentimentScorer
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +45,48 @@ class ProcessorStep(ABC):
         """
         pass
 
+    async def process_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """پردازش دسته‌ای توییت‌ها
+        
+        پیاده‌سازی پیش‌فرض process را برای تک‌تک توییت‌ها فراخوانی می‌کند؛ مراحلی
+        که از پردازش دسته‌ای سود می‌برند (پرامپت دسته‌ای LLM، فیلتر برداری یا
+        جستجوی دسته‌ای دیتابیس) آن را بازنویسی می‌کنند.
+        
+        Returns:
+            List[Tuple[bool, Dict[str, Any]]]: نتیجه هر توییت به ترتیب ورودی
+        """
+        results = []
+        for tweet, context in zip(tweets, contexts):
+            results.append(await self._process_one(tweet, context))
+        return results
+    
+    async def _process_one(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """پردازش یک توییت؛ خطا فقط همان توییت را متوقف می‌کند"""
+        try:
+            return await self.process(tweet, context)
+        except Exception as e:
+            return self._fail(tweet, context, e)
+    
+    def _fail(self, tweet: Tweet, context: Dict[str, Any], error: Exception) -> Tuple[bool, Dict[str, Any]]:
+        """ثبت خطای پردازش توییت در بافت"""
+        logger.error(f"Error processing tweet {tweet.id} at step {self.__class__.__name__}: {str(error)}")
+        context["error"] = f"{self.__class__.__name__}: {str(error)}"
+        return False, context
+    
+    async def flush(self) -> None:
+        """نوشتن نتایج بافرشده مرحله؛ پس از پردازش هر دسته فراخوانی می‌شود"""
+        pass
+
 
 class FilterStep(ProcessorStep):
     """مرحله فیلترینگ"""
     
     def __init__(self, filter_pipeline: Optional[FilterPipeline] = None):
-        self.filter_pipeline = filter_pipeline or create_basic_filter_pipeline()
+        self.filter_pipeline = filter_pipeline or get_default_filter_pipeline()
     
     async def process(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
         """فیلتر کردن توییت"""
@@ -48,6 +97,332 @@ class FilterStep(ProcessorStep):
         else:
             # توییت فیلترها را نگذراند، از پردازش خارج می‌شویم
             return False, context
+    
+    async def process_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """فیلتر کردن دسته در حالت ستونی"""
+        return list(zip(self.filter_pipeline.apply_batch(tweets), contexts))
+
+
+class LanguageDetectionStep(ProcessorStep):
+    """مرحله تشخیص محلی زبان توییت‌های بدون زبان
+    
+    زبان توییت‌هایی که language آن‌ها خالی است با تشخیص‌دهنده n-gram محلی
+    تعیین و به صورت دسته‌ای در دیتابیس ثبت می‌شود تا فیلتر زبان در مراحل بعد
+    (و در اجراهای بعدی) روی آن‌ها اعمال شود. این مرحله توییتی را متوقف نمی‌کند.
+    """
+    
+    def __init__(self, identifier: Optional[LanguageIdentifier] = None):
+        self.identifier = identifier or LanguageIdentifier()
+        self._pending: Dict[uuid.UUID, str] = {}
+    
+    def _detect(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        if not tweet.language:
+            language = self.identifier.detect(tweet.text)
+            if language:
+                tweet.language = language
+                self._pending[tweet.id] = language
+                context["detected_language"] = language
+        return True, context
+    
+    async def process(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """تشخیص زبان توییت در صورت خالی بودن"""
+        return self._detect(tweet, context)
+    
+    async def process_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """تشخیص زبان دسته بدون سربار فراخوانی ناهم‌زمان به ازای هر توییت"""
+        return [self._detect(tweet, context) for tweet, context in zip(tweets, contexts)]
+    
+    async def flush(self) -> None:
+        """ذخیره دسته‌ای زبان‌های تشخیص‌داده‌شده"""
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, {}
+        async with get_db_session() as session:
+            await TweetRepository(session).set_languages(pending)
+        logger.debug(f"Stored detected language for {len(pending)} tweets")
+
+
+class NearDuplicateStep(ProcessorStep):
+    """مرحله تشخیص توییت‌های تقریباً تکراری
+    
+    هر توییت با شاخص MinHash LSH مشترک پردازه به یک خوشه نسبت داده می‌شود و
+    شناسه نماینده خوشه در cluster_id توییت ثبت می‌شود. در حالت پیش‌فرض نسخه
+    تکراری فقط وقتی فیلتر می‌شود که همه تحلیل‌های analysis_types برای نماینده
+    ذخیره شده باشد و نتیجه از طریق cluster_id از نماینده خوانده شود؛ تا آن زمان
+    (مثلاً نماینده در همین دسته است یا تحلیلش شکست خورده) نسخه تکراری خودش
+    تحلیل می‌شود. شاخص در حافظه هر پردازه است، پس کارگرهای پردازه‌های جداگانه
+    نسخه‌های تکراری یکدیگر را نمی‌شناسند و هر کدام جداگانه تحلیل می‌کنند.
+    """
+    
+    def __init__(
+        self,
+        index: Optional[NearDuplicateIndex] = None,
+        skip_duplicates: bool = True,
+        analysis_types: Optional[List[str]] = None
+    ):
+        self.index = index if index is not None else get_near_duplicate_index()
+        self.skip_duplicates = skip_duplicates
+        self.analysis_types = list(settings.processor.analysis_types if analysis_types is None else analysis_types)
+        self._pending: Dict[uuid.UUID, uuid.UUID] = {}
+    
+    def _assign(self, tweet: Tweet, context: Dict[str, Any]) -> None:
+        """تعیین خوشه توییت"""
+        cluster_id, duplicate = self.index.assign(tweet.id, tweet.text)
+        tweet.cluster_id = cluster_id
+        self._pending[tweet.id] = cluster_id
+        
+        context["cluster_id"] = cluster_id
+        if duplicate:
+            context["duplicate_of"] = cluster_id
+    
+    async def _analyzed(self, cluster_ids: Set[uuid.UUID]) -> Set[uuid.UUID]:
+        """نماینده‌هایی که همه تحلیل‌های analysis_types برایشان ذخیره شده است"""
+        analyzed = set(cluster_ids)
+        if not analyzed:
+            return analyzed
+        
+        async with get_read_session() as session:
+            repository = AnalysisRepository(session)
+            for analysis_type in self.analysis_types:
+                if not analyzed:
+                    break
+                analyzed = await repository.analyzed_tweet_ids(analysis_type, list(analyzed))
+        return analyzed
+    
+    async def process(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """تعیین خوشه توییت و فیلتر نسخه تکراری نماینده تحلیل‌شده"""
+        return (await self.process_batch([tweet], [context]))[0]
+    
+    async def process_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """تعیین خوشه دسته با یک پرس‌وجوی تحلیل نماینده‌ها"""
+        for tweet, context in zip(tweets, contexts):
+            self._assign(tweet, context)
+        
+        analyzed: Set[uuid.UUID] = set()
+        if self.skip_duplicates:
+            analyzed = await self._analyzed({context["duplicate_of"] for context in contexts if "duplicate_of" in context})
+        
+        return [(context.get("duplicate_of") not in analyzed, context) for context in contexts]
+    
+    async def flush(self) -> None:
+        """ذخیره دسته‌ای خوشه توییت‌ها"""
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, {}
+        async with get_db_session() as session:
+            await TweetRepository(session).set_cluster_ids(pending)
+        
+        duplicates = sum(1 for tweet_id, cluster_id in pending.items() if tweet_id != cluster_id)
+        logger.debug(f"Assigned clusters to {len(pending)} tweets ({duplicates} near-duplicates)")
+
+
+class AnalysisStep(ProcessorStep):
+    """مرحله تحلیل متن با کلاینت تحلیل (LLM)
+    
+    توییت‌های هر دسته به صورت هم‌زمان (حداکثر max_concurrency) تحلیل می‌شوند.
+    توییت‌هایی که تحلیل این نوع را از قبل دارند بدون فراخوانی کلاینت عبور
+    می‌کنند. نتایج در حافظه جمع می‌شوند و در flush با یک دستور درج دسته‌ای از
+    طریق AnalysisRepository ذخیره می‌شوند.
+    """
+    
+    def __init__(
+        self, 
+        analysis_type: str = "sentiment", 
+        client: Optional[TextAnalysisClient] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.analysis_type = analysis_type
+        self._client = client
+        self.max_concurrency = max_concurrency or settings.processor.max_concurrency
+        self._pending: Dict[uuid.UUID, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+    
+    @property
+    def client(self) -> TextAnalysisClient:
+        """کلاینت تحلیل متن؛ به طور پیش‌فرض کلاینت مشترک پردازه"""
+        if self._client is None:
+            self._client = get_anthropic_client()
+        return self._client
+    
+    @property
+    def client_name(self) -> str:
+        """نام مدل یا کلاینت برای ثبت در processed_by"""
+        return getattr(self.client, "default_model", self.client.__class__.__name__)
+    
+    async def analyze(self, tweet: Tweet) -> Tuple[Any, str]:
+        """تحلیل متن توییت
+        
+        Returns:
+            Tuple[Any, str]: نتیجه تحلیل و تولیدکننده آن (processed_by)
+        """
+        response = await self.client.analyze_text(
+            TextAnalysisRequest(text=tweet.text, analysis_type=self.analysis_type)
+        )
+        return response.result, self.client_name
+    
+    async def _analyzed(self, tweets: List[Tweet]) -> Set[uuid.UUID]:
+        """شناسه توییت‌هایی که تحلیل این نوع را از قبل دارند"""
+        async with get_read_session() as session:
+            return await AnalysisRepository(session).analyzed_tweet_ids(
+                self.analysis_type, [tweet.id for tweet in tweets]
+            )
+    
+    def _skip(self, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """عبور توییتی که تحلیل این نوع را دارد"""
+        context[f"{self.analysis_type}_existing"] = True
+        return True, context
+    
+    async def process(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """تحلیل توییت و افزودن نتیجه به بافر ذخیره"""
+        if await self._analyzed([tweet]):
+            return self._skip(context)
+        return await self._analyze_one(tweet, context)
+    
+    async def _analyze_one(self, tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """تحلیل یک توییت با کلاینت"""
+        start_time = time.time()
+        result, processed_by = await self.analyze(tweet)
+        return self._store(tweet, context, result, processed_by, int((time.time() - start_time) * 1000))
+        
+    def _store(
+        self, 
+        tweet: Tweet, 
+        context: Dict[str, Any], 
+        result: Any, 
+        processed_by: str, 
+        processing_time: int
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """افزودن نتیجه به بافر ذخیره و بافت توییت"""
+        self._pending[tweet.id] = (
+            result.model_dump() if hasattr(result, "model_dump") else result,
+            {"processed_by": processed_by, "processing_time": processing_time}
+        )
+        
+        context[self.analysis_type] = result
+        context[f"{self.analysis_type}_processed_by"] = processed_by
+        return True, context
+    
+    async def process_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """تحلیل توییت‌هایی از دسته که تحلیل این نوع را ندارند"""
+        analyzed = await self._analyzed(tweets)
+        results: List[Optional[Tuple[bool, Dict[str, Any]]]] = [
+            self._skip(context) if tweet.id in analyzed else None
+            for tweet, context in zip(tweets, contexts)
+        ]
+        
+        pending = [index for index, tweet in enumerate(tweets) if tweet.id not in analyzed]
+        if pending:
+            outcomes = await self._analyze_batch(
+                [tweets[index] for index in pending], [contexts[index] for index in pending]
+            )
+            for index, outcome in zip(pending, outcomes):
+                results[index] = outcome
+        return results
+    
+    async def _analyze_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """تحلیل هم‌زمان توییت‌ها"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(tweet: Tweet, context: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await self._analyze_one(tweet, context)
+                except Exception as e:
+                    return self._fail(tweet, context, e)
+        
+        return list(await asyncio.gather(*(run(tweet, context) for tweet, context in zip(tweets, contexts))))
+    
+    async def flush(self) -> None:
+        """ذخیره دسته‌ای نتایج بافرشده"""
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, {}
+        async with get_db_session() as session:
+            created = await AnalysisRepository(session).bulk_create(
+                self.analysis_type,
+                {tweet_id: result for tweet_id, (result, _) in pending.items()},
+                row_values={tweet_id: values for tweet_id, (_, values) in pending.items()}
+            )
+        logger.debug(f"Stored {created} {self.analysis_type} analyses for {len(pending)} tweets")
+
+
+class SentimentCascadeStep(AnalysisStep):
+    """مرحله تحلیل احساسات آبشاری
+    
+    ابتدا امتیازدهنده محلی مبتنی بر واژه‌نامه اجرا می‌شود و فقط در صورتی که
+    اطمینان آن کمتر از آستانه باشد، کلاینت تحلیل متن (LLM) فراخوانی می‌شود.
+    در پردازش دسته‌ای، توییت‌های ارجاعی به LLM با پرامپت دسته‌ای تحلیل می‌شوند.
+    لایه‌ای که نتیجه را تولید کرده در processed_by ثبت می‌شود.
+    """
+    
+    def __init__(
+        self, 
+        client: Optional[TextAnalysisClient] = None,
+        scorer: Optional[LexiconSentimentScorer] = None,
+        threshold: Optional[float] = None
+    ):
+        super().__init__("sentiment", client)
+        self.scorer = scorer or LexiconSentimentScorer()
+        self.threshold = settings.processor.lexicon_confidence_threshold if threshold is None else threshold
+    
+    async def analyze(self, tweet: Tweet) -> Tuple[Any, str]:
+        """تحلیل احساسات توییت با کم‌هزینه‌ترین لایه کافی"""
+        result = self.scorer.score(tweet.text)
+        if result.confidence >= self.threshold:
+            return result, self.scorer.name
+    
+        return await self.client.sentiment_analysis(tweet.text), self.client_name
+
+    async def _analyze_batch(
+        self, 
+        tweets: List[Tweet], 
+        contexts: List[Dict[str, Any]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """امتیازدهی محلی همه توییت‌ها و تحلیل دسته‌ای موارد کم‌اطمینان با LLM"""
+        start_time = time.time()
+        scored = [self.scorer.score(tweet.text) for tweet in tweets]
+        local_time = int((time.time() - start_time) * 1000 / max(len(tweets), 1))
+        
+        escalated = [index for index, result in enumerate(scored) if result.confidence < self.threshold]
+        llm_results: Dict[int, Any] = {}
+        llm_time = 0
+        if escalated:
+            start_time = time.time()
+            outcomes = await self.client.analyze_batch([tweets[index].text for index in escalated], "sentiment")
+            llm_time = int((time.time() - start_time) * 1000 / len(escalated))
+            llm_results = dict(zip(escalated, outcomes))
+        
+        results = []
+        for index, (tweet, context) in enumerate(zip(tweets, contexts)):
+            if index not in llm_results:
+                results.append(self._store(tweet, context, scored[index], self.scorer.name, local_time))
+            elif isinstance(llm_results[index], Exception):
+                results.append(self._fail(tweet, context, llm_results[index]))
+            else:
+                results.append(self._store(tweet, context, llm_results[index], self.client_name, llm_time))
+        return results
 
 
 class TweetProcessingPipeline:
@@ -60,71 +435,222 @@ class TweetProcessingPipeline:
     def setup_default_steps(self) -> None:
         """تنظیم مراحل پیش‌فرض پردازش"""
         if not self.steps:
+            # تشخیص زبان پیش از فیلترینگ تا فیلتر زبان روی توییت‌های بدون زبان هم اعمال شود
+            if settings.processor.language_detection_enabled:
+                self.steps.append(LanguageDetectionStep())
+            
             # در ابتدا فقط از فیلترینگ استفاده می‌کنیم
             self.steps.append(FilterStep())
+            
+            if settings.processor.near_duplicate_enabled:
+                self.steps.append(NearDuplicateStep())
+            
+            if settings.processor.sentiment_cascade_enabled:
+                self.steps.append(SentimentCascadeStep())
+            
+            for analysis_type in settings.processor.analysis_types:
+                if analysis_type == "sentiment" and settings.processor.sentiment_cascade_enabled:
+                    continue
+                self.steps.append(AnalysisStep(analysis_type))
     
     def add_step(self, step: ProcessorStep) -> None:
         """افزودن یک مرحله به خط لوله"""
         self.steps.append(step)
     
+    def pushdown_condition(self) -> Optional[ColumnElement]:
+        """شرط SQL فیلترهای مراحل ابتدایی خط لوله
+        
+        فقط مراحل فیلتر پیش از اولین مرحله دیگر منتقل می‌شوند تا توییتی که
+        مرحله‌ای روی آن اجرا می‌شد، نادیده گرفته نشود. مراحل فیلتر همچنان روی
+        توییت‌های بارگذاری‌شده اجرا می‌شوند (فیلترهای غیرقابل انتقال و شرط‌هایی
+        که در SQL به NULL رسیده‌اند). مرحله تشخیص زبان مانع انتقال نیست، چون
+        فقط زبان خالی را پر می‌کند و شرط SQL فیلتر زبان، زبان خالی را می‌پذیرد.
+        """
+        conditions = []
+        for step in self.steps:
+            if isinstance(step, LanguageDetectionStep):
+                continue
+            if not isinstance(step, FilterStep):
+                break
+            condition, _ = step.filter_pipeline.to_sql()
+            if condition is not None:
+                conditions.append(condition)
+        
+        return and_(*conditions) if conditions else None
+    
     async def process_tweet(self, tweet: Tweet) -> Tuple[bool, Dict[str, Any]]:
         """پردازش یک توییت با تمام مراحل"""
-        context: Dict[str, Any] = {}
+        _, success, context = (await self.process_tweets([tweet]))[0]
+        return success, context
+    
+    async def process_tweets(self, tweets: List[Tweet]) -> List[Tuple[Tweet, bool, Dict[str, Any]]]:
+        """پردازش لیستی از توییت‌ها
+        
+        دسته به ترتیب از مراحل عبور می‌کند و توییت‌هایی که در یک مرحله متوقف
+        می‌شوند (مثلاً فیلتر شده‌اند) از دسته مرحله بعد حذف می‌شوند. پس از پایان
+        دسته، نتایج بافرشده مراحل ذخیره می‌شوند؛ اگر ذخیره یک مرحله شکست بخورد،
+        توییت‌های موفق دسته ناموفق ثبت می‌شوند.
+        """
+        contexts: Dict[Any, Dict[str, Any]] = {tweet.id: {} for tweet in tweets}
+        passed: Dict[Any, bool] = {tweet.id: True for tweet in tweets}
+        batch = list(tweets)
         
         for step in self.steps:
+            if not batch:
+                break
+        
             try:
-                continue_pipeline, context = await step.process(tweet, context)
-                
-                if not continue_pipeline:
+                step_results = await step.process_batch(batch, [contexts[tweet.id] for tweet in batch])
+            except Exception as e:
+                logger.error(f"Error processing batch of {len(batch)} tweets at step {step.__class__.__name__}: {str(e)}")
+                step_results = [
+                    (False, {**contexts[tweet.id], "error": f"{step.__class__.__name__}: {str(e)}"})
+                    for tweet in batch
+                ]
+            
+            next_batch = []
+            for tweet, (continue_pipeline, context) in zip(batch, step_results):
+                contexts[tweet.id] = context
+                if continue_pipeline:
+                    next_batch.append(tweet)
+                else:
                     logger.debug(f"Tweet {tweet.id} stopped at step {step.__class__.__name__}")
-                    return False, context
-                    
+                    passed[tweet.id] = False
+            batch = next_batch
+        
+        for step in self.steps:
+            try:
+                await step.flush()
             except Exception as e:
-                logger.error(f"Error processing tweet {tweet.id} at step {step.__class__.__name__}: {str(e)}")
-                return False, context
+                logger.error(f"Error flushing step {step.__class__.__name__}: {str(e)}")
+                for tweet in batch:
+                    if passed[tweet.id]:
+                        contexts[tweet.id]["error"] = f"{step.__class__.__name__}: {str(e)}"
+                        passed[tweet.id] = False
         
-        # همه مراحل با موفقیت انجام شد
-        return True, context
+        return [(tweet, passed[tweet.id], contexts[tweet.id]) for tweet in tweets]
     
-    async def process_tweets(self, tweets: List[Tweet]) -> List[Tuple[Tweet, bool, Dict[str, Any]]]:
-        """پردازش لیستی از توییت‌ها"""
-        results = []
+    @staticmethod
+    def group_results(
+        results: List[Tuple[Tweet, bool, Dict[str, Any]]]
+    ) -> Tuple[Dict[str, List[uuid.UUID]], Dict[uuid.UUID, str]]:
+        """گروه‌بندی نتایج پردازش بر اساس وضعیت نهایی
         
-        for tweet in tweets:
-            success, context = await self.process_tweet(tweet)
-            results.append((tweet, success, context))
+        Returns:
+            Tuple: شناسه توییت‌ها به تفکیک وضعیت (done، filtered یا failed) و پیام خطای توییت‌های ناموفق
+        """
+        by_status: Dict[str, List[uuid.UUID]] = {}
+        errors: Dict[uuid.UUID, str] = {}
+        for tweet, success, context in results:
+            if success:
+                status = ProcessingStateRepository.STATUS_DONE
+            elif "error" in context:
+                status = ProcessingStateRepository.STATUS_FAILED
+                errors[tweet.id] = context["error"]
+            else:
+                status = ProcessingStateRepository.STATUS_FILTERED
+            by_status.setdefault(status, []).append(tweet.id)
         
-        return results
+        return by_status, errors
+    
+    @classmethod
+    async def enqueue_unprocessed(cls: Type['TweetProcessingPipeline'], limit: int = 100) -> ProcessingJob:
+        """ثبت توییت‌های پردازش‌نشده در صف کار پایدار برای پردازش توسط کارگرها
+        
+        فیلترهای قابل انتقال همان‌جا در دیتابیس اعمال می‌شوند و watermark جلو
+        می‌رود، چون توییت‌های ثبت‌شده دیگر بدون وضعیت نیستند.
+        """
+        pipeline_version = settings.processor.pipeline_version
+        safety_margin = timedelta(seconds=settings.processor.watermark_safety_seconds)
+        where = cls().pushdown_condition()
+        
+        async with get_db_session() as session:
+            state_repo = ProcessingStateRepository(session)
+            job_repo = ProcessingJobRepository(session)
+            job = await job_repo.create_job(pipeline_version, limit)
+            
+            watermark = await state_repo.get_watermark(pipeline_version)
+            since = watermark - safety_margin if watermark else None
+            enqueued_count, max_ingested_at = await state_repo.enqueue(pipeline_version, job.id, limit, since, where)
+            
+            await job_repo.set_enqueued(job.id, enqueued_count)
+            job.enqueued_count = enqueued_count
+            if max_ingested_at is not None:
+                await state_repo.advance_watermark(pipeline_version, max_ingested_at)
+        
+        logger.info(f"Enqueued {enqueued_count} tweets for processing job {job.id}")
+        return job
     
     @classmethod
     async def process_all_unprocessed(cls: Type['TweetProcessingPipeline'], limit: int = 100) -> int:
-        """پردازش تمام توییت‌های پردازش نشده"""
+        """پردازش توییت‌های پردازش نشده
+        
+        توییت‌ها به ترتیب زمان ورود و به صورت دسته‌ای برداشته می‌شوند و وضعیت هر
+        توییت برای نسخه فعلی خط لوله ثبت می‌شود، بنابراین هر اجرا فقط توییت‌های
+        جدید و توییت‌های ناموفقی را که زمان تلاش بعدی‌شان رسیده پردازش می‌کند.
+        """
         pipeline = cls()
+        pipeline_version = settings.processor.pipeline_version
+        max_attempts = settings.processor.queue_max_attempts
+        safety_margin = timedelta(seconds=settings.processor.watermark_safety_seconds)
         processed_count = 0
+        claimed_count = 0
         
-        async with get_db_session() as session:
-            # در فاز اول، معیار "پردازش شده" را نداریم، بنابراین همه توییت‌ها را می‌گیریم
-            # در فازهای بعدی می‌توان با اضافه کردن فیلد processed به توییت‌ها، فقط توییت‌های پردازش نشده را پردازش کرد
-            tweet_repo = TweetRepository(session)
-            tweets = await tweet_repo.list(limit=limit)
+        # فیلترهای قابل انتقال در کوئری برداشت اعمال می‌شوند
+        where = pipeline.pushdown_condition()
+        
+        while claimed_count < limit:
+            batch_size = min(settings.processor.batch_size, limit - claimed_count)
             
-            if not tweets:
-                logger.info("No tweets to process")
-                return 0
+            # برداشت دسته در یک تراکنش جداگانه تا پردازشگرهای دیگر آن را برندارند
+            async with get_db_session() as session:
+                state_repo = ProcessingStateRepository(session)
+                watermark = await state_repo.get_watermark(pipeline_version)
+                since = watermark - safety_margin if watermark else None
+                claim = await state_repo.claim_batch(pipeline_version, batch_size, since, where, max_attempts)
             
-            logger.info(f"Processing {len(tweets)} tweets")
+            if not claim.claimed_count:
+                break
+            
+            claim_token, tweets = claim.claim_token, claim.tweets
+            claimed_count += claim.claimed_count
+            logger.info(f"Processing {len(tweets)} of {claim.claimed_count} claimed tweets")
             
             # پردازش توییت‌ها
             results = await pipeline.process_tweets(tweets)
             
-            # شمارش توییت‌های پردازش شده با موفقیت
-            for tweet, success, context in results:
-                if success:
-                    processed_count += 1
-                    
-                    # در فازهای بعدی، می‌توان وضعیت پردازش را ذخیره کرد
-                    # await tweet_repo.update(tweet.id, processed=True)
+            # ثبت نتیجه تمام توییت‌های دسته در یک تراکنش
+            by_status, errors = cls.group_results(results)
+            processed_count += len(by_status.get(ProcessingStateRepository.STATUS_DONE, []))
             
-            logger.info(f"Successfully processed {processed_count} tweets")
+            async with get_db_session() as session:
+                state_repo = ProcessingStateRepository(session)
+                for status, tweet_ids in by_status.items():
+                    if status != ProcessingStateRepository.STATUS_FAILED:
+                        await state_repo.mark(tweet_ids, pipeline_version, status, claim_token)
+                        continue
+                    
+                    # توییت ناموفق با تأخیر نمایی در اجراهای بعدی دوباره برداشته می‌شود
+                    for tweet_id in tweet_ids:
+                        attempts = claim.attempts.get(tweet_id, 0)
+                        new_status = await state_repo.retry_or_dead(
+                            tweet_id, pipeline_version, claim_token, errors[tweet_id],
+                            attempts, max_attempts, ProcessingStateRepository.retry_delay(attempts),
+                            retry_status=ProcessingStateRepository.STATUS_FAILED
+                        )
+                        if new_status == ProcessingStateRepository.STATUS_DEAD:
+                            logger.warning(f"Tweet {tweet_id} marked dead after {attempts + 1} attempts: "
+                                           f"{errors[tweet_id]}")
+                
+                if claim.max_ingested_at is not None:
+                    await state_repo.advance_watermark(pipeline_version, claim.max_ingested_at)
             
-            return processed_count
\ No newline at end of file
+            if claim.claimed_count < batch_size:
+                break
+        
+        if not claimed_count:
+            logger.info("No tweets to process")
+        else:
+            logger.info(f"Successfully processed {processed_count} of {claimed_count} tweets")
+        
+        return processed_count
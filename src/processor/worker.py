@@ -0,0 +1,170 @@
+"""
+کارگرهای صف پردازش
+
+این ماژول کارگرهایی را تعریف می‌کند که آیتم‌های صف کار پایدار (سطرهای
+TweetProcessingState با وضعیت queued) را اجاره می‌کنند، آن‌ها را با خط لوله
+پردازش اجرا می‌کنند و نتیجه را ثبت می‌کنند. آیتم ناموفق با تأخیر نمایی دوباره
+در صف قرار می‌گیرد و پس از queue_max_attempts تلاش dead می‌شود. کارگرها
+می‌توانند به صورت coroutine در برنامه وب (ProcessingWorkerPlugin) یا در
+پردازه‌های جداگانه اجرا شوند:
+
+    python -m src.processor.worker --workers 4
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import uuid
+from typing import Callable, List, Optional
+
+from src.api.anthropic import close_anthropic_client
+from src.config.settings import settings
+from src.core.plugin import Plugin
+from src.data.database import close_db_connections, create_tables, get_db_session
+from src.data.repositories import ProcessingStateRepository
+from src.processor.pipeline import TweetProcessingPipeline
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingWorker:
+    """کارگر صف پردازش با خط لوله اختصاصی
+    
+    هر کارگر نمونه خط لوله خود را دارد، چون مراحل نتایج را تا flush در حافظه
+    نگه می‌دارند.
+    """
+    
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        pipeline_factory: Callable[[], TweetProcessingPipeline] = TweetProcessingPipeline,
+        batch_size: Optional[int] = None,
+        max_attempts: Optional[int] = None
+    ):
+        self.name = name or f"worker-{uuid.uuid4().hex[:8]}"
+        self.pipeline = pipeline_factory()
+        self.batch_size = batch_size or settings.processor.batch_size
+        self.max_attempts = max_attempts or settings.processor.queue_max_attempts
+        self.pipeline_version = settings.processor.pipeline_version
+    
+    async def run_once(self) -> int:
+        """اجاره، پردازش و ثبت نتیجه یک دسته
+        
+        Returns:
+            int: تعداد آیتم‌های اجاره‌شده
+        """
+        async with get_db_session() as session:
+            lease = await ProcessingStateRepository(session).lease_batch(
+                self.pipeline_version, self.batch_size, self.max_attempts
+            )
+        
+        if not lease.tweets:
+            return 0
+        
+        logger.info(f"{self.name} leased {len(lease.tweets)} tweets")
+        results = await self.pipeline.process_tweets(lease.tweets)
+        by_status, errors = TweetProcessingPipeline.group_results(results)
+        
+        dead = 0
+        async with get_db_session() as session:
+            state_repo = ProcessingStateRepository(session)
+            for status, tweet_ids in by_status.items():
+                if status != ProcessingStateRepository.STATUS_FAILED:
+                    await state_repo.mark(tweet_ids, self.pipeline_version, status, lease.claim_token)
+                    continue
+                
+                for tweet_id in tweet_ids:
+                    attempts = lease.attempts[tweet_id]
+                    new_status = await state_repo.retry_or_dead(
+                        tweet_id, self.pipeline_version, lease.claim_token, errors[tweet_id],
+                        attempts, self.max_attempts, ProcessingStateRepository.retry_delay(attempts)
+                    )
+                    if new_status == ProcessingStateRepository.STATUS_DEAD:
+                        dead += 1
+                        logger.warning(f"Tweet {tweet_id} moved to dead letter after {attempts + 1} attempts: "
+                                       f"{errors[tweet_id]}")
+        
+        failed = len(by_status.get(ProcessingStateRepository.STATUS_FAILED, []))
+        logger.info(
+            f"{self.name} finished {len(lease.tweets)} tweets: "
+            f"{len(by_status.get(ProcessingStateRepository.STATUS_DONE, []))} done, "
+            f"{len(by_status.get(ProcessingStateRepository.STATUS_FILTERED, []))} filtered, "
+            f"{failed - dead} retrying, {dead} dead"
+        )
+        return len(lease.tweets)
+    
+    async def run(self) -> None:
+        """پردازش صف در حلقه تکرار؛ در صورت خالی بودن صف منتظر می‌ماند"""
+        logger.info(f"{self.name} started")
+        while True:
+            try:
+                leased = await self.run_once()
+            except Exception as e:
+                logger.error(f"{self.name} error: {str(e)}", exc_info=True)
+                leased = 0
+            
+            if not leased:
+                await asyncio.sleep(settings.processor.queue_poll_interval)
+
+
+class ProcessingWorkerPlugin(Plugin):
+    """پلاگین اجرای کارگرهای صف پردازش درون برنامه وب"""
+    
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = settings.processor.queue_workers if workers is None else workers
+        self.tasks: List[asyncio.Task] = []
+    
+    @property
+    def name(self) -> str:
+        return "processing_worker"
+    
+    @property
+    def version(self) -> str:
+        return "0.1.0"
+    
+    @property
+    def description(self) -> str:
+        return "پردازش توییت‌های صف کار پایدار با چند کارگر هم‌زمان"
+    
+    def initialize(self) -> None:
+        """راه‌اندازی پلاگین"""
+        self.tasks = [
+            asyncio.create_task(ProcessingWorker(f"worker-{index}").run())
+            for index in range(self.workers)
+        ]
+        logger.info(f"ProcessingWorkerPlugin initialized with {self.workers} workers")
+    
+    def shutdown(self) -> None:
+        """خاموش کردن پلاگین"""
+        for task in self.tasks:
+            task.cancel()
+        
+        logger.info("ProcessingWorkerPlugin shutdown")
+
+
+async def run_workers(workers: int) -> None:
+    """اجرای چند کارگر در پردازه فعلی"""
+    await create_tables()
+    try:
+        await asyncio.gather(*(ProcessingWorker(f"worker-{index}").run() for index in range(workers)))
+    finally:
+        await close_anthropic_client()
+        await close_db_connections()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run processing queue workers")
+    parser.add_argument("--workers", type=int, default=max(settings.processor.queue_workers, 1))
+    args = parser.parse_args()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    asyncio.run(run_workers(args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ API های وب
 """
 
 import logging
+import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Union
 
@@ -13,13 +14,25 @@ from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.twitter import create_twitter_client
+from src.api.governor import anthropic_governor
+from src.api.usage import usage_tracker
 from src.collector.keyword import collect_by_keywords
 from src.config.settings import settings
-from src.data.database import get_db_session
-from src.data.models import Collection, CollectionStatus, CollectionType
-from src.data.repositories import (CollectionRepository,
+from src.data.database import get_db_session, get_read_session
+from src.data.models import (AnalysisBatchJob, Collection, CollectionStatus,
+                                         CollectionType)
+from src.data.repositories import (AnalysisBatchRepository,
+                                               AnalysisRepository,
+                                               CollectionRepository,
                                                KeywordRepository,
+                                               KeywordVolumeRepository,
+                                               ProcessingJobRepository,
+                                               ProcessingStateRepository,
                                                TweetRepository, UserRepository)
+from src.processor.bulk_analysis import BulkAnalysisService
+from src.processor.dedup import get_near_duplicate_index
+from src.processor.filters import (EngagementFilter, FilterPipeline,
+                                  LanguageFilter, get_default_filter_pipeline)
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +97,52 @@ class PaginatedResponse(BaseModel):
     total_pages: int
 
 
+class TimeseriesPoint(BaseModel):
+    """مدل یک نقطه از سری زمانی حجم کلیدواژه"""
+    bucket_start: datetime
+    tweet_count: int
+    author_count: int
+    retweet_count: int
+    like_count: int
+    reply_count: int
+    quote_count: int
+
+
+class TimeseriesResponse(BaseModel):
+    """مدل پاسخ سری زمانی"""
+    keyword: str
+    granularity: str
+    points: List[TimeseriesPoint]
+
+
+class AnalysisBatchRequest(BaseModel):
+    """مدل درخواست ارسال دسته تحلیل آفلاین"""
+    analysis_type: str = Field("sentiment", pattern="^(sentiment|topic|sentiment_topic)$")
+    limit: Optional[int] = Field(None, ge=1)
+
+
+class AnalysisBatchJobResponse(BaseModel):
+    """مدل پاسخ دسته تحلیل Message Batches API"""
+    id: str
+    batch_id: str
+    analysis_type: str
+    model: str
+    status: str
+    request_count: int
+    succeeded_count: int
+    errored_count: int
+    submitted_at: datetime
+    ended_at: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+
+class AnalysisBatchResponse(BaseModel):
+    """مدل پاسخ ارسال دسته تحلیل"""
+    success: bool
+    job: Optional[AnalysisBatchJobResponse] = None
+
+
 class CollectRequest(BaseModel):
     """مدل درخواست جمع‌آوری"""
     keywords: List[str] = Field(..., min_items=1)
@@ -103,12 +162,18 @@ async def get_session() -> AsyncSession:
         yield session
 
 
+async def get_read_only_session() -> AsyncSession:
+    """تابع وابستگی برای دریافت جلسه فقط‌خواندنی (replica در صورت وجود)"""
+    async with get_read_session() as session:
+        yield session
+
+
 @router.get("/keywords", response_model=PaginatedResponse)
 async def get_keywords(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=5, le=100),
     active_only: bool = False,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_only_session)
 ):
     """دریافت لیست کلیدواژه‌ها"""
     keyword_repo = KeywordRepository(session)
@@ -148,53 +213,76 @@ async def get_tweets(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=5, le=100),
     keyword: Optional[str] = None,
-    session: AsyncSession = Depends(get_session)
+    q: Optional[str] = Query(None, min_length=1, max_length=256),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    lang: Optional[List[str]] = Query(None),
+    min_engagement: Optional[int] = Query(None, ge=0),
+    session: AsyncSession = Depends(get_read_only_session)
 ):
-    """دریافت لیست توییت‌ها"""
-    tweet_repo = TweetRepository(session)
+    """دریافت لیست توییت‌ها (بازه زمانی since/until امکان حذف پارتیشن‌ها را فراهم می‌کند)
+    
+    پارامتر q جستجوی تمام‌متن روی متن توییت‌ها انجام داده و نتایج را به ترتیب رتبه برمی‌گرداند.
+    پارامترهای lang و min_engagement همان فیلترهای خط لوله هستند که در کوئری دیتابیس اعمال می‌شوند.
+    """
+    if q and keyword:
+        raise HTTPException(status_code=400, detail="q and keyword cannot be combined")
+    
+    filter_pipeline = FilterPipeline()
+    if lang:
+        filter_pipeline.add_filter(LanguageFilter(lang))
+    if min_engagement:
+        filter_pipeline.add_filter(EngagementFilter(min_total=min_engagement))
+    where, _ = filter_pipeline.to_sql()
+    if where is not None and (q or keyword):
+        raise HTTPException(status_code=400, detail="lang and min_engagement cannot be combined with q or keyword")
+    if q and not settings.database.fulltext_search_enabled:
+        raise HTTPException(status_code=400, detail="Full-text search is disabled")
+    
+    if settings.archive.enabled:
+        # کوئری‌های بازه زمانی شامل توییت‌های بایگانی‌شده هم می‌شوند
+        from src.data.archive import ArchivedTweetRepository
+        tweet_repo = ArchivedTweetRepository(session)
+    else:
+        tweet_repo = TweetRepository(session)
     
     # محاسبه پارامترهای صفحه‌بندی
     skip = (page - 1) * page_size
     
-    # دریافت توییت‌ها
-    if keyword:
-        tweets = await tweet_repo.get_by_keyword(
+    # دریافت توییت‌ها به صورت سطرهای سبک همراه با اطلاعات نویسنده
+    if q:
+        rows = await tweet_repo.search_rows(q, skip=skip, limit=page_size, since=since, until=until)
+        total_count = await tweet_repo.count_search(q, since=since, until=until)
+    elif keyword:
+        rows = await tweet_repo.get_rows_by_keyword(
             keyword=keyword,
             skip=skip,
-            limit=page_size
+            limit=page_size,
+            since=since,
+            until=until
         )
-        # در این فاز، محاسبه تعداد کل برای فیلتر کلیدواژه پیاده‌سازی نشده است
-        total_count = 100  # مقدار پیش‌فرض
+        total_count = await tweet_repo.count_by_keyword(keyword, since=since, until=until)
     else:
-        tweets = await tweet_repo.list(skip=skip, limit=page_size)
-        total_count = await tweet_repo.count()
+        rows = await tweet_repo.list_rows(skip=skip, limit=page_size, since=since, until=until, where=where)
+        total_count = await tweet_repo.count(since=since, until=until, where=where)
     
     # تبدیل به مدل پاسخ
-    tweet_responses = []
-    for tweet in tweets:
-        author_username = ""
-        author_name = ""
-        
-        # دریافت اطلاعات نویسنده
-        if hasattr(tweet, "user") and tweet.user:
-            author_username = tweet.user.username
-            author_name = tweet.user.display_name
-        
-        tweet_responses.append(
-            TweetResponse(
-                id=str(tweet.id),
-                tweet_id=tweet.tweet_id,
-                text=tweet.text,
-                created_at=tweet.created_at,
-                author_username=author_username,
-                author_name=author_name,
-                retweet_count=tweet.retweet_count,
-                like_count=tweet.like_count,
-                reply_count=tweet.reply_count,
-                quote_count=tweet.quote_count,
-                language=tweet.language
-            )
+    tweet_responses = [
+        TweetResponse(
+            id=str(row.id),
+            tweet_id=row.tweet_id,
+            text=row.text,
+            created_at=row.created_at,
+            author_username=row.author_username,
+            author_name=row.author_name,
+            retweet_count=row.retweet_count or 0,
+            like_count=row.like_count or 0,
+            reply_count=row.reply_count or 0,
+            quote_count=row.quote_count or 0,
+            language=row.language
         )
+        for row in rows
+    ]
     
     # محاسبه تعداد کل صفحات
     total_pages = (total_count + page_size - 1) // page_size
@@ -214,7 +302,7 @@ async def get_collections(
     page_size: int = Query(20, ge=5, le=100),
     status: Optional[str] = None,
     collection_type: Optional[str] = None,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_only_session)
 ):
     """دریافت لیست جمع‌آوری‌ها"""
     collection_repo = CollectionRepository(session)
@@ -274,6 +362,165 @@ async def get_collections(
     )
 
 
+@router.get("/stats/timeseries", response_model=TimeseriesResponse)
+async def get_timeseries(
+    keyword: str,
+    granularity: str = Query("hour", pattern="^(hour|day)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_read_only_session)
+):
+    """دریافت سری زمانی حجم توییت‌ها، نویسندگان و تعامل یک کلیدواژه (فقط از جدول تجمیع)"""
+    volume_repo = KeywordVolumeRepository(session)
+    volumes = await volume_repo.get_series(keyword, granularity=granularity, since=since, until=until)
+    
+    return TimeseriesResponse(
+        keyword=keyword,
+        granularity=granularity,
+        points=[
+            TimeseriesPoint(
+                bucket_start=volume.bucket_start,
+                tweet_count=volume.tweet_count,
+                author_count=volume.author_count,
+                retweet_count=volume.retweet_count,
+                like_count=volume.like_count,
+                reply_count=volume.reply_count,
+                quote_count=volume.quote_count
+            )
+            for volume in volumes
+        ]
+    )
+
+
+def _batch_job_response(job: AnalysisBatchJob) -> AnalysisBatchJobResponse:
+    """تبدیل دسته تحلیل به مدل پاسخ"""
+    return AnalysisBatchJobResponse(
+        id=str(job.id),
+        batch_id=job.batch_id,
+        analysis_type=job.analysis_type,
+        model=job.model,
+        status=job.status,
+        request_count=job.request_count,
+        succeeded_count=job.succeeded_count,
+        errored_count=job.errored_count,
+        submitted_at=job.submitted_at,
+        ended_at=job.ended_at,
+        processed_at=job.processed_at,
+        error=job.error
+    )
+
+
+@router.post("/analysis/batches", response_model=AnalysisBatchResponse)
+async def submit_analysis_batch(request: AnalysisBatchRequest):
+    """ارسال توییت‌های تحلیل‌نشده به Message Batches API (نتایج توسط پلاگین poller ثبت می‌شوند)"""
+    service = BulkAnalysisService()
+    try:
+        job = await service.submit(request.analysis_type, request.limit)
+    except Exception as e:
+        logger.error(f"Error submitting analysis batch: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await service.close()
+    
+    return AnalysisBatchResponse(success=job is not None, job=_batch_job_response(job) if job else None)
+
+
+@router.get("/analysis/batches/{batch_id}", response_model=AnalysisBatchJobResponse)
+async def get_analysis_batch(batch_id: str, session: AsyncSession = Depends(get_read_only_session)):
+    """دریافت وضعیت یک دسته تحلیل"""
+    job = await AnalysisBatchRepository(session).get_by_batch_id(batch_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis batch not found")
+    
+    return _batch_job_response(job)
+
+
+@router.get("/processing/jobs/{job_id}", response_model=Dict)
+async def get_processing_job(job_id: uuid.UUID, session: AsyncSession = Depends(get_read_only_session)):
+    """وضعیت یک کار صف پردازش و تعداد آیتم‌های آن به تفکیک وضعیت"""
+    job = await ProcessingJobRepository(session).get_by_id(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Processing job not found")
+    
+    counts = await ProcessingStateRepository(session).count_by_status(job_id=job.id)
+    pending = counts.get(ProcessingStateRepository.STATUS_QUEUED, 0) + counts.get(
+        ProcessingStateRepository.STATUS_PROCESSING, 0
+    )
+    return {
+        "id": str(job.id),
+        "pipeline_version": job.pipeline_version,
+        "requested": job.requested_count,
+        "enqueued": job.enqueued_count,
+        "status": "running" if pending else "completed",
+        "items": counts,
+        "created_at": job.created_at,
+    }
+
+
+@router.get("/processing/queue", response_model=Dict)
+async def get_processing_queue(session: AsyncSession = Depends(get_read_only_session)):
+    """تعداد آیتم‌های صف پردازش نسخه فعلی خط لوله به تفکیک وضعیت"""
+    return await ProcessingStateRepository(session).count_by_status(
+        pipeline_version=settings.processor.pipeline_version
+    )
+
+
+@router.post("/processing/dead/requeue", response_model=Dict)
+async def requeue_dead_items(job_id: Optional[uuid.UUID] = None):
+    """بازگرداندن آیتم‌های dead صف پردازش (همه یا یک کار) به صف"""
+    async with get_db_session() as session:
+        requeued = await ProcessingStateRepository(session).requeue_dead(
+            settings.processor.pipeline_version, job_id
+        )
+    return {"success": True, "requeued": requeued}
+
+
+@router.get("/analysis/usage", response_model=Dict)
+async def get_analysis_usage():
+    """مصرف توکن و برخورد کش پرامپت به تفکیک نوع تحلیل (از زمان راه‌اندازی فرایند)"""
+    return usage_tracker.snapshot()
+
+
+@router.get("/analysis/governor", response_model=Dict)
+async def get_analysis_governor():
+    """وضعیت حاکم بودجه Anthropic: عمق صف، زمان محدودشده، ظرفیت باقی‌مانده و هزینه امروز"""
+    return anthropic_governor.metrics()
+
+
+@router.get("/processor/filters", response_model=List[Dict])
+async def get_processor_filters():
+    """ترتیب فعلی فیلترهای پردازش به همراه نرخ قبول و هزینه اندازه‌گیری‌شده هر فیلتر"""
+    return get_default_filter_pipeline().report()
+
+
+@router.get("/processor/duplicates", response_model=Dict)
+async def get_processor_duplicates():
+    """آمار شاخص توییت‌های تقریباً تکراری: تعداد جستجو، تکراری‌ها و خوشه‌های فعال"""
+    return get_near_duplicate_index().metrics()
+
+
+@router.get("/analysis/tiers", response_model=Dict)
+async def get_analysis_tiers(
+    analysis_type: str = "sentiment",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_read_only_session)
+):
+    """تعداد تحلیل‌ها به تفکیک لایه پردازش و سهم درخواست‌های LLM"""
+    tiers = await AnalysisRepository(session).count_by_processor(analysis_type, since=since, until=until)
+    total = sum(tiers.values())
+    # تحلیل‌های لایه محلی با نام امتیازدهنده و بقیه با نام مدل LLM ثبت می‌شوند
+    local = sum(count for processed_by, count in tiers.items() if processed_by.startswith("lexicon-"))
+    
+    return {
+        "analysis_type": analysis_type,
+        "total": total,
+        "tiers": tiers,
+        "local_share": local / total if total else 0.0,
+        "llm_share": (total - local) / total if total else 0.0
+    }
+
+
 @router.post("/collect", response_model=CollectResponse)
 async def collect_tweets(request: CollectRequest):
     """جمع‌آوری فوری توییت‌ها"""
@@ -18,13 +18,14 @@ from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.middleware.sessions import SessionMiddleware
 
+from src.api.anthropic import close_anthropic_client
 from src.api.twitter import create_twitter_client
 from src.collector.keyword import collect_by_keywords
 from src.config.settings import settings
 from src.core.di import container
 from src.core.exceptions import TwitterAnalysisError
 from src.core.plugin import PluginManager, plugin_manager
-from src.data.database import create_tables, get_db_session
+from src.data.database import create_tables, get_db_session, get_read_session
 from src.data.models import Collection, CollectionStatus, CollectionType
 from src.data.repositories import (CollectionRepository, KeywordRepository,
                                   TweetRepository, UserRepository)
@@ -108,6 +109,12 @@ async def get_session() -> AsyncSession:
         yield session
 
 
+async def get_read_only_session() -> AsyncSession:
+    """تابع وابستگی برای دریافت جلسه فقط‌خواندنی (replica در صورت وجود)"""
+    async with get_read_session() as session:
+        yield session
+
+
 @app.on_event("startup")
 async def startup_event():
     """رویداد راه‌اندازی برنامه"""
@@ -120,6 +127,27 @@ async def startup_event():
         try:
             # کشف و راه‌اندازی پلاگین‌ها
             plugin_manager.discover_plugins("src.collector")
+            
+            if settings.database.raw_payload_migration_enabled:
+                from src.data.payload_migration import RawPayloadMigrationPlugin
+                plugin_manager.register_plugin(RawPayloadMigrationPlugin())
+            
+            if settings.database.partitioning_enabled:
+                from src.data.partitioning import PartitionMaintenancePlugin
+                plugin_manager.register_plugin(PartitionMaintenancePlugin())
+            
+            if settings.archive.enabled:
+                from src.data.archive import ArchivePlugin
+                plugin_manager.register_plugin(ArchivePlugin())
+            
+            if settings.anthropic_api.batch_jobs_enabled:
+                from src.processor.bulk_analysis import AnalysisBatchPollerPlugin
+                plugin_manager.register_plugin(AnalysisBatchPollerPlugin())
+            
+            if settings.processor.queue_enabled and settings.processor.queue_workers > 0:
+                from src.processor.worker import ProcessingWorkerPlugin
+                plugin_manager.register_plugin(ProcessingWorkerPlugin())
+            
             plugin_manager.initialize_all()
             logger.info("Plugins initialized")
         except Exception as e:
@@ -143,6 +171,8 @@ async def shutdown_event():
         plugin_manager.shutdown_all()
         logger.info("Plugins shutdown")
         
+        await close_anthropic_client()
+        
     except Exception as e:
         logger.error(f"Error during shutdown: {str(e)}", exc_info=True)
 
@@ -157,7 +187,7 @@ async def index(request: Request):
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, session: AsyncSession = Depends(get_session)):
+async def dashboard(request: Request, session: AsyncSession = Depends(get_read_only_session)):
     """داشبورد مدیریت"""
     # دریافت آمار کلی
     tweet_repo = TweetRepository(session)
@@ -171,7 +201,7 @@ async def dashboard(request: Request, session: AsyncSession = Depends(get_sessio
     collection_count = await collection_repo.count()
     
     # دریافت آخرین توییت‌ها
-    latest_tweets = await tweet_repo.list(limit=10)
+    latest_tweets = await tweet_repo.list_rows(limit=10)
     
     # دریافت کلیدواژه‌های فعال
     active_keywords = await keyword_repo.list(active_only=True)
@@ -202,7 +232,7 @@ async def keywords_page(
     request: Request, 
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=5, le=100),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_only_session)
 ):
     """صفحه مدیریت کلیدواژه‌ها"""
     keyword_repo = KeywordRepository(session)
@@ -238,7 +268,7 @@ async def collections_page(
     request: Request, 
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=5, le=100),
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_only_session)
 ):
     """صفحه مدیریت جمع‌آوری‌ها"""
     collection_repo = CollectionRepository(session)
@@ -275,7 +305,7 @@ async def tweets_page(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=5, le=100),
     keyword: Optional[str] = None,
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_read_only_session)
 ):
     """صفحه مشاهده توییت‌ها"""
     tweet_repo = TweetRepository(session)
@@ -285,15 +315,14 @@ async def tweets_page(
     
     # دریافت توییت‌ها
     if keyword:
-        tweets = await tweet_repo.get_by_keyword(
+        tweets = await tweet_repo.get_rows_by_keyword(
             keyword=keyword,
             skip=skip,
             limit=page_size
         )
-        # در این فاز، محاسبه تعداد کل برای فیلتر کلیدواژه پیاده‌سازی نشده است
-        total_count = 100  # مقدار پیش‌فرض
+        total_count = await tweet_repo.count_by_keyword(keyword)
     else:
-        tweets = await tweet_repo.list(skip=skip, limit=page_size)
+        tweets = await tweet_repo.list_rows(skip=skip, limit=page_size)
         total_count = await tweet_repo.count()
     
     # محاسبه تعداد کل صفحات
@@ -447,8 +476,20 @@ async def collect_now(keywords_data: Dict[str, Any]):
 async def process_tweets(
     limit: int = Query(100, ge=1, le=1000)
 ):
-    """پردازش توییت‌ها"""
+    """پردازش توییت‌ها
+    
+    با فعال بودن صف کار، توییت‌ها فقط در صف ثبت می‌شوند و پاسخ بلافاصله با
+    شناسه کار برمی‌گردد؛ وضعیت کار از /api/processing/jobs/{job_id} خوانده می‌شود.
+    """
     try:
+        if settings.processor.queue_enabled:
+            job = await TweetProcessingPipeline.enqueue_unprocessed(limit=limit)
+            return {
+                "success": True,
+                "job_id": str(job.id),
+                "enqueued": job.enqueued_count
+            }
+        
         # اجرای پردازش
         processed_count = await TweetProcessingPipeline.process_all_unprocessed(limit=limit)
         
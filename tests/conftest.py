@@ -0,0 +1,49 @@
+"""
+پیکربندی مشترک تست‌ها
+
+فیکسچر db برای هر تست یک دیتابیس SQLite جداگانه در پوشه موقت می‌سازد.
+"""
+
+import pytest
+
+from src.data import database
+
+
+@pytest.fixture
+async def db(tmp_path):
+    """دیتابیس SQLite تازه با تمام جدول‌ها"""
+    database.setup_db(f"sqlite:///{tmp_path / 'test.db'}")
+    import src.data.models  # noqa: F401  ثبت مدل‌ها در metadata
+    await database.create_tables()
+    yield
+    await database.close_db_connections()
+
+
+@pytest.fixture
+def add_tweets(db):
+    """ذخیره توییت‌های آزمایشی یک نویسنده؛ هر آرگومان کلیدی یک ستون توییت است"""
+    async def add(*rows: dict) -> list:
+        from datetime import datetime, timedelta
+        
+        from src.data.database import get_db_session
+        from src.data.models import Tweet, User
+        
+        async with get_db_session() as session:
+            user = User(user_id="author", username="author")
+            session.add(user)
+            await session.flush()
+            
+            start = datetime.utcnow() - timedelta(minutes=len(rows))
+            tweets = []
+            for index, row in enumerate(rows):
+                values = {"tweet_id": str(index), "text": f"tweet {index}", **row}
+                tweets.append(Tweet(
+                    user_id=user.id,
+                    created_at=start,
+                    ingested_at=start + timedelta(seconds=index),
+                    **values
+                ))
+            session.add_all(tweets)
+        return tweets
+    
+    return add
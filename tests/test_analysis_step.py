@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from src.api.anthropic import close_anthropic_client, get_anthropic_client
+from src.api.interfaces import SentimentAnalysisResult
+from src.data.database import get_db_session, get_read_session
+from src.data.models import Analysis
+from src.data.repositories import AnalysisRepository
+from src.processor.pipeline import AnalysisStep, SentimentCascadeStep, TweetProcessingPipeline
+
+
+class FakeClient:
+    """کلاینت تحلیل ساختگی که متن‌های ارسال‌شده را ثبت می‌کند"""
+    
+    default_model = "fake-model"
+    
+    def __init__(self):
+        self.texts = []
+    
+    async def analyze_text(self, request):
+        self.texts.append(request.text)
+        return SimpleNamespace(result={"label": request.text})
+    
+    async def analyze_batch(self, texts, analysis_type):
+        self.texts.extend(texts)
+        return [SentimentAnalysisResult(sentiment="neutral", confidence=0.9, text_snippet=text) for text in texts]
+
+
+async def stored_results(analysis_type):
+    async with get_read_session() as session:
+        result = await session.execute(
+            select(Analysis.tweet_id, Analysis.result).where(Analysis.analysis_type == analysis_type)
+        )
+        return dict(result.all())
+
+
+async def test_already_analyzed_tweets_skip_the_client(add_tweets):
+    tweets = await add_tweets({"text": "first"}, {"text": "second"}, {"text": "third"})
+    async with get_db_session() as session:
+        await AnalysisRepository(session).create(tweets[0].id, "custom", {"label": "stored"})
+    
+    client = FakeClient()
+    results = await TweetProcessingPipeline([AnalysisStep("custom", client=client)]).process_tweets(tweets)
+    
+    assert sorted(client.texts) == ["second", "third"]
+    assert all(passed for _, passed, _ in results)
+    assert results[0][2]["custom_existing"] is True
+    stored = await stored_results("custom")
+    assert stored[tweets[0].id] == {"label": "stored"}
+    assert stored[tweets[1].id] == {"label": "second"}
+    
+    # اجرای دوباره هیچ درخواستی نمی‌فرستد
+    await TweetProcessingPipeline([AnalysisStep("custom", client=client)]).process_tweets(tweets)
+    assert len(client.texts) == 2
+
+
+async def test_cascade_skips_already_analyzed_tweets(add_tweets):
+    tweets = await add_tweets({"text": "first"}, {"text": "second"})
+    async with get_db_session() as session:
+        await AnalysisRepository(session).create(tweets[1].id, "sentiment", {"sentiment": "positive"})
+    
+    client = FakeClient()
+    # آستانه بالاتر از هر اطمینانی است، پس همه توییت‌ها به LLM ارجاع می‌شوند
+    step = SentimentCascadeStep(client=client, threshold=2.0)
+    await TweetProcessingPipeline([step]).process_tweets(tweets)
+    
+    assert client.texts == ["first"]
+    assert (await stored_results("sentiment"))[tweets[1].id] == {"sentiment": "positive"}
+
+
+async def test_steps_share_one_client_until_shutdown():
+    first, second = AnalysisStep("sentiment"), SentimentCascadeStep()
+    client = first.client
+    
+    assert second.client is client
+    assert get_anthropic_client() is client
+    
+    await close_anthropic_client()
+    assert client.client.is_closed()
+    assert AnalysisStep("sentiment").client is not client
+    await close_anthropic_client()
@@ -0,0 +1,55 @@
+import json
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+
+from src.api.anthropic import AnthropicClient
+from src.data.analysis_cache import AnalysisCache
+
+SENTIMENT = {"sentiment": "positive", "confidence": 0.9, "text_snippet": "خوب"}
+
+
+def unavailable(model: str) -> anthropic.APIStatusError:
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    return anthropic.NotFoundError(f"{model} unavailable", response=httpx.Response(404, request=request), body=None)
+
+
+@pytest.fixture
+def client():
+    client = AnthropicClient(
+        api_key="test", default_model="primary", fallback_model="fallback",
+        cache=AnalysisCache(use_database=False), max_attempts=1
+    )
+    client.calls = []
+    client.primary_down = False
+    
+    async def send(system_prompt, user_message, model, *args):
+        client.calls.append(model)
+        if model == "primary" and client.primary_down:
+            raise unavailable(model)
+        return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(SENTIMENT))], model=f"{model}-20250101")
+    
+    client._send = send
+    return client
+
+
+async def test_default_model_result_is_cached(client):
+    await client.sentiment_analysis("خوب است")
+    await client.sentiment_analysis("خوب است")
+    
+    assert client.calls == ["primary"]
+
+
+async def test_fallback_result_is_not_cached_under_default_key(client):
+    client.primary_down = True
+    result = await client.sentiment_analysis("خوب است")
+    assert result.sentiment == "positive"
+    assert client.calls == ["primary", "fallback"]
+    
+    # پس از بازگشت مدل پیش‌فرض، متن دوباره با همان مدل تحلیل می‌شود
+    client.primary_down = False
+    await client.sentiment_analysis("خوب است")
+    await client.sentiment_analysis("خوب است")
+    assert client.calls == ["primary", "fallback", "primary"]
@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src.data.archive import ArchivedTweetRepository, ArchiveReader, TweetArchiver
+from src.data.database import get_read_session
+from src.web.api import TweetResponse
+
+START = datetime(2024, 1, 1, 12, 0)
+DAYS = 5
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    """بایگانی دو توییت در هر روز با شمارنده‌ها و زبان خالی"""
+    rows = []
+    for index in range(DAYS * 2):
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "tweet_id": str(index),
+            "text": f"tweet {index}",
+            "created_at": START + timedelta(days=index // 2, hours=index % 2),
+            "retweet_count": None if index % 3 else 2,
+            "like_count": None,
+            "reply_count": 1,
+            "quote_count": None,
+            "language": None if index % 2 else "fa",
+            "author_username": "author",
+            "author_name": "Author",
+            "keywords": ["dollar"] if index % 2 else [],
+        })
+    TweetArchiver(str(tmp_path), compression="snappy")._write_partitioned("tweets", pd.DataFrame(rows), "created_at")
+    return tmp_path
+
+
+@pytest.fixture
+def read_files(monkeypatch):
+    """فهرست فایل‌های Parquet خوانده‌شده"""
+    paths = []
+    read_parquet = pd.read_parquet
+    
+    def recording(path, *args, **kwargs):
+        paths.append(path)
+        return read_parquet(path, *args, **kwargs)
+    
+    monkeypatch.setattr(pd, "read_parquet", recording)
+    return paths
+
+
+def test_read_tweets_stops_after_limit(archive_dir, read_files):
+    reader = ArchiveReader(str(archive_dir))
+    since, until = START - timedelta(days=1), START + timedelta(days=DAYS)
+    
+    newest = reader.read_tweets(since, until, limit=3, newest_first=True)
+    assert len(read_files) == 2
+    assert sorted(newest["tweet_id"]) == ["6", "7", "8", "9"]
+    
+    oldest = reader.read_tweets(since, until, keyword="dollar", limit=2)
+    assert list(oldest["tweet_id"]) == ["1", "3"]
+    
+    assert len(reader.read_tweets(since, until)) == DAYS * 2
+
+
+async def test_archived_rows_have_integer_counts(db, archive_dir, read_files):
+    async with get_read_session() as session:
+        repository = ArchivedTweetRepository(session, ArchiveReader(str(archive_dir)))
+        rows = await repository.list_rows(skip=2, limit=2, since=START - timedelta(days=1), until=START + timedelta(days=DAYS))
+    
+    assert [row.tweet_id for row in rows] == ["7", "6"]
+    assert len(read_files) == 2
+    for row in rows:
+        response = TweetResponse(
+            id=row.id, tweet_id=row.tweet_id, text=row.text, created_at=row.created_at,
+            author_username=row.author_username, author_name=row.author_name,
+            retweet_count=row.retweet_count or 0, like_count=row.like_count or 0,
+            reply_count=row.reply_count or 0, quote_count=row.quote_count or 0, language=row.language
+        )
+        assert (response.like_count, response.retweet_count, response.reply_count) == (0, 2 if row.tweet_id == "6" else 0, 1)
+    assert rows[0].language is None and rows[1].language == "fa"
@@ -0,0 +1,77 @@
+import uuid
+
+from sqlalchemy import select
+
+from src.data.database import get_db_session, get_read_session
+from src.data.models import Tweet
+from src.data.repositories import AnalysisRepository
+from src.processor.dedup import MinHasher, NearDuplicateIndex, estimate_similarity, shingles
+from src.processor.pipeline import NearDuplicateStep
+
+TEXT = "قیمت دلار امروز در بازار آزاد تهران دوباره بالا رفت و به رکورد تازه‌ای رسید"
+RETWEET = f"RT @someone: {TEXT} https://t.co/abc123"
+OTHER = "تیم ملی فوتبال ایران امشب در ورزشگاه آزادی با حریف آسیایی خود بازی می‌کند"
+
+
+def test_shingles_ignore_links_mentions_and_punctuation():
+    assert shingles("سلام دنیا! @user https://t.co/x") == shingles("سلام، دنیا")
+    assert shingles("") == set()
+
+
+def test_minhash_estimates_similarity():
+    hasher = MinHasher(num_perm=128)
+    
+    assert estimate_similarity(hasher.signature(TEXT), hasher.signature(TEXT)) == 1.0
+    assert estimate_similarity(hasher.signature(TEXT), hasher.signature(RETWEET)) > 0.8
+    assert estimate_similarity(hasher.signature(TEXT), hasher.signature(OTHER)) < 0.2
+    assert hasher.signature("!!!") is None
+
+
+def test_index_clusters_near_duplicates():
+    index = NearDuplicateIndex()
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    
+    assert index.assign(first, TEXT, now=0) == (first, False)
+    assert index.assign(second, RETWEET, now=1) == (first, True)
+    assert index.assign(third, OTHER, now=2) == (third, False)
+    # مورد تکراری دوباره نماینده خودش را برمی‌گرداند
+    assert index.assign(first, TEXT, now=3) == (first, False)
+    assert index.metrics() == {"lookups": 4, "duplicates": 1, "evicted": 0, "clusters": 2}
+
+
+def test_index_evicts_expired_and_excess_clusters():
+    index = NearDuplicateIndex(window_seconds=10, max_clusters=2)
+    first = uuid.uuid4()
+    index.assign(first, TEXT, now=0)
+    
+    # خوشه پس از پایان پنجره حذف می‌شود و نسخه جدید نماینده خوشه تازه است
+    later = uuid.uuid4()
+    assert index.assign(later, RETWEET, now=20) == (later, False)
+    assert len(index) == 1
+    
+    index.assign(uuid.uuid4(), OTHER, now=21)
+    index.assign(uuid.uuid4(), "یک متن کاملاً متفاوت درباره هوای بارانی پاییز", now=22)
+    assert len(index) == 2
+    assert index.metrics()["evicted"] == 2
+    assert later not in index._clusters
+
+
+async def test_duplicates_are_skipped_only_after_representative_is_analyzed(add_tweets):
+    original, copy, later_copy = await add_tweets({"text": TEXT}, {"text": RETWEET}, {"text": RETWEET + " !"})
+    step = NearDuplicateStep(NearDuplicateIndex(), analysis_types=["sentiment"])
+    
+    # نماینده در همین دسته است و هنوز تحلیلی ندارد، پس نسخه تکراری ادامه می‌دهد
+    results = await step.process_batch([original, copy], [{}, {}])
+    assert [passed for passed, _ in results] == [True, True]
+    assert results[1][1]["duplicate_of"] == original.id
+    
+    async with get_db_session() as session:
+        await AnalysisRepository(session).bulk_create("sentiment", {original.id: {"sentiment": "neutral"}})
+    
+    passed, context = await step.process(later_copy, {})
+    assert (passed, context["duplicate_of"]) == (False, original.id)
+    
+    await step.flush()
+    async with get_read_session() as session:
+        cluster_ids = (await session.execute(select(Tweet.cluster_id))).scalars().all()
+    assert set(cluster_ids) == {original.id}
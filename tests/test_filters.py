@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from src.data.database import get_read_session
+from src.data.models import Tweet
+from src.processor.filters import (EngagementFilter, FilterPipeline, LanguageFilter,
+                                   tweets_to_frame)
+
+ROWS = [
+    {"language": "fa", "like_count": 3, "retweet_count": 1, "reply_count": 0, "quote_count": 0},
+    {"language": "en", "like_count": 0, "retweet_count": 0, "reply_count": 0, "quote_count": 0},
+    {"language": "ar", "like_count": 10, "retweet_count": 5, "reply_count": 2, "quote_count": 1},
+    {"language": None, "like_count": None, "retweet_count": None, "reply_count": None, "quote_count": None},
+    {"language": "", "like_count": 1, "retweet_count": None, "reply_count": 4, "quote_count": None},
+    {"language": "fa", "like_count": None, "retweet_count": 2, "reply_count": None, "quote_count": 0},
+]
+
+FILTERS = [
+    LanguageFilter(["fa", "en"]),
+    LanguageFilter([]),
+    EngagementFilter(min_total=1),
+    EngagementFilter(min_likes=1),
+    EngagementFilter(min_retweets=1, min_total=3),
+    EngagementFilter(),
+]
+
+
+@pytest.mark.parametrize("tweet_filter", FILTERS, ids=lambda tweet_filter: repr(vars(tweet_filter)))
+async def test_apply_mask_and_sql_agree(add_tweets, tweet_filter):
+    tweets = await add_tweets(*ROWS)
+    
+    applied = [tweet_filter.apply(SimpleNamespace(**row)) for row in ROWS]
+    masked = tweet_filter.mask(tweets_to_frame(SimpleNamespace(**row) for row in ROWS))
+    async with get_read_session() as session:
+        result = await session.execute(select(Tweet.id).where(tweet_filter.to_sql()))
+        selected = set(result.scalars().all())
+    
+    assert list(masked) == applied
+    assert [tweet.id in selected for tweet in tweets] == applied
+
+
+def test_pipeline_batch_matches_per_tweet():
+    pipeline = FilterPipeline([LanguageFilter(["fa"]), EngagementFilter(min_total=1)])
+    tweets = [SimpleNamespace(**row) for row in ROWS]
+    
+    assert pipeline.apply_batch(tweets) == [pipeline.apply_all(tweet) for tweet in tweets]
+
+
+
+def test_reorder_puts_selective_filters_first():
+    passes_all = LanguageFilter([])
+    rejects_most = EngagementFilter(min_likes=5)
+    pipeline = FilterPipeline([passes_all, rejects_most], reorder_interval=len(ROWS))
+    
+    for row in ROWS:
+        pipeline.apply_all(SimpleNamespace(**row))
+    
+    assert pipeline.filters == [rejects_most, passes_all]
+    assert [entry["calls"] for entry in pipeline.report()] == [len(ROWS), len(ROWS)]
+
+
+def test_reorder_keeps_pinned_filters_in_place():
+    passes_all = LanguageFilter([])
+    rejects_most = EngagementFilter(min_likes=5)
+    pipeline = FilterPipeline(reorder_interval=len(ROWS))
+    pipeline.add_filter(passes_all, pinned=True)
+    pipeline.add_filter(rejects_most)
+    
+    for row in ROWS:
+        pipeline.apply_all(SimpleNamespace(**row))
+    
+    assert pipeline.filters == [passes_all, rejects_most]
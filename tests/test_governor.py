@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+
+from src.api import governor as governor_module
+from src.api.anthropic import AnthropicClient
+from src.api.governor import (PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, BudgetGovernor,
+                              TokenBucket)
+from src.core.exceptions import AnthropicAPIError, BudgetExceededError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ساعت ساختگی time.monotonic ماژول governor"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(governor_module.time, "monotonic", lambda: now.value)
+    return now
+
+
+def test_bucket_refills_continuously(clock):
+    bucket = TokenBucket(60)
+    bucket.consume(60)
+    
+    assert bucket.wait_time(10) == pytest.approx(10.0)
+    clock.value += 5
+    assert bucket.wait_time(10) == pytest.approx(5.0)
+    # درخواست بزرگ‌تر از ظرفیت فقط منتظر پر شدن کامل سطل می‌ماند
+    assert bucket.wait_time(1000) == pytest.approx(55.0)
+    clock.value += 1000
+    assert bucket.available() == 60
+
+
+def test_bucket_adjust_and_unlimited(clock):
+    bucket = TokenBucket(60)
+    bucket.consume(100)
+    assert bucket.available() == -40
+    
+    bucket.adjust(70)
+    assert bucket.available() == 30
+    bucket.adjust(1000)
+    assert bucket.available() == 60
+    
+    unlimited = TokenBucket(0)
+    unlimited.consume(10 ** 9)
+    assert unlimited.wait_time(10 ** 9) == 0.0
+    assert unlimited.available() is None
+
+
+async def test_settle_corrects_reservation_and_tracks_spend(clock):
+    governor = BudgetGovernor(
+        input_tokens_per_minute=1000, output_tokens_per_minute=1000, daily_spend_limit=0.01,
+        input_token_cost=3.0, output_token_cost=15.0
+    )
+    reservation = await governor.acquire(500, 200)
+    
+    usage = SimpleNamespace(input_tokens=100, output_tokens=50, cache_read_input_tokens=1000,
+                            cache_creation_input_tokens=None)
+    cost = governor.settle(reservation, usage)
+    
+    assert cost == pytest.approx((100 * 3 + 1000 * 0.1 * 3 + 50 * 15) / 1_000_000)
+    assert governor.input_tokens.available() == 900
+    assert governor.output_tokens.available() == 950
+    
+    governor.settle(None, SimpleNamespace(input_tokens=0, output_tokens=1000))
+    with pytest.raises(BudgetExceededError):
+        governor.check_budget()
+    assert governor.metrics()["rejected_requests"] == 1
+
+
+async def test_waiting_requests_are_served_by_priority():
+    governor = BudgetGovernor(requests_per_minute=600)
+    governor.requests.tokens = 0
+    order = []
+    
+    async def request(name, priority):
+        await governor.acquire(1, 1, priority)
+        order.append(name)
+    
+    tasks = []
+    for name, priority in (("bulk", PRIORITY_BULK), ("interactive", PRIORITY_INTERACTIVE), ("normal", PRIORITY_NORMAL)):
+        tasks.append(asyncio.create_task(request(name, priority)))
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    
+    assert order == ["interactive", "normal", "bulk"]
+    assert governor.stats["throttled_requests"] == 3
+    assert governor.metrics()["max_queue_depth"] == 3
+
+
+async def test_cancelled_request_leaves_the_queue():
+    governor = BudgetGovernor(requests_per_minute=600)
+    governor.requests.tokens = 0
+    
+    waiting = asyncio.create_task(governor.acquire(1, 1, PRIORITY_INTERACTIVE))
+    follower = asyncio.create_task(governor.acquire(1, 1, PRIORITY_BULK))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    
+    await asyncio.wait_for(follower, timeout=1)
+    assert waiting.cancelled()
+    assert governor.metrics()["queue_depth"] == 0
+
+
+async def test_release_refunds_the_request_token(clock):
+    governor = BudgetGovernor(requests_per_minute=60, input_tokens_per_minute=1000)
+    
+    reservation = await governor.acquire(100, 0)
+    assert governor.requests.available() == 59
+    
+    governor.release(reservation)
+    assert governor.requests.available() == 60
+    assert governor.input_tokens.available() == 1000
+
+
+async def test_every_attempt_goes_through_the_governor():
+    governor = BudgetGovernor(requests_per_minute=60)
+    client = AnthropicClient(
+        api_key="test", default_model="primary", fallback_model="primary",
+        governor=governor, max_attempts=2, initial_delay=0.0, jitter=0.0
+    )
+    attempts = []
+    
+    async def overloaded(**kwargs):
+        attempts.append(kwargs["model"])
+        request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+        raise anthropic.InternalServerError("boom", response=httpx.Response(500, request=request), body=None)
+    
+    client.client.messages.create = overloaded
+    
+    with pytest.raises(AnthropicAPIError):
+        await client._make_request("system", "text")
+    
+    # بازتلاش داخلی SDK غیرفعال است تا هر درخواست HTTP یک رزرو حاکم بودجه داشته باشد
+    assert client.client.max_retries == 0
+    assert len(attempts) == governor.stats["requests"] == 2
+    assert governor.requests.available() == pytest.approx(60, abs=0.1)
+    await client.close()
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select
+
+from src.data.database import get_read_session
+from src.data.models import Tweet
+from src.processor.langid import UNDETERMINED, LanguageIdentifier
+from src.processor.pipeline import LanguageDetectionStep
+
+SAMPLES = [
+    ("fa", "امروز هوا در تهران بسیار آلوده است و مدارس تعطیل شدند"),
+    ("fa", "من نمی‌دانم چرا این اتفاق افتاد https://t.co/abc @someone"),
+    ("fa", "قیمت دلار باز هم بالا رفت #اقتصاد"),
+    ("fa", "خیلی خوب بود ممنون"),
+    ("ar", "ذهبت إلى المدرسة في الصباح مع أصدقائي"),
+    ("ar", "هذه هي الحقيقة التي لا يريدون سماعها"),
+    ("ar", "الحمد لله على كل حال"),
+    ("ur", "میں آج بہت خوش ہوں کیونکہ موسم اچھا ہے"),
+    ("ur", "پاکستان کی ٹیم نے میچ جیت لیا"),
+    ("ur", "یہ بات سچ نہیں ہے"),
+    ("en", "This is the best thing that happened to me today"),
+    ("en", "I can't believe it was so cold this morning"),
+    ("en", "Breaking news: election results announced"),
+    (UNDETERMINED, "Bugün hava çok güzel ve güneşli"),
+    (UNDETERMINED, "Привет как дела у тебя сегодня"),
+    (UNDETERMINED, "hola amigos como estan todos hoy en la fiesta"),
+]
+
+
+@pytest.mark.parametrize("expected, text", SAMPLES)
+def test_detect(expected, text):
+    assert LanguageIdentifier().detect(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", None, "سلام", "ok", "@user https://t.co/x 123", "salam khobi"])
+def test_detect_without_enough_evidence(text):
+    assert LanguageIdentifier().detect(text) is None
+
+
+def test_detect_many_matches_detect():
+    identifier = LanguageIdentifier()
+    texts = [text for _, text in SAMPLES]
+    
+    assert identifier.detect_many(texts) == [identifier.detect(text) for text in texts]
+
+
+async def test_step_fills_only_missing_languages(add_tweets):
+    tweets = await add_tweets(
+        {"text": SAMPLES[0][1], "language": None},
+        {"text": SAMPLES[4][1], "language": "fa"},
+        {"text": "سلام", "language": None},
+    )
+    step = LanguageDetectionStep()
+    
+    results = await step.process_batch(tweets, [{}, {}, {}])
+    await step.flush()
+    
+    assert all(passed for passed, _ in results)
+    assert [context.get("detected_language") for _, context in results] == ["fa", None, None]
+    async with get_read_session() as session:
+        result = await session.execute(select(Tweet.tweet_id, Tweet.language).order_by(Tweet.tweet_id))
+        assert result.all() == [("0", "fa"), ("1", "fa"), ("2", None)]
@@ -0,0 +1,27 @@
+import pytest
+
+from src.processor.matcher import KeywordMatcher
+from src.processor.normalizer import tokenize
+
+
+def test_tokenize_keeps_sigils_only_on_request():
+    assert tokenize("#foo @bar baz") == ["foo", "bar", "baz"]
+    assert tokenize("#foo @bar baz", keep_sigils=True) == ["#foo", "@bar", "baz"]
+    # علامت وسط کلمه هشتگ نیست
+    assert tokenize("a#b", keep_sigils=True) == ["a", "b"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("foo bar", {"foo"}),
+    ("#foo bar", {"#foo", "foo"}),
+    ("@foo", {"foo"}),
+    ("user", set()),
+    ("@user hi", {"@user"}),
+    ("قیمت #دلار بالا رفت", {"قیمت دلار"}),
+    ("#اقتصاد", {"#اقتصاد"}),
+    ("اقتصاد ایران", set()),
+])
+def test_sigil_keywords_match_only_sigil_tokens(text, expected):
+    matcher = KeywordMatcher(["#foo", "foo", "@user", "قیمت دلار", "#اقتصاد"])
+    
+    assert matcher.find(text) == expected
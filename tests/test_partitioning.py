@@ -0,0 +1,45 @@
+from datetime import date
+
+import pytest
+
+from src.data import partitioning
+
+
+class RecordingConnection:
+    """اتصال ساختگی که دستورهای SQL اجراشده را ثبت می‌کند"""
+    
+    def __init__(self):
+        self.statements = []
+    
+    def execute(self, statement):
+        self.statements.append(str(statement))
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    partitions = {
+        "tweets": ["tweets_p2024_01", "tweets_p2024_06"],
+        "tweet_keywords": ["tweet_keywords_p2024_01"],
+        "analyses": [],
+    }
+    monkeypatch.setattr(partitioning, "_existing_partitions", lambda conn, table: partitions[table])
+    return RecordingConnection()
+
+
+def test_drop_purges_side_tables(connection):
+    removed = partitioning.apply_retention(connection, 3, "drop", today=date(2024, 6, 15))
+    
+    assert removed == ["tweet_keywords_p2024_01", "tweets_p2024_01"]
+    sql = "\n".join(connection.statements)
+    assert "DELETE FROM raw_payloads" in sql
+    assert "DELETE FROM tweet_processing_states" in sql
+    assert 'DROP TABLE "tweets_p2024_01"' in sql
+    assert "tweets_p2024_06" not in sql
+
+
+def test_detach_keeps_side_tables(connection):
+    removed = partitioning.apply_retention(connection, 3, "detach", today=date(2024, 6, 15))
+    
+    assert removed == ["tweet_keywords_p2024_01", "tweets_p2024_01"]
+    assert not any(statement.startswith(("DELETE", "DROP")) for statement in connection.statements)
+    assert 'ALTER TABLE "tweets" DETACH PARTITION "tweets_p2024_01"' in connection.statements
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from src.data.database import get_db_session
+from src.data.models import RawPayload, Tweet, User
+from src.data.payload_migration import migrate_raw_payloads
+from src.data.repositories import RawPayloadRepository
+
+
+async def test_migrate_raw_payloads_moves_inline_rows(db):
+    async with get_db_session() as session:
+        user = User(user_id="1", username="author", raw_data={"id": "1"})
+        session.add(user)
+        await session.flush()
+        for index in range(5):
+            session.add(Tweet(
+                tweet_id=str(index), text="text", user_id=user.id,
+                created_at=datetime.utcnow(), raw_data={"index": index}
+            ))
+    
+    assert await migrate_raw_payloads(batch_size=2) == 6
+    # ستون‌ها با NULL خالی می‌شوند و اجرای دوباره چیزی منتقل نمی‌کند
+    assert await migrate_raw_payloads(batch_size=2) == 0
+    
+    async with get_db_session() as session:
+        inline = await session.scalar(select(func.count()).where(Tweet.raw_data.is_not(None)))
+        assert inline == 0
+        assert await session.scalar(select(func.count(RawPayload.id))) == 6
+        
+        tweet = (await session.execute(select(Tweet).where(Tweet.tweet_id == "3"))).scalar_one()
+        payload = await RawPayloadRepository(session).get(RawPayloadRepository.ENTITY_TWEET, tweet.id)
+        assert payload == {"index": 3}
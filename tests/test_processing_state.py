@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from src.config.settings import settings
+from src.data.database import get_db_session, get_read_session
+from src.data.models import Tweet, TweetProcessingState
+from src.data.repositories import ProcessingJobRepository, ProcessingStateRepository
+from src.processor.pipeline import ProcessorStep, TweetProcessingPipeline
+
+VERSION = "test"
+
+
+@pytest.fixture(autouse=True)
+def processor_settings(monkeypatch):
+    monkeypatch.setattr(settings.processor, "pipeline_version", VERSION)
+    monkeypatch.setattr(settings.processor, "queue_max_attempts", 3)
+    monkeypatch.setattr(settings.processor, "queue_retry_base_seconds", 0.0)
+
+
+async def enqueue(count: int):
+    async with get_db_session() as session:
+        job = await ProcessingJobRepository(session).create_job(VERSION, count)
+        enqueued, _ = await ProcessingStateRepository(session).enqueue(VERSION, job.id, count)
+    return job, enqueued
+
+
+async def states():
+    async with get_read_session() as session:
+        result = await session.execute(
+            select(Tweet.tweet_id, TweetProcessingState.status, TweetProcessingState.attempts,
+                   TweetProcessingState.available_at)
+            .join(TweetProcessingState, TweetProcessingState.tweet_id == Tweet.id)
+            .where(TweetProcessingState.pipeline_version == VERSION)
+        )
+        return {row.tweet_id: row for row in result.all()}
+
+
+async def test_lease_is_exclusive(add_tweets):
+    await add_tweets({}, {}, {})
+    _, enqueued = await enqueue(3)
+    assert enqueued == 3
+    
+    async with get_db_session() as session:
+        first = await ProcessingStateRepository(session).lease_batch(VERSION, 2, 3)
+    async with get_db_session() as session:
+        second = await ProcessingStateRepository(session).lease_batch(VERSION, 2, 3)
+    
+    assert len(first.tweets) == 2
+    assert [tweet.tweet_id for tweet in second.tweets] == ["2"]
+    assert not {tweet.id for tweet in first.tweets} & {tweet.id for tweet in second.tweets}
+
+
+async def test_expired_lease_counts_as_attempt(add_tweets):
+    await add_tweets({})
+    await enqueue(1)
+    
+    for attempt in range(3):
+        async with get_db_session() as session:
+            lease = await ProcessingStateRepository(session).lease_batch(VERSION, 1, 3)
+            assert len(lease.tweets) == 1
+            assert lease.attempts[lease.tweets[0].id] == attempt
+            # کارگر بدون ثبت نتیجه از کار افتاده است
+            await session.execute(
+                update(TweetProcessingState)
+                .where(TweetProcessingState.claim_token == lease.claim_token)
+                .values(claimed_at=datetime.utcnow() - timedelta(hours=1))
+            )
+    
+    async with get_db_session() as session:
+        lease = await ProcessingStateRepository(session).lease_batch(VERSION, 1, 3)
+    assert lease.tweets == []
+    assert (await states())["0"].status == ProcessingStateRepository.STATUS_DEAD
+
+
+async def test_retry_backoff_then_dead(add_tweets):
+    await add_tweets({})
+    job, _ = await enqueue(1)
+    
+    async with get_db_session() as session:
+        repo = ProcessingStateRepository(session)
+        lease = await repo.lease_batch(VERSION, 1, 3)
+        tweet_id = lease.tweets[0].id
+        status = await repo.retry_or_dead(tweet_id, VERSION, lease.claim_token, "boom", 0, 3, 60)
+    
+    assert status == ProcessingStateRepository.STATUS_QUEUED
+    state = (await states())["0"]
+    assert state.attempts == 1
+    assert state.available_at > datetime.utcnow() + timedelta(seconds=50)
+    
+    # تا پایان تأخیر اجاره نمی‌شود
+    async with get_db_session() as session:
+        assert (await ProcessingStateRepository(session).lease_batch(VERSION, 1, 3)).tweets == []
+    
+    async with get_db_session() as session:
+        await session.execute(update(TweetProcessingState).values(available_at=datetime.utcnow()))
+    async with get_db_session() as session:
+        repo = ProcessingStateRepository(session)
+        lease = await repo.lease_batch(VERSION, 1, 3)
+        assert lease.attempts[tweet_id] == 1
+        status = await repo.retry_or_dead(tweet_id, VERSION, lease.claim_token, "boom", 2, 3, 60)
+    assert status == ProcessingStateRepository.STATUS_DEAD
+    
+    async with get_db_session() as session:
+        assert await ProcessingStateRepository(session).requeue_dead(VERSION, job.id) == 1
+    state = (await states())["0"]
+    assert (state.status, state.attempts) == (ProcessingStateRepository.STATUS_QUEUED, 0)
+
+
+def test_retry_delay_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings.processor, "queue_retry_base_seconds", 10.0)
+    monkeypatch.setattr(settings.processor, "queue_retry_max_seconds", 100.0)
+    
+    assert 5.0 <= ProcessingStateRepository.retry_delay(0) <= 10.0
+    assert 20.0 <= ProcessingStateRepository.retry_delay(2) <= 40.0
+    assert 50.0 <= ProcessingStateRepository.retry_delay(10) <= 100.0
+
+
+async def test_claim_filters_only_rejected_claimed_tweets(add_tweets):
+    await add_tweets(*({"like_count": likes} for likes in (5, 0, 7, 0)))
+    
+    async with get_db_session() as session:
+        batch = await ProcessingStateRepository(session).claim_batch(VERSION, limit=3, where=Tweet.like_count >= 3)
+    
+    assert sorted(tweet.tweet_id for tweet in batch.tweets) == ["0", "2"]
+    state = await states()
+    assert state["1"].status == ProcessingStateRepository.STATUS_FILTERED
+    assert state["0"].status == state["2"].status == ProcessingStateRepository.STATUS_PROCESSING
+    assert "3" not in state
+
+
+class FlakyStep(ProcessorStep):
+    """خطای دائمی برای توییت poison و خطای یک‌باره برای توییت transient"""
+    
+    def __init__(self):
+        self.calls = {}
+    
+    async def process(self, tweet, context):
+        self.calls[tweet.text] = self.calls.get(tweet.text, 0) + 1
+        if tweet.text == "poison" or (tweet.text == "transient" and self.calls[tweet.text] == 1):
+            raise RuntimeError(tweet.text)
+        return True, context
+
+
+async def test_inline_failures_are_retried_until_dead(add_tweets):
+    step = FlakyStep()
+    
+    class Pipeline(TweetProcessingPipeline):
+        def __init__(self):
+            self.steps = [step]
+    
+    await add_tweets({"text": "ok"}, {"text": "poison"}, {"text": "transient"})
+    
+    assert await Pipeline.process_all_unprocessed(limit=10) == 1
+    state = await states()
+    assert state["1"].status == state["2"].status == ProcessingStateRepository.STATUS_FAILED
+    assert state["1"].attempts == 1
+    
+    assert await Pipeline.process_all_unprocessed(limit=10) == 1
+    assert await Pipeline.process_all_unprocessed(limit=10) == 0
+    state = await states()
+    assert state["0"].status == state["2"].status == ProcessingStateRepository.STATUS_DONE
+    assert (state["1"].status, state["1"].attempts) == (ProcessingStateRepository.STATUS_DEAD, 3)
+    assert step.calls == {"ok": 1, "poison": 3, "transient": 2}
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from src.api.anthropic import BATCH_SYSTEM_PROMPTS, SYSTEM_PROMPTS, AnthropicClient
+from src.api.usage import TokenUsageTracker
+
+
+def make_client(**kwargs) -> AnthropicClient:
+    return AnthropicClient(api_key="test", default_model="primary", fallback_model="fallback", **kwargs)
+
+
+def test_short_prompts_are_sent_without_cache_control():
+    client = make_client()
+    
+    for prompt in [*SYSTEM_PROMPTS.values(), *BATCH_SYSTEM_PROMPTS.values()]:
+        assert client._system(prompt) == prompt
+
+
+def test_long_prompt_is_marked_cacheable():
+    prompt = "Classify the sentiment of the tweet. " * 150
+    
+    assert make_client()._system(prompt)[0]["cache_control"] == {"type": "ephemeral"}
+    assert make_client(prompt_caching=False)._system(prompt) == prompt
+
+
+def test_uncacheable_requests_do_not_count_as_misses():
+    tracker = TokenUsageTracker()
+    usage = SimpleNamespace(input_tokens=200, output_tokens=20)
+    
+    tracker.record("sentiment", usage, 0.5, cacheable=False)
+    tracker.record("sentiment", usage, 0.5, cacheable=False)
+    stats = tracker.snapshot()["sentiment"]
+    assert (stats["requests"], stats["uncacheable_requests"], stats["cache_misses"]) == (2, 2, 0)
+    assert stats["cache_hit_rate"] is None
+    
+    tracker.record("sentiment", SimpleNamespace(input_tokens=10, cache_read_input_tokens=1200), 0.2)
+    tracker.record("sentiment", SimpleNamespace(input_tokens=10, cache_creation_input_tokens=1200), 0.6)
+    stats = tracker.snapshot()["sentiment"]
+    assert (stats["cache_hits"], stats["cache_misses"]) == (1, 1)
+    assert stats["cache_hit_rate"] == 0.5
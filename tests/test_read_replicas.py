@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.data import database
+from src.data.database import ReadReplicaRouter, get_read_session
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ساعت ساختگی time.monotonic ماژول database"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(database.time, "monotonic", lambda: now.value)
+    return now
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    """سه replica سالم SQLite و یک replica از دسترس خارج (پوشه ناموجود)"""
+    healthy = [create_async_engine(f"sqlite+aiosqlite:///{tmp_path / f'replica{index}.db'}") for index in range(3)]
+    down = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    yield healthy, down
+    for engine in healthy + [down]:
+        await engine.dispose()
+
+
+def make_router(engines, lags=None, **kwargs):
+    """مسیریاب با تأخیر ساختگی هر replica (شماره replica -> ثانیه)"""
+    router = ReadReplicaRouter(engines, max_lag_seconds=30, check_interval=15, retry_interval=30, **kwargs)
+    router.lags = lags if lags is not None else {}
+    router.lag_checks = []
+    
+    async def lag(session):
+        # مانند پرس‌وجوی واقعی تأخیر، اتصال به replica برقرار می‌شود
+        await session.connection()
+        index = engines.index(session.bind)
+        router.lag_checks.append(index)
+        return router.lags.get(index, 0.0)
+    
+    router._replication_lag = lag
+    return router
+
+
+async def acquire_index(router):
+    """شماره replica جلسه دریافتی (یا None برای بازگشت به primary)"""
+    session = await router.acquire()
+    if session is None:
+        return None
+    try:
+        return router.engines.index(session.bind)
+    finally:
+        await session.close()
+
+
+async def test_round_robin_checks_lag_once_per_interval(engines, clock):
+    healthy, _ = engines
+    router = make_router(healthy)
+    
+    assert [await acquire_index(router) for _ in range(4)] == [0, 1, 2, 0]
+    assert router.lag_checks == [0, 1, 2]
+    
+    clock.value += 15
+    assert await acquire_index(router) == 1
+    assert router.lag_checks == [0, 1, 2, 1]
+
+
+async def test_lagging_replica_is_skipped_until_retry_interval(engines, clock):
+    healthy, _ = engines
+    router = make_router(healthy, lags={1: 60.0})
+    
+    assert [await acquire_index(router) for _ in range(4)] == [0, 2, 2, 0]
+    assert router.lag_checks == [0, 1, 2]
+    
+    # پس از پایان مهلت، replica دوباره بررسی می‌شود
+    router.lags[1] = 0.0
+    clock.value += 29
+    assert await acquire_index(router) == 2
+    clock.value += 1
+    assert [await acquire_index(router) for _ in range(3)] == [2, 0, 1]
+    assert router.lag_checks[-1] == 1
+
+
+async def test_unavailable_replica_is_skipped(engines, clock):
+    healthy, down = engines
+    router = make_router([down, healthy[0]])
+    
+    assert [await acquire_index(router) for _ in range(3)] == [1, 1, 1]
+    assert router._unhealthy_until == {0: 1030.0}
+    
+    # پس از پایان مهلت، replica در نوبت خود دوباره امتحان و باز کنار گذاشته می‌شود
+    clock.value += 30
+    assert [await acquire_index(router) for _ in range(2)] == [1, 1]
+    assert router._unhealthy_until[0] == 1060.0
+
+
+async def test_reads_fall_back_to_primary_without_healthy_replica(db, engines, clock, monkeypatch):
+    healthy, down = engines
+    router = make_router([down, healthy[0]], lags={1: 60.0})
+    monkeypatch.setattr(database, "read_replica_router", router)
+    
+    async with get_read_session() as session:
+        assert session.bind is database.async_engine
+    assert set(router._unhealthy_until) == {0, 1}
+    
+    clock.value += 30
+    router.lags[1] = 0.0
+    async with get_read_session() as session:
+        assert session.bind is healthy[0]
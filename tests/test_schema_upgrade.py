@@ -0,0 +1,146 @@
+import shutil
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from src.data import database
+from src.data.models import Analysis, Tweet, TweetKeyword, TweetProcessingState
+from src.data.repositories import ProcessingJobRepository, ProcessingStateRepository
+from src.processor.dedup import NearDuplicateIndex
+from src.processor.pipeline import NearDuplicateStep, ProcessorStep, TweetProcessingPipeline
+
+# دیتابیس همراه مخزن با طرح نسخه پایه
+BASELINE_DB = Path(__file__).resolve().parent.parent / "rasad.db"
+
+USER_ID = uuid.uuid4()
+TWEET_ID = uuid.uuid4()
+KEYWORD_ID = uuid.uuid4()
+CREATED_AT = datetime(2024, 3, 1, 12, 0)
+
+
+@pytest.fixture
+async def baseline_db(tmp_path):
+    """نسخه‌ای از دیتابیس طرح پایه با یک توییت، کلیدواژه آن و یک تحلیل"""
+    path = tmp_path / "baseline.db"
+    shutil.copy(BASELINE_DB, path)
+    
+    connection = sqlite3.connect(path)
+    now = datetime.utcnow().isoformat(" ")
+    connection.execute(
+        "INSERT INTO users (id, user_id, username, created_at, updated_at) VALUES (?, 'author', 'author', ?, ?)",
+        (USER_ID.hex, now, now)
+    )
+    connection.execute(
+        "INSERT INTO tweets (id, tweet_id, user_id, text, created_at, updated_at) VALUES (?, '1', ?, 'old', ?, ?)",
+        (TWEET_ID.hex, USER_ID.hex, CREATED_AT.isoformat(" "), now)
+    )
+    connection.execute(
+        "INSERT INTO keywords (id, text, active, created_at, updated_at) VALUES (?, 'old', 1, ?, ?)",
+        (KEYWORD_ID.hex, now, now)
+    )
+    connection.execute(
+        "INSERT INTO tweet_keywords (id, tweet_id, keyword_id, created_at) VALUES (?, ?, ?, ?)",
+        (uuid.uuid4().hex, TWEET_ID.hex, KEYWORD_ID.hex, now)
+    )
+    connection.execute(
+        "INSERT INTO analyses (id, tweet_id, analysis_type, result, created_at, updated_at) "
+        "VALUES (?, ?, 'sentiment', '{}', ?, ?)",
+        (uuid.uuid4().hex, TWEET_ID.hex, now, now)
+    )
+    # جدول وضعیت پردازش به شکل پیش از صف کار
+    connection.execute(
+        "CREATE TABLE tweet_processing_states (id CHAR(32) NOT NULL PRIMARY KEY, tweet_id CHAR(32) NOT NULL, "
+        "pipeline_version VARCHAR(50) NOT NULL, status VARCHAR(20) NOT NULL, claim_token VARCHAR(36), "
+        "claimed_at DATETIME, completed_at DATETIME, error TEXT, UNIQUE (tweet_id, pipeline_version))"
+    )
+    connection.execute(
+        "INSERT INTO tweet_processing_states (id, tweet_id, pipeline_version, status) VALUES (?, ?, 'old', 'done')",
+        (uuid.uuid4().hex, TWEET_ID.hex)
+    )
+    connection.commit()
+    connection.close()
+    
+    database.setup_db(f"sqlite:///{path}")
+    yield path
+    await database.close_db_connections()
+
+
+def columns(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        return {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+    finally:
+        connection.close()
+
+
+def indexes(path, table):
+    connection = sqlite3.connect(path)
+    try:
+        return {row[1] for row in connection.execute(f"PRAGMA index_list({table})")}
+    finally:
+        connection.close()
+
+
+async def test_upgrade_adds_missing_columns_and_is_idempotent(baseline_db):
+    assert not {"ingested_at", "cluster_id"} & columns(baseline_db, "tweets")
+    
+    await database.create_tables()
+    await database.create_tables()
+    
+    assert {"ingested_at", "cluster_id"} <= columns(baseline_db, "tweets")
+    assert {"ix_tweets_ingested_at", "ix_tweets_cluster_id"} <= indexes(baseline_db, "tweets")
+    
+    async with database.get_read_session() as session:
+        tweet = (await session.execute(select(Tweet))).scalar_one()
+        assert (tweet.id, tweet.ingested_at, tweet.cluster_id) == (TWEET_ID, None, None)
+
+
+async def test_upgrade_backfills_tweet_created_at(baseline_db):
+    await database.create_tables()
+    
+    for model in (TweetKeyword, Analysis):
+        table = model.__tablename__
+        assert f"ix_{table}_tweet_created_at" in indexes(baseline_db, table)
+        async with database.get_read_session() as session:
+            assert (await session.execute(select(model.tweet_created_at))).scalar_one() == CREATED_AT
+
+
+async def test_pipeline_runs_on_upgraded_database(baseline_db):
+    class PassStep(ProcessorStep):
+        async def process(self, tweet, context):
+            return True, context
+    
+    class Pipeline(TweetProcessingPipeline):
+        def __init__(self):
+            self.steps = [NearDuplicateStep(NearDuplicateIndex(), analysis_types=[]), PassStep()]
+    
+    await database.create_tables()
+    
+    assert await Pipeline.process_all_unprocessed(limit=10) == 1
+    async with database.get_read_session() as session:
+        assert (await session.execute(select(Tweet.cluster_id))).scalar_one() == TWEET_ID
+
+
+async def test_queue_runs_on_upgraded_processing_states(baseline_db):
+    await database.create_tables()
+    
+    assert {"job_id", "attempts", "available_at"} <= columns(baseline_db, "tweet_processing_states")
+    assert "ix_tweet_processing_states_status" in indexes(baseline_db, "tweet_processing_states")
+    
+    async with database.get_db_session() as session:
+        job = await ProcessingJobRepository(session).create_job("new", 10)
+        enqueued, _ = await ProcessingStateRepository(session).enqueue("new", job.id, 10)
+    async with database.get_db_session() as session:
+        lease = await ProcessingStateRepository(session).lease_batch("new", 10, 3)
+    
+    assert enqueued == 1
+    assert [tweet.id for tweet in lease.tweets] == [TWEET_ID]
+    async with database.get_read_session() as session:
+        result = await session.execute(
+            select(TweetProcessingState.attempts).where(TweetProcessingState.pipeline_version == "old")
+        )
+        assert result.scalar_one() == 0
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pytest
+
+from src.config.settings import settings
+from src.data import database
+from src.data.database import get_db_session
+from src.data.models import User
+from src.data.repositories import TweetRepository
+from src.data.search import TweetSearchIndex, create_search_index
+
+
+@pytest.fixture
+async def search_db(db, monkeypatch):
+    monkeypatch.setattr(settings.database, "fulltext_search_enabled", True)
+    async with database.async_engine.begin() as connection:
+        await connection.run_sync(create_search_index)
+    
+    async with get_db_session() as session:
+        user = User(user_id="author", username="author")
+        session.add(user)
+    return user
+
+
+def record_statements(monkeypatch):
+    statements = []
+    execute = TweetSearchIndex._execute
+    
+    async def recording(self, statement, params=None):
+        statements.append(str(statement).split()[0])
+        return await execute(self, statement, params)
+    
+    monkeypatch.setattr(TweetSearchIndex, "_execute", recording)
+    return statements
+
+
+async def test_new_tweets_are_indexed_without_delete(search_db, monkeypatch):
+    statements = record_statements(monkeypatch)
+    
+    async with get_db_session() as session:
+        await TweetRepository(session).create_or_update(
+            "1", user_id=search_db.id, text="قیمت دلار بالا رفت", created_at=datetime(2024, 1, 1)
+        )
+    
+    assert statements == ["INSERT"]
+    async with get_db_session() as session:
+        assert await TweetRepository(session).count_search("دلار") == 1
+
+
+async def test_updated_text_replaces_the_indexed_row(search_db):
+    async with get_db_session() as session:
+        repository = TweetRepository(session)
+        await repository.create_or_update("1", user_id=search_db.id, text="قیمت دلار", created_at=datetime(2024, 1, 1))
+        await repository.create_or_update("1", text="قیمت طلا")
+    
+    async with get_db_session() as session:
+        repository = TweetRepository(session)
+        assert await repository.count_search("دلار") == 0
+        assert await repository.count_search("طلا") == 1